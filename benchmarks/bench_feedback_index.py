@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: linear feedback scan vs FeedbackIndex window lookup
+
+Usage: python benchmarks/bench_feedback_index.py [sizes...]
+       (default sizes: 1000 100000 1000000)
+
+For each feedback volume it reports the index build time and the
+per-query cost of the original O(N) scan against the bisect lookup,
+and checks that both return the same liked/disliked sets.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python'))
+
+from feedback_index import FeedbackIndex
+from synthetic_feedback import WEATHERS, MOODS, generate_feedback
+
+
+def linear_preferences(feedbacks, weather, mood, temperature):
+    """The original get_feedback_preferences scan, kept here as the baseline"""
+    temp_min = temperature - 5
+    temp_max = temperature + 5
+    liked, disliked = [], []
+    for feedback in feedbacks:
+        if (feedback['weather'] == weather and
+                feedback['mood'] == mood and
+                temp_min <= feedback['temperature'] <= temp_max):
+            if feedback['liked']:
+                liked.append(feedback['recommended_beverage'])
+            else:
+                disliked.append(feedback['recommended_beverage'])
+    return {'liked': list(set(liked)), 'disliked': list(set(disliked)), 'total_feedback': len(feedbacks)}
+
+
+def time_queries(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(*query)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def run(size, seed=7):
+    feedbacks = list(generate_feedback(size))
+    rng = random.Random(seed)
+    queries = [(rng.choice(WEATHERS), rng.choice(MOODS), rng.randint(-5, 45)) for _ in range(200)]
+
+    start = time.perf_counter()
+    index = FeedbackIndex.from_feedbacks(feedbacks)
+    build_s = time.perf_counter() - start
+
+    # Same sets, for every query
+    for query in queries:
+        expected = linear_preferences(feedbacks, *query)
+        actual = index.preferences(*query)
+        assert set(expected['liked']) == set(actual['liked']), query
+        assert set(expected['disliked']) == set(actual['disliked']), query
+        assert expected['total_feedback'] == actual['total_feedback']
+
+    # Fewer scan queries at large sizes so the run stays reasonable
+    scan_queries = queries[:max(5, 200_000 // size)] if size > 1000 else queries
+    scan_s = time_queries(lambda *q: linear_preferences(feedbacks, *q), scan_queries)
+    index_s = time_queries(index.preferences, queries * 10)
+
+    print(f"{size:>9,} rows | build {build_s * 1000:9.1f} ms | "
+          f"scan {scan_s * 1e6:11.1f} us/query | index {index_s * 1e6:7.1f} us/query | "
+          f"speedup {scan_s / index_s:9.0f}x")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 100_000, 1_000_000]
+    for size in sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: load generator for python/predict_server.py
+
+Usage: python benchmarks/bench_predict_server.py [--requests N] [--concurrency C]
+                                                 [--configs 1:0,16:1,64:2]
+
+Each config is MAX_BATCH_SIZE:MAX_WAIT_MS. For every config a server is
+started on a Unix socket, C closed-loop clients send N requests in total,
+and throughput plus p50/p99 latency are reported. 1:0 disables batching
+and is the per-request baseline.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SERVER = os.path.join(REPO_DIR, 'python', 'predict_server.py')
+
+SAMPLE_INPUTS = [
+    {'weather': 'Sunny', 'mood': 'Happy', 'temperature': 32, 'humidity': 60},
+    {'weather': 'Rainy', 'mood': 'Relaxed', 'temperature': 20, 'humidity': 80},
+    {'weather': 'Cold', 'mood': 'Tired', 'temperature': 8, 'humidity': 70},
+    {'weather': 'Sunny', 'mood': 'Sad', 'temperature': 24, 'humidity': 60},
+]
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def start_server(socket_path, max_batch_size, max_wait_ms):
+    process = subprocess.Popen(
+        [sys.executable, SERVER, '--socket', socket_path,
+         '--max-batch-size', str(max_batch_size), '--max-wait-ms', str(max_wait_ms)],
+        stdout=subprocess.PIPE, text=True
+    )
+    ready = process.stdout.readline()
+    if not ready:
+        process.wait()
+        raise SystemExit(f"predict_server.py exited with code {process.returncode}")
+    return process
+
+
+async def client(socket_path, counter, total, latencies, failures, rng):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        while counter[0] < total:
+            counter[0] += 1
+            message = {'id': counter[0], 'data': rng.choice(SAMPLE_INPUTS)}
+            start = time.perf_counter()
+            writer.write((json.dumps(message) + '\n').encode())
+            response = json.loads(await reader.readline())
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not response.get('success'):
+                failures.append(response.get('error'))
+    finally:
+        writer.close()
+
+
+async def fetch_stats(socket_path):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(b'{"id": "stats", "type": "stats"}\n')
+    response = json.loads(await reader.readline())
+    writer.close()
+    return response['stats']['batching']
+
+
+async def run_load(socket_path, total, concurrency):
+    latencies, failures, counter = [], [], [0]
+    rng = random.Random(42)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(socket_path, counter, total, latencies, failures, rng)
+                           for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, failures, elapsed, await fetch_stats(socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--configs', default='1:0,16:1,64:2,256:5')
+    args = parser.parse_args()
+
+    print(f"{'batch:wait_ms':>14} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11} {'failed':>7}")
+    for config in args.configs.split(','):
+        max_batch_size, max_wait_ms = config.split(':')
+        socket_path = os.path.join(tempfile.mkdtemp(), 'predictor.sock')
+        server = start_server(socket_path, int(max_batch_size), float(max_wait_ms))
+        try:
+            latencies, failures, elapsed, stats = asyncio.run(
+                run_load(socket_path, args.requests, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+        latencies.sort()
+        print(f"{config:>14} {len(latencies) / elapsed:10,.0f} {percentile(latencies, 0.5):8.2f} "
+              f"{percentile(latencies, 0.99):8.2f} {stats['mean_batch_size']:11.1f} {len(failures):7}")
+
+
+if __name__ == "__main__":
+    main()
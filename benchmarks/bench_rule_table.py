@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: rule predictors before and after compiling the rule tables
+
+Usage: python benchmarks/bench_rule_table.py [--baseline-rev REV] [--calls N]
+
+The "before" implementations are loaded from git (by default the first
+commit of the repository). Before timing, every (weather, mood, band)
+input is checked to have exactly the same candidate distribution in
+both versions.
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+import types
+from collections import Counter
+from fractions import Fraction
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(REPO_DIR, 'python'))
+
+import predict_mock
+import predict_with_feedback
+from rules import BEVERAGE_RULES
+from vocab import BEVERAGES
+
+WEATHERS = sorted({weather for weather, _ in BEVERAGE_RULES}) + ['Unknown']
+MOODS = sorted({mood for _, mood in BEVERAGE_RULES}) + ['Unknown']
+TEMPERATURES = [40, 30, 5, 15, 22]  # one per band
+
+PREFERENCES = {'liked': ['Lemonade', 'Hot Chocolate'], 'disliked': ['Iced Coffee'], 'total_feedback': 3}
+
+
+def load_baseline(rev, path):
+    """Import a file as it was at `rev`"""
+    source = subprocess.check_output(['git', 'show', f'{rev}:{path}'], cwd=REPO_DIR, text=True)
+    module = types.ModuleType(os.path.basename(path)[:-3] + '_baseline')
+    module.__file__ = os.path.join(REPO_DIR, path)
+    exec(compile(source, path, 'exec'), module.__dict__)
+    return module
+
+
+def distribution(items, weights=None):
+    """Normalized {beverage: probability}"""
+    counts = Counter()
+    for i, item in enumerate(items):
+        counts[item] += weights[i] if weights else 1
+    total = sum(counts.values())
+    return {item: Fraction(count, total) for item, count in counts.items()}
+
+
+def baseline_distribution(module, fn, *args):
+    """Capture the list the baseline hands to random.choice"""
+    captured = []
+    module.random = types.SimpleNamespace(choice=lambda options: captured.append(list(options)) or options[0])
+    fn(*args)
+    module.random = random
+    return distribution(captured[0])
+
+
+def compiled_distribution(module, fn, *args):
+    """Capture the Candidates the compiled version draws from"""
+    captured = []
+    original = module.draw
+    module.draw = lambda candidates, rng=random: captured.append(candidates) or candidates.beverages[0]
+    fn(*args)
+    module.draw = original
+    beverages, cum_weights = captured[0].beverages, captured[0].cum_weights
+    weights = [cum_weights[0]] + [b - a for a, b in zip(cum_weights, cum_weights[1:])]
+    return distribution(beverages, weights)
+
+
+def check_equivalence(mock_base, feedback_base):
+    inputs = [(w, m, t, 60) for w in WEATHERS for m in MOODS for t in TEMPERATURES]
+    for args in inputs:
+        assert (baseline_distribution(mock_base, mock_base.mock_predict_beverage, *args) ==
+                compiled_distribution(predict_mock, predict_mock.mock_predict_beverage, *args)), args
+        assert (baseline_distribution(feedback_base, feedback_base.predict_beverage_with_feedback, *args) ==
+                compiled_distribution(predict_with_feedback, predict_with_feedback.predict_beverage_with_feedback, *args)), args
+    print(f"distribution check: {len(inputs) * 2} inputs identical")
+
+
+def calls_per_second(fn, inputs, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(*inputs[i % len(inputs)])
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    root = subprocess.check_output(['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=REPO_DIR, text=True).split()[0]
+    parser.add_argument('--baseline-rev', default=root)
+    parser.add_argument('--calls', type=int, default=200_000)
+    args = parser.parse_args()
+
+    mock_base = load_baseline(args.baseline_rev, 'python/predict_mock.py')
+    feedback_base = load_baseline(args.baseline_rev, 'python/predict_with_feedback.py')
+
+    # Keep feedback I/O out of the measurement: both versions see the same preferences
+    feedback_base.get_feedback_preferences = lambda *a: PREFERENCES
+    liked_ids = {BEVERAGES.add(beverage) for beverage in PREFERENCES['liked']}
+    disliked_ids = {BEVERAGES.add(beverage) for beverage in PREFERENCES['disliked']}
+    predict_with_feedback.get_feedback_index = lambda: types.SimpleNamespace(
+        total=PREFERENCES['total_feedback'], preference_ids=lambda *a: (liked_ids, disliked_ids))
+    # Measure the compiled rule path itself, not prediction cache hits
+    predict_with_feedback._prediction_cache.capacity = 0
+
+    check_equivalence(mock_base, feedback_base)
+
+    rng = random.Random(42)
+    inputs = [(rng.choice(WEATHERS), rng.choice(MOODS), rng.randint(-5, 45), 60) for _ in range(1000)]
+
+    for name, before, after in [
+        ('mock_predict_beverage', mock_base.mock_predict_beverage, predict_mock.mock_predict_beverage),
+        ('predict_beverage_with_feedback', feedback_base.predict_beverage_with_feedback,
+         predict_with_feedback.predict_beverage_with_feedback),
+    ]:
+        before_cps = calls_per_second(before, inputs, args.calls)
+        after_cps = calls_per_second(after, inputs, args.calls)
+        print(f"{name:32} before {before_cps:12,.0f} calls/s | after {after_cps:12,.0f} calls/s | "
+              f"{after_cps / before_cps:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compare two run_benchmarks.py result files and flag regressions
+
+Usage: python benchmarks/compare.py BASELINE.json CURRENT.json [--threshold 0.10]
+                                    [--noise-floor-ms 0.05]
+
+Metrics under a *_ms key are lower-is-better, *_per_sec are higher-is-better.
+Exits with status 1 when any metric got worse by more than the threshold
+(relative) and, for timings, by more than the noise floor (absolute).
+"""
+
+import sys
+import json
+import argparse
+
+
+def flatten(results, prefix=''):
+    """{'a': {'b_ms': {'p50': 1}}} -> {'a.b_ms.p50': 1}, numbers only"""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}.{key}' if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def direction(name):
+    """+1 when higher is better, -1 when lower is better, 0 when unknown"""
+    parts = name.split('.')
+    if any(part.endswith('_per_sec') for part in parts):
+        return 1
+    if any(part.endswith('_ms') for part in parts):
+        return -1
+    return 0
+
+
+def compare(baseline, current, threshold, noise_floor_ms):
+    """Yield (name, base, cur, relative change, regressed) for metrics present in both"""
+    base_flat = flatten(baseline['results'])
+    cur_flat = flatten(current['results'])
+    for name in sorted(base_flat.keys() & cur_flat.keys()):
+        sign = direction(name)
+        base, cur = base_flat[name], cur_flat[name]
+        if not sign or not base:
+            continue
+        change = (cur - base) / base
+        worse = -sign * change
+        regressed = worse > threshold and (sign > 0 or cur - base > noise_floor_ms)
+        yield name, base, cur, change, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag benchmark regressions between two result files')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative change counted as a regression')
+    parser.add_argument('--noise-floor-ms', type=float, default=0.05,
+                        help='Ignore timing regressions smaller than this many milliseconds')
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = 0
+    print(f"{'metric':58} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base, cur, change, regressed in compare(baseline, current, args.threshold, args.noise_floor_ms):
+        regressions += regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{name:58} {base:12,.3f} {cur:12,.3f} {change:+8.1%}{flag}")
+
+    skipped = {name for name, value in current['results'].items() if isinstance(value, dict) and 'skipped' in value}
+    for name in sorted(skipped):
+        print(f"{name}: skipped ({current['results'][name]['skipped']})")
+
+    if regressions:
+        print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
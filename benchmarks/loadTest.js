@@ -0,0 +1,450 @@
+/**
+ * Open-loop load test of the full HTTP path, with per-stage latency
+ *
+ * Usage: node benchmarks/loadTest.js [options]
+ *   --rates 5,10,20,40        arrival rates (requests/sec) to step through
+ *   --duration 20             seconds per rate step
+ *   --mix recommend=6,location=3,feedback=1
+ *                             endpoint weights for generated requests
+ *   --trace file.jsonl        replay recorded requests instead of generating them
+ *   --speed 1                 time scale when the trace carries timestamps
+ *   --url http://host:port    test a running server (default: start one)
+ *   --stub-delay 50           simulated Open-Meteo latency in ms
+ *   --timeout 10000           client timeout per request in ms
+ *   --output results.json     also write the results as JSON
+ *
+ * Without --url the harness starts the Open-Meteo stub
+ * (benchmarks/openMeteoStub.js) and `node server.js` against it with
+ * SERVER_TIMING=1, so every response carries a Server-Timing header
+ * (weather, python_wait, python_run, predict, feedback_write, total).
+ * That server works on a temporary copy of data/feedback_log (FEEDBACK_LOG_DIR)
+ * with its own user profiles and preference checkpoint, so generated
+ * feedback never reaches the real data.
+ *
+ * Requests arrive as a Poisson process at the offered rate whether or not
+ * earlier ones have finished (open loop), and latency is measured from the
+ * scheduled send time, so a saturated server shows up as growing latency
+ * instead of a quietly lower request rate.
+ *
+ * Trace lines are { "endpoint": "recommend" | "location" | "feedback",
+ * "body": {...}, "t": msFromStart? } or bare request bodies, whose endpoint
+ * is inferred (latitude -> location, liked -> feedback, else recommend).
+ * A trace where every line has "t" is replayed on its own timeline;
+ * otherwise its lines are sent in order at each offered rate.
+ */
+const fs = require('fs');
+const http = require('http');
+const os = require('os');
+const path = require('path');
+const { spawn } = require('child_process');
+const { startOpenMeteoStub } = require('./openMeteoStub');
+
+const ENDPOINTS = {
+  recommend: '/api/beverage/recommend',
+  location: '/api/beverage/recommend-location',
+  feedback: '/api/beverage/feedback'
+};
+
+const WEATHERS = ['Sunny', 'Cloudy', 'Rainy', 'Stormy', 'Snowy', 'Windy', 'Foggy', 'Hot', 'Cold'];
+const MOODS = ['Happy', 'Sad', 'Energetic', 'Tired', 'Stressed', 'Relaxed', 'Focused', 'Excited'];
+const BEVERAGES = ['Lemonade', 'Iced Coffee', 'Hot Chocolate', 'Green Tea', 'Orange Juice', 'Masala Chai'];
+
+// A handful of cities with some spread, so weather lookups see both cache hits and misses
+const CITIES = [[26.24, 73.02], [28.61, 77.21], [19.08, 72.88], [51.51, -0.13], [40.71, -74.01]];
+
+const parseArgs = (argv) => {
+  const options = {
+    rates: '5,10,20,40',
+    duration: '20',
+    mix: 'recommend=6,location=3,feedback=1',
+    speed: '1',
+    'stub-delay': '50',
+    timeout: '10000'
+  };
+  for (let i = 0; i < argv.length; i++) {
+    if (!argv[i].startsWith('--')) {
+      throw new Error(`Unexpected argument: ${argv[i]}`);
+    }
+    options[argv[i].slice(2)] = argv[++i];
+  }
+  return options;
+};
+
+const pick = (items) => items[Math.floor(Math.random() * items.length)];
+
+const round = (value) => Math.round(value * 100) / 100;
+
+const percentile = (sorted, p) => (sorted.length
+  ? sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))]
+  : 0);
+
+/**
+ * Generated request for one endpoint
+ * @param {string} endpoint - recommend | location | feedback
+ * @returns {Object} - { endpoint, body }
+ */
+const generateRequest = (endpoint) => {
+  const weather = pick(WEATHERS);
+  const mood = pick(MOODS);
+  const temperature = Math.round(-5 + Math.random() * 45);
+  const humidity = Math.round(Math.random() * 100);
+  const user_id = `user-${Math.floor(Math.random() * 1000)}`;
+
+  if (endpoint === 'location') {
+    const [latitude, longitude] = pick(CITIES);
+    return {
+      endpoint,
+      body: {
+        latitude: round(latitude + (Math.random() - 0.5) * 0.5),
+        longitude: round(longitude + (Math.random() - 0.5) * 0.5),
+        mood,
+        user_id
+      }
+    };
+  }
+  if (endpoint === 'feedback') {
+    return {
+      endpoint,
+      body: {
+        recommended_beverage: pick(BEVERAGES),
+        weather, mood, temperature, humidity,
+        liked: Math.random() < 0.6,
+        user_id
+      }
+    };
+  }
+  return { endpoint, body: { weather, mood, temperature, humidity, user_id } };
+};
+
+/**
+ * Weighted endpoint picker from "recommend=6,location=3,feedback=1"
+ */
+const parseMix = (spec) => {
+  const weights = spec.split(',').map((part) => {
+    const [endpoint, weight] = part.trim().split('=');
+    if (!ENDPOINTS[endpoint]) {
+      throw new Error(`Unknown endpoint "${endpoint}" in --mix (expected ${Object.keys(ENDPOINTS).join(', ')})`);
+    }
+    return [endpoint, parseFloat(weight) || 0];
+  });
+  const total = weights.reduce((sum, [, weight]) => sum + weight, 0);
+  return () => {
+    let r = Math.random() * total;
+    for (const [endpoint, weight] of weights) {
+      r -= weight;
+      if (r < 0) return endpoint;
+    }
+    return weights[weights.length - 1][0];
+  };
+};
+
+/**
+ * Read a JSONL trace into [{ endpoint, body, t? }]
+ */
+const readTrace = (file) => fs.readFileSync(file, 'utf8').split('\n')
+  .filter((line) => line.trim())
+  .map((line) => {
+    const entry = JSON.parse(line);
+    const body = entry.body || entry;
+    const endpoint = entry.endpoint
+      || (body.latitude !== undefined ? 'location' : body.liked !== undefined ? 'feedback' : 'recommend');
+    if (!ENDPOINTS[endpoint]) {
+      throw new Error(`Unknown endpoint "${endpoint}" in trace`);
+    }
+    return { endpoint, body, t: entry.t };
+  });
+
+/**
+ * Parse a Server-Timing header into { stage: ms }
+ */
+const parseServerTiming = (header) => {
+  const stages = {};
+  for (const entry of (header || '').split(',')) {
+    const [name, ...params] = entry.trim().split(';');
+    const dur = params.find((param) => param.trim().startsWith('dur='));
+    if (name && dur) {
+      stages[name] = parseFloat(dur.trim().slice(4));
+    }
+  }
+  return stages;
+};
+
+/**
+ * POST one request; resolves with { status, serverTiming } (status 0 on network error)
+ */
+const send = (agent, baseUrl, { endpoint, body }, timeoutMs) => new Promise((resolve) => {
+  const payload = JSON.stringify(body);
+  const req = http.request(new URL(ENDPOINTS[endpoint], baseUrl), {
+    method: 'POST',
+    agent,
+    headers: { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) },
+    timeout: timeoutMs
+  }, (res) => {
+    res.resume();
+    res.on('end', () => resolve({ status: res.statusCode, serverTiming: res.headers['server-timing'] }));
+  });
+  req.on('timeout', () => req.destroy(new Error('timeout')));
+  req.on('error', (error) => resolve({ status: 0, error: error.message }));
+  req.end(payload);
+});
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, Math.max(0, ms)));
+
+/**
+ * Send a schedule of requests open-loop and collect one sample per request
+ * @param {Array<Object>} schedule - [{ at (ms from start), endpoint, body }] sorted by `at`
+ * @returns {Promise<Object>} - { samples, elapsedMs }
+ */
+const runSchedule = async (schedule, { agent, baseUrl, timeoutMs }) => {
+  const samples = [];
+  const inFlight = [];
+  const start = performance.now();
+
+  for (const request of schedule) {
+    await sleep(start + request.at - performance.now());
+    const scheduledAt = start + request.at;
+    inFlight.push(send(agent, baseUrl, request, timeoutMs).then((response) => {
+      samples.push({
+        endpoint: request.endpoint,
+        status: response.status,
+        latencyMs: performance.now() - scheduledAt,
+        stages: parseServerTiming(response.serverTiming)
+      });
+    }));
+  }
+  await Promise.all(inFlight);
+  return { samples, elapsedMs: performance.now() - start };
+};
+
+/**
+ * Latency percentiles, error rate and per-stage means for one step
+ */
+const summarize = (label, offeredRate, { samples, elapsedMs }) => {
+  const ok = samples.filter((sample) => sample.status >= 200 && sample.status < 400);
+  const latencies = ok.map((sample) => sample.latencyMs).sort((a, b) => a - b);
+
+  const stages = {};
+  for (const sample of ok) {
+    for (const [name, ms] of Object.entries(sample.stages)) {
+      (stages[name] = stages[name] || []).push(ms);
+    }
+  }
+  const stageSummary = {};
+  for (const [name, values] of Object.entries(stages)) {
+    values.sort((a, b) => a - b);
+    stageSummary[name] = {
+      meanMs: round(values.reduce((sum, ms) => sum + ms, 0) / values.length),
+      p99Ms: round(percentile(values, 0.99)),
+      share: round(values.length / ok.length)
+    };
+  }
+
+  const byEndpoint = {};
+  for (const sample of samples) {
+    const entry = byEndpoint[sample.endpoint] = byEndpoint[sample.endpoint] || { requests: 0, errors: 0, latencies: [] };
+    entry.requests++;
+    if (sample.status >= 200 && sample.status < 400) entry.latencies.push(sample.latencyMs);
+    else entry.errors++;
+  }
+  for (const entry of Object.values(byEndpoint)) {
+    entry.latencies.sort((a, b) => a - b);
+    entry.p50Ms = round(percentile(entry.latencies, 0.5));
+    entry.p99Ms = round(percentile(entry.latencies, 0.99));
+    delete entry.latencies;
+  }
+
+  return {
+    step: label,
+    offeredRate,
+    requests: samples.length,
+    throughput: round(ok.length / (elapsedMs / 1000)),
+    errorRate: round((samples.length - ok.length) / Math.max(1, samples.length)),
+    p50Ms: round(percentile(latencies, 0.5)),
+    p90Ms: round(percentile(latencies, 0.9)),
+    p99Ms: round(percentile(latencies, 0.99)),
+    maxMs: round(latencies.length ? latencies[latencies.length - 1] : 0),
+    stages: stageSummary,
+    endpoints: byEndpoint
+  };
+};
+
+/**
+ * Poisson arrivals at `rate` per second for `durationMs`
+ */
+const poissonSchedule = (rate, durationMs, nextRequest) => {
+  const schedule = [];
+  let at = -Math.log(1 - Math.random()) * 1000 / rate;
+  while (at < durationMs) {
+    schedule.push({ at, ...nextRequest() });
+    at += -Math.log(1 - Math.random()) * 1000 / rate;
+  }
+  return schedule;
+};
+
+/**
+ * First step where the server stops keeping up: throughput below 95% of the
+ * offered rate, errors above 1%, or p99 more than 3x the first step's
+ */
+const findSaturation = (steps) => {
+  const baseP99 = steps.length ? steps[0].p99Ms : 0;
+  return steps.find((step) => step.offeredRate
+    && (step.throughput < step.offeredRate * 0.95 || step.errorRate > 0.01 || step.p99Ms > baseP99 * 3));
+};
+
+/**
+ * Scratch data directory for the server under test, seeded with a copy of
+ * the current feedback log so predictions see realistic feedback
+ * @returns {{ dir: string, env: Object }}
+ */
+const makeScratchData = () => {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'beverage-loadtest-'));
+  const logDir = path.join(dir, 'feedback_log');
+  const realLogDir = path.join(__dirname, '..', 'data', 'feedback_log');
+  if (fs.existsSync(realLogDir)) {
+    fs.cpSync(realLogDir, logDir, { recursive: true });
+  }
+  return {
+    dir,
+    env: {
+      FEEDBACK_LOG_DIR: logDir,
+      FEEDBACK_SNAPSHOT: path.join(dir, 'feedback_snapshot.bin'),
+      USER_PROFILES_DB: path.join(dir, 'user_profiles.sqlite3'),
+      PREFERENCE_CHECKPOINT: path.join(dir, 'preference_model.json')
+    }
+  };
+};
+
+/**
+ * Start the Open-Meteo stub and the API server on free ports
+ * @returns {Promise<{baseUrl: string, stop: Function}>}
+ */
+const startServer = async (stubDelayMs) => {
+  const stub = await startOpenMeteoStub({ delayMs: stubDelayMs });
+  const port = await new Promise((resolve) => {
+    const probe = http.createServer().listen(0, '127.0.0.1', () => {
+      const { port: free } = probe.address();
+      probe.close(() => resolve(free));
+    });
+  });
+
+  const scratch = makeScratchData();
+  const server = spawn(process.execPath, [path.join(__dirname, '..', 'server.js')], {
+    cwd: path.join(__dirname, '..'),
+    env: { ...process.env, ...scratch.env, PORT: String(port), OPEN_METEO_URL: stub.url, SERVER_TIMING: '1' },
+    stdio: ['ignore', 'ignore', 'pipe']
+  });
+  let stderrTail = '';
+  server.stderr.on('data', (chunk) => {
+    stderrTail = (stderrTail + chunk.toString()).slice(-2000);
+  });
+
+  const baseUrl = `http://127.0.0.1:${port}`;
+  for (let attempt = 0; ; attempt++) {
+    if (server.exitCode !== null) {
+      throw new Error(`server.js exited with code ${server.exitCode}: ${stderrTail}`);
+    }
+    const ok = await new Promise((resolve) => {
+      http.get(`${baseUrl}/health`, (res) => {
+        res.resume();
+        resolve(res.statusCode === 200);
+      }).on('error', () => resolve(false));
+    });
+    if (ok) break;
+    if (attempt > 100) throw new Error('server.js did not come up within 10 seconds');
+    await sleep(100);
+  }
+
+  return {
+    baseUrl,
+    upstreamRequests: stub.requests,
+    stop: async () => {
+      server.kill();
+      await stub.close();
+      fs.rmSync(scratch.dir, { recursive: true, force: true });
+    }
+  };
+};
+
+const printStep = (step) => {
+  console.info(`\n${step.step}: offered ${step.offeredRate ?? '-'} req/s, achieved ${step.throughput} req/s, `
+    + `errors ${(step.errorRate * 100).toFixed(1)}%`);
+  console.table({
+    latency: { p50Ms: step.p50Ms, p90Ms: step.p90Ms, p99Ms: step.p99Ms, maxMs: step.maxMs }
+  });
+  if (Object.keys(step.stages).length) {
+    console.table(step.stages);
+  } else {
+    console.info('(no Server-Timing header: start the server with SERVER_TIMING=1)');
+  }
+  console.table(step.endpoints);
+};
+
+const main = async () => {
+  const options = parseArgs(process.argv.slice(2));
+  const durationMs = parseFloat(options.duration) * 1000;
+  const timeoutMs = parseInt(options.timeout, 10);
+  const trace = options.trace ? readTrace(options.trace) : null;
+
+  const started = options.url ? null : await startServer(parseInt(options['stub-delay'], 10));
+  const baseUrl = options.url || started.baseUrl;
+  const agent = new http.Agent({ keepAlive: true, maxSockets: Infinity });
+  const context = { agent, baseUrl, timeoutMs };
+
+  const steps = [];
+  try {
+    if (trace && trace.every((entry) => typeof entry.t === 'number')) {
+      // Timestamped trace: replay it on its own (scaled) timeline
+      const speed = parseFloat(options.speed) || 1;
+      const t0 = Math.min(...trace.map((entry) => entry.t));
+      const schedule = trace
+        .map((entry) => ({ ...entry, at: (entry.t - t0) / speed }))
+        .sort((a, b) => a.at - b.at);
+      const result = await runSchedule(schedule, context);
+      const offered = round(schedule.length / (Math.max(1, schedule[schedule.length - 1].at) / 1000));
+      steps.push(summarize('trace', offered, result));
+      printStep(steps[0]);
+    } else {
+      const nextEndpoint = parseMix(options.mix);
+      let traceIndex = 0;
+      const nextRequest = trace
+        ? () => trace[traceIndex++ % trace.length]
+        : () => generateRequest(nextEndpoint());
+
+      for (const rate of options.rates.split(',').map(parseFloat)) {
+        const result = await runSchedule(poissonSchedule(rate, durationMs, nextRequest), context);
+        const step = summarize(`${rate} req/s`, rate, result);
+        steps.push(step);
+        printStep(step);
+      }
+    }
+  } finally {
+    agent.destroy();
+    if (started) await started.stop();
+  }
+
+  // Saturation curve: one row per offered rate
+  console.info('\nSaturation curve');
+  console.table(steps.map(({ offeredRate, throughput, errorRate, p50Ms, p99Ms }) => (
+    { offeredRate, throughput, errorRate, p50Ms, p99Ms }
+  )));
+  // A single step (trace replay) has nothing to compare against
+  const knee = steps.length > 1 ? findSaturation(steps) : null;
+  if (steps.length > 1) {
+    console.info(knee
+      ? `Saturated at ${knee.offeredRate} req/s offered (${knee.throughput} req/s served, p99 ${knee.p99Ms} ms)`
+      : 'Not saturated at the highest offered rate');
+  }
+  if (started) {
+    console.info(`Open-Meteo stub requests: ${started.upstreamRequests()}`);
+  }
+
+  if (options.output) {
+    fs.writeFileSync(options.output, JSON.stringify({ options, steps, saturatedAt: knee ? knee.offeredRate : null }, null, 2));
+    console.info(`Results written to ${options.output}`);
+  }
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,74 @@
+/**
+ * Local stand-in for the Open-Meteo forecast endpoint
+ *
+ * Usage: node benchmarks/openMeteoStub.js [port] [delayMs]
+ *        OPEN_METEO_URL=http://127.0.0.1:<port>/v1/forecast npm start
+ *
+ * Answers /v1/forecast with deterministic "current" values derived from the
+ * requested coordinates after an artificial delay, and counts requests so
+ * benchmarks can check how many lookups actually reached "upstream".
+ */
+const http = require('http');
+
+/**
+ * Start the stub server
+ * @param {Object} options
+ * @param {number} options.port - 0 picks a free port
+ * @param {number} options.delayMs - Simulated upstream latency
+ * @returns {Promise<{url: string, requests: Function, close: Function}>}
+ */
+const startOpenMeteoStub = ({ port = 0, delayMs = 50 } = {}) => {
+  let requests = 0;
+
+  const server = http.createServer((req, res) => {
+    const url = new URL(req.url, 'http://localhost');
+    if (url.pathname !== '/v1/forecast') {
+      res.writeHead(404, { 'Content-Type': 'application/json' });
+      res.end(JSON.stringify({ error: true, reason: 'Not found' }));
+      return;
+    }
+
+    requests++;
+    const latitude = parseFloat(url.searchParams.get('latitude')) || 0;
+    const longitude = parseFloat(url.searchParams.get('longitude')) || 0;
+    const seed = Math.abs(Math.round(latitude * 10) * 31 + Math.round(longitude * 10));
+    const body = JSON.stringify({
+      latitude,
+      longitude,
+      current: {
+        time: new Date().toISOString().slice(0, 16),
+        temperature_2m: 5 + (seed % 35),
+        relative_humidity_2m: 20 + (seed % 70),
+        weather_code: [0, 1, 2, 3, 45, 61, 71, 95][seed % 8]
+      }
+    });
+
+    setTimeout(() => {
+      res.writeHead(200, { 'Content-Type': 'application/json' });
+      res.end(body);
+    }, delayMs);
+  });
+
+  return new Promise((resolve) => {
+    server.listen(port, '127.0.0.1', () => {
+      resolve({
+        url: `http://127.0.0.1:${server.address().port}/v1/forecast`,
+        requests: () => requests,
+        close: () => new Promise((done) => server.close(done))
+      });
+    });
+  });
+};
+
+if (require.main === module) {
+  startOpenMeteoStub({
+    port: parseInt(process.argv[2], 10) || 8089,
+    delayMs: parseInt(process.argv[3], 10) || 50
+  }).then(({ url }) => {
+    console.log(`Open-Meteo stub listening: OPEN_METEO_URL=${url}`);
+  });
+}
+
+module.exports = {
+  startOpenMeteoStub
+};
@@ -0,0 +1,81 @@
+/**
+ * Benchmark: spawn-per-call vs persistent worker pool
+ *
+ * Usage: node benchmarks/predictorPool.bench.js [requests] [concurrency]
+ *
+ * Both paths run predict_with_feedback.py with the same inputs and
+ * report requests/sec and latency percentiles.
+ */
+const { spawnPredict, poolPredict, closeWorkerPool } = require('../services/pythonService');
+
+const TOTAL_REQUESTS = parseInt(process.argv[2], 10) || 200;
+const CONCURRENCY = parseInt(process.argv[3], 10) || 8;
+
+const SAMPLE_INPUTS = [
+  { weather: 'Sunny', mood: 'Happy', temperature: 32, humidity: 60 },
+  { weather: 'Rainy', mood: 'Relaxed', temperature: 20, humidity: 80 },
+  { weather: 'Cold', mood: 'Tired', temperature: 8, humidity: 70 },
+  { weather: 'Sunny', mood: 'Sad', temperature: 24, humidity: 60 }
+];
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+
+/**
+ * Fire TOTAL_REQUESTS calls with at most CONCURRENCY in flight
+ */
+const runBenchmark = async (name, predictFn) => {
+  const latencies = [];
+  let next = 0;
+  let failures = 0;
+
+  const runner = async () => {
+    while (next < TOTAL_REQUESTS) {
+      const input = SAMPLE_INPUTS[next++ % SAMPLE_INPUTS.length];
+      const start = process.hrtime.bigint();
+      try {
+        await predictFn(input);
+      } catch (error) {
+        failures++;
+      }
+      latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+  };
+
+  const start = Date.now();
+  await Promise.all(Array.from({ length: CONCURRENCY }, runner));
+  const elapsedSec = (Date.now() - start) / 1000;
+
+  latencies.sort((a, b) => a - b);
+  return {
+    name,
+    requests: TOTAL_REQUESTS,
+    failures,
+    requestsPerSec: +(TOTAL_REQUESTS / elapsedSec).toFixed(1),
+    p50Ms: +percentile(latencies, 0.5).toFixed(2),
+    p99Ms: +percentile(latencies, 0.99).toFixed(2)
+  };
+};
+
+const main = async () => {
+  // The services log every prediction; keep the benchmark output readable
+  const log = console.log;
+  console.log = () => {};
+
+  const results = [];
+  results.push(await runBenchmark('spawn-per-call', spawnPredict));
+
+  // Warm the pool so process start-up is not counted against it
+  await Promise.all(SAMPLE_INPUTS.map(poolPredict));
+  results.push(await runBenchmark('worker-pool', poolPredict));
+  closeWorkerPool();
+
+  console.log = log;
+  console.info(`requests=${TOTAL_REQUESTS} concurrency=${CONCURRENCY}`);
+  console.table(results);
+  console.info(`speedup: ${(results[1].requestsPerSec / results[0].requestsPerSec).toFixed(1)}x`);
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
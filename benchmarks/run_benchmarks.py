@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the three predictor backends
+
+Usage: python benchmarks/run_benchmarks.py [-o results.json] [--model-dir DIR]
+                                          [--runs N] [--calls N] [--batch-rows N]
+                                          [--feedback-sizes 1000,10000,100000,1000000]
+
+Every run happens in a scratch copy of the repository layout (python/,
+the pickles, data/), so the real data/ is never touched. Inputs and
+synthetic feedback come from seeded RNGs.
+
+Measured per backend (predict.py, predict_mock.py, predict_with_feedback.py):
+  cold_start_ms     one-shot `python script.py '<json>'` wall time
+  first_call_ms     first request to a fresh --worker (imports + loading)
+  single_call_ms    warm --worker round trips
+  batch_rows_per_sec
+                    predict.py --batch, or bulk_score.py --workers 1 for the rule predictors
+and for predict_with_feedback.py, the same timings against synthetic
+feedback of each size, as a legacy feedback.json and as feedback_log segments.
+
+predict.py is skipped when no beverage_model.pkl is available.
+Compare two result files with benchmarks/compare.py.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from synthetic_feedback import MOODS, WEATHERS, write_feedback_json, write_feedback_log
+
+BACKENDS = {
+    'predict': 'predict.py',
+    'predict_mock': 'predict_mock.py',
+    'predict_with_feedback': 'predict_with_feedback.py',
+}
+BULK_PREDICTOR = {'predict_mock': 'mock', 'predict_with_feedback': 'feedback'}
+PICKLES = ('beverage_model.pkl', 'feature_encoder.pkl', 'target_encoder.pkl')
+WARMUP_CALLS = 20
+
+
+def summarize(samples):
+    """p50 / p90 / p99 / mean in milliseconds"""
+    ordered = sorted(samples)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+    return {'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99),
+            'mean': round(statistics.fmean(ordered), 3)}
+
+
+def make_inputs(count, seed):
+    rng = random.Random(seed)
+    return [{'weather': rng.choice(WEATHERS), 'mood': rng.choice(MOODS),
+             'temperature': rng.randint(-5, 45), 'humidity': rng.randint(10, 100)}
+            for _ in range(count)]
+
+
+class Sandbox:
+    """Scratch copy of the repo layout the predictor scripts expect"""
+
+    def __init__(self, model_dir):
+        self.root = tempfile.mkdtemp(prefix='beverage_bench_')
+        shutil.copytree(os.path.join(REPO_DIR, 'python'), os.path.join(self.root, 'python'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        for name in PICKLES:
+            source = os.path.join(model_dir, name)
+            if os.path.exists(source):
+                shutil.copy(source, self.root)
+        self.data_dir = os.path.join(self.root, 'data')
+        os.makedirs(self.data_dir)
+        shutil.copy(os.path.join(REPO_DIR, 'data', 'feedback.json'), self.data_dir)
+        self.env = dict(os.environ, PYTHONHASHSEED='0')
+
+    @property
+    def has_model(self):
+        return os.path.exists(os.path.join(self.root, 'beverage_model.pkl'))
+
+    def script(self, name):
+        return os.path.join(self.root, 'python', name)
+
+    def use_feedback(self, size, fmt, seed):
+        """Replace data/ feedback with `size` synthetic records in the given format"""
+        shutil.rmtree(os.path.join(self.data_dir, 'feedback_log'), ignore_errors=True)
+        legacy = os.path.join(self.data_dir, 'feedback.json')
+        if os.path.exists(legacy):
+            os.unlink(legacy)
+        if fmt == 'json':
+            write_feedback_json(legacy, size, seed)
+        else:
+            write_feedback_log(os.path.join(self.data_dir, 'feedback_log'), size, seed)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def cold_start(sandbox, script, inputs, runs):
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, sandbox.script(script), json.dumps(inputs[i % len(inputs)])],
+                                   capture_output=True, env=sandbox.env)
+        samples.append((time.perf_counter() - start) * 1000)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{script} failed: {completed.stdout.decode()} {completed.stderr.decode()}")
+    return summarize(samples)
+
+
+def worker_calls(sandbox, script, inputs, calls):
+    """(first_call_ms, warm round-trip summary) for one --worker process"""
+    process = subprocess.Popen([sys.executable, '-u', sandbox.script(script), '--worker'],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, env=sandbox.env)
+
+    def call(i):
+        start = time.perf_counter()
+        process.stdin.write(json.dumps({'id': i, 'data': inputs[i % len(inputs)]}) + '\n')
+        process.stdin.flush()
+        response = json.loads(process.stdout.readline())
+        if not response.get('success'):
+            raise RuntimeError(f"{script} failed: {response.get('error')}")
+        return (time.perf_counter() - start) * 1000
+
+    try:
+        first = round(call(0), 3)
+        for i in range(1, WARMUP_CALLS):
+            call(i)
+        samples = [call(i) for i in range(WARMUP_CALLS, WARMUP_CALLS + calls)]
+    finally:
+        process.stdin.close()
+        process.wait()
+    return first, summarize(samples)
+
+
+def batch_throughput(sandbox, backend, rows_path, rows):
+    out_path = os.path.join(sandbox.root, 'batch_out.jsonl')
+    if backend == 'predict':
+        command = [sys.executable, sandbox.script('predict.py'), '--batch', rows_path, '-o', out_path]
+    else:
+        command = [sys.executable, sandbox.script('bulk_score.py'), rows_path, '-o', out_path,
+                   '--predictor', BULK_PREDICTOR[backend], '--workers', '1', '--seed', '0']
+    start = time.perf_counter()
+    subprocess.run(command, check=True, capture_output=True, env=sandbox.env)
+    return round(rows / (time.perf_counter() - start), 1)
+
+
+def model_inputs(sandbox, count, seed):
+    """
+    Requests the model can encode: predict.py joins weather and mood as
+    "Weather_Mood", so draw from the feature encoder's own classes
+    """
+    snippet = ("import json, predict; "
+               "print(json.dumps([str(c) for c in predict._load_pickle(predict.FEATURE_ENCODER_PATH).classes_]))")
+    completed = subprocess.run([sys.executable, '-W', 'ignore', '-c', snippet], cwd=os.path.join(sandbox.root, 'python'),
+                               capture_output=True, text=True, env=sandbox.env)
+    if completed.returncode != 0:
+        return None
+    keys = [key.split('_', 1) for key in json.loads(completed.stdout) if '_' in key]
+    if not keys:
+        return None
+    rng = random.Random(seed)
+    return [dict(zip(('weather', 'mood'), rng.choice(keys)), temperature=rng.randint(-5, 45),
+                 humidity=rng.randint(10, 100)) for _ in range(count)]
+
+
+def write_rows(path, rows):
+    with open(path, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def bench_backends(sandbox, args, inputs, rows_path):
+    results = {}
+    for backend, script in BACKENDS.items():
+        backend_inputs, backend_rows = inputs, rows_path
+        if backend == 'predict':
+            if not sandbox.has_model:
+                results[backend] = {'skipped': 'beverage_model.pkl not found (use --model-dir)'}
+                continue
+            backend_inputs = model_inputs(sandbox, 1000, args.seed)
+            if backend_inputs is None:
+                results[backend] = {'skipped': 'feature encoder has no Weather_Mood classes to build requests from'}
+                continue
+            backend_rows = os.path.join(sandbox.root, 'batch_rows_model.jsonl')
+            write_rows(backend_rows, model_inputs(sandbox, args.batch_rows, args.seed + 1))
+        print(f"  {backend}", file=sys.stderr)
+        first, warm = worker_calls(sandbox, script, backend_inputs, args.calls)
+        results[backend] = {
+            'cold_start_ms': cold_start(sandbox, script, backend_inputs, args.runs),
+            'first_call_ms': first,
+            'single_call_ms': warm,
+            'batch_rows_per_sec': batch_throughput(sandbox, backend, backend_rows, args.batch_rows),
+        }
+    return results
+
+
+def bench_feedback_scaling(sandbox, args, inputs):
+    results = {}
+    for size in args.feedback_sizes:
+        for fmt in ('json', 'log'):
+            print(f"  feedback {fmt} {size:,}", file=sys.stderr)
+            sandbox.use_feedback(size, fmt, args.seed)
+            first, warm = worker_calls(sandbox, 'predict_with_feedback.py', inputs, args.calls)
+            results[f'{fmt}_{size}'] = {
+                'cold_start_ms': cold_start(sandbox, 'predict_with_feedback.py', inputs, args.runs),
+                'first_call_ms': first,
+                'single_call_ms': warm,
+            }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                       text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', '-o', default='-', help='Result JSON file (default: stdout)')
+    parser.add_argument('--model-dir', default=REPO_DIR, help='Directory holding the .pkl files')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts per measurement')
+    parser.add_argument('--calls', type=int, default=500, help='Warm worker calls per measurement')
+    parser.add_argument('--batch-rows', type=int, default=50000, help='Rows per batch throughput run')
+    parser.add_argument('--feedback-sizes', default='1000,10000,100000',
+                        type=lambda value: [int(size) for size in value.split(',') if size],
+                        help='Synthetic feedback volumes (comma-separated; up to 1000000)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    sandbox = Sandbox(args.model_dir)
+    try:
+        inputs = make_inputs(1000, args.seed)
+        rows_path = os.path.join(sandbox.root, 'batch_rows.jsonl')
+        write_rows(rows_path, make_inputs(args.batch_rows, args.seed + 1))
+
+        print("Predictor backends", file=sys.stderr)
+        results = bench_backends(sandbox, args, inputs, rows_path)
+        print("Feedback scaling", file=sys.stderr)
+        results['feedback_scaling'] = bench_feedback_scaling(sandbox, args, inputs)
+    finally:
+        sandbox.cleanup()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'config': {'runs': args.runs, 'calls': args.calls, 'batch_rows': args.batch_rows,
+                       'feedback_sizes': args.feedback_sizes, 'seed': args.seed},
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Synthetic feedback generator for benchmarks
+Produces feedback records shaped like data/feedback.json entries, in memory
+or written out as a legacy feedback.json or feedback_log segments
+
+Usage: python benchmarks/synthetic_feedback.py COUNT OUTPUT [--log] [--seed S]
+"""
+
+import os
+import json
+import random
+import argparse
+
+WEATHERS = ['Sunny', 'Cloudy', 'Rainy', 'Stormy', 'Snowy', 'Windy', 'Foggy', 'Hot', 'Cold']
+MOODS = ['Happy', 'Sad', 'Energetic', 'Tired', 'Stressed', 'Relaxed', 'Focused', 'Excited']
+BEVERAGES = [
+    'Iced Coffee', 'Cold Brew', 'Lemonade', 'Iced Tea', 'Green Tea', 'Hot Chocolate',
+    'Cappuccino', 'Herbal Tea', 'Chamomile Tea', 'Fresh Juice', 'Smoothie', 'Black Coffee',
+    'Espresso', 'Masala Chai', 'Iced Mocha', 'Strawberry Milkshake', 'Tropical Smoothie'
+]
+
+
+def generate_feedback(count, seed=42):
+    """Yield `count` feedback dicts from a seeded RNG"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            'id': str(1760000000000 + i),
+            'recommended_beverage': rng.choice(BEVERAGES),
+            'weather': rng.choice(WEATHERS),
+            'mood': rng.choice(MOODS),
+            'temperature': rng.randint(-5, 45),
+            'humidity': rng.randint(10, 100),
+            'liked': rng.random() < 0.6,
+        }
+
+
+def write_feedback_json(path, count, seed=42):
+    """Write a legacy data/feedback.json with `count` records, streamed so 1M rows fit in memory"""
+    with open(path, 'w') as f:
+        f.write('{"feedbacks": [')
+        for i, feedback in enumerate(generate_feedback(count, seed)):
+            f.write((',\n' if i else '\n') + json.dumps(feedback))
+        f.write('\n]}\n')
+
+
+def write_feedback_log(log_dir, count, seed=42, segment_bytes=1 << 20):
+    """Write `count` records as uncompacted data/feedback_log/ segments"""
+    os.makedirs(log_dir, exist_ok=True)
+    segment, size = 1, 0
+    out = open(os.path.join(log_dir, f'segment-{segment:06d}.jsonl'), 'w')
+    try:
+        for feedback in generate_feedback(count, seed):
+            if size >= segment_bytes:
+                out.close()
+                segment, size = segment + 1, 0
+                out = open(os.path.join(log_dir, f'segment-{segment:06d}.jsonl'), 'w')
+            line = json.dumps(feedback) + '\n'
+            out.write(line)
+            size += len(line)
+    finally:
+        out.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic feedback for benchmarks')
+    parser.add_argument('count', type=int)
+    parser.add_argument('output', help='feedback.json path, or a feedback_log directory with --log')
+    parser.add_argument('--log', action='store_true', help='Write feedback_log segments instead of feedback.json')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.log:
+        write_feedback_log(args.output, args.count, args.seed)
+    else:
+        write_feedback_json(args.output, args.count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
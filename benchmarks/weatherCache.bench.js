@@ -0,0 +1,91 @@
+/**
+ * Benchmark: weather lookups with and without the geo-bucketed cache
+ *
+ * Usage: node benchmarks/weatherCache.bench.js [requests] [concurrency] [delayMs]
+ *
+ * Runs against the local Open-Meteo stub, with users scattered around a few
+ * cities, and reports latency plus how many calls reached the stub.
+ */
+const { startOpenMeteoStub } = require('./openMeteoStub');
+
+const TOTAL_REQUESTS = parseInt(process.argv[2], 10) || 2000;
+const CONCURRENCY = parseInt(process.argv[3], 10) || 32;
+const DELAY_MS = parseInt(process.argv[4], 10) || 50;
+
+const CITIES = [
+  { latitude: 26.2389, longitude: 73.0243 },   // Jodhpur
+  { latitude: 28.6139, longitude: 77.2090 },   // Delhi
+  { latitude: 19.0760, longitude: 72.8777 },   // Mumbai
+  { latitude: 12.9716, longitude: 77.5946 }    // Bengaluru
+];
+
+const percentile = (sorted, p) => sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+
+// Users within a couple of kilometres of a city centre
+const makeLocation = (i) => {
+  const city = CITIES[i % CITIES.length];
+  return {
+    latitude: city.latitude + ((i * 7919) % 200 - 100) / 10000,
+    longitude: city.longitude + ((i * 104729) % 200 - 100) / 10000
+  };
+};
+
+const runBenchmark = async (name, lookup, stub) => {
+  const latencies = [];
+  const before = stub.requests();
+  let next = 0;
+
+  const runner = async () => {
+    while (next < TOTAL_REQUESTS) {
+      const { latitude, longitude } = makeLocation(next++);
+      const start = process.hrtime.bigint();
+      await lookup(latitude, longitude);
+      latencies.push(Number(process.hrtime.bigint() - start) / 1e6);
+    }
+  };
+
+  const start = Date.now();
+  await Promise.all(Array.from({ length: CONCURRENCY }, runner));
+  const elapsedSec = (Date.now() - start) / 1000;
+
+  latencies.sort((a, b) => a - b);
+  return {
+    name,
+    requests: TOTAL_REQUESTS,
+    upstreamCalls: stub.requests() - before,
+    requestsPerSec: +(TOTAL_REQUESTS / elapsedSec).toFixed(1),
+    p50Ms: +percentile(latencies, 0.5).toFixed(2),
+    p99Ms: +percentile(latencies, 0.99).toFixed(2)
+  };
+};
+
+const main = async () => {
+  const stub = await startOpenMeteoStub({ delayMs: DELAY_MS });
+  process.env.OPEN_METEO_URL = stub.url;
+  const { getWeatherByLocation, getWeatherCacheStats } = require('../services/weatherService');
+
+  // The weather service logs every upstream call; keep the benchmark output readable
+  const log = console.log;
+  console.log = () => {};
+
+  // Baseline: what every lookup cost before the cache, one upstream round trip each
+  const fetchDirect = async (latitude, longitude) => {
+    const response = await fetch(`${stub.url}?latitude=${latitude}&longitude=${longitude}`);
+    return response.json();
+  };
+
+  const results = [];
+  results.push(await runBenchmark('no-cache', fetchDirect, stub));
+  results.push(await runBenchmark('geo-cache', getWeatherByLocation, stub));
+
+  console.log = log;
+  console.info(`requests=${TOTAL_REQUESTS} concurrency=${CONCURRENCY} upstream delay=${DELAY_MS}ms`);
+  console.table(results);
+  console.info('cache stats:', getWeatherCacheStats());
+  await stub.close();
+};
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
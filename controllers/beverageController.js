@@ -1,14 +1,29 @@
-const { predictBeverage } = require('../services/pythonService');
+const { predictBeverage, recommendBeverages } = require('../services/pythonService');
 const { getWeatherByLocation } = require('../services/weatherService');
-const { addFeedback, getFeedbackStats, getFeedbackPatterns } = require('../services/feedbackService');
+const { addFeedback } = require('../services/feedbackService');
+const { getFeedbackAnalytics } = require('../services/feedbackAnalytics');
 const { getCurrentTimeOfDay, generateReason } = require('../utils/helpers');
+const { timeStage, recordTiming } = require('../middleware/serverTiming');
+
+/**
+ * Predict one beverage, plus ranked alternatives when top_k is requested
+ * @param {Object} data - Input data { weather, mood, temperature, humidity }
+ * @param {number|string|undefined} topK - Number of alternatives requested (validated by the route)
+ * @returns {Promise<Object>} - { prediction, alternatives? }
+ */
+const getPrediction = async (data, topK) => {
+  if (topK === undefined || topK === null) {
+    return { prediction: await predictBeverage(data) };
+  }
+  return recommendBeverages(data, Number(topK));
+};
 
 /**
  * Recommend beverage based on manual input
  */
 const recommendBeverage = async (req, res, next) => {
   try {
-    const { weather, mood, temperature, humidity } = req.body;
+    const { weather, mood, temperature, humidity, top_k, user_id } = req.body;
 
     console.log('📥 Received recommendation request:', { weather, mood, temperature, humidity });
 
@@ -16,12 +31,13 @@ const recommendBeverage = async (req, res, next) => {
     const timeOfDay = getCurrentTimeOfDay();
 
     // Call Python ML model
-    const prediction = await predictBeverage({
+    const { prediction, alternatives } = await getPrediction({
       weather,
       mood,
       temperature: parseFloat(temperature),
-      humidity: parseFloat(humidity)
-    });
+      humidity: parseFloat(humidity),
+      ...(user_id !== undefined && { user_id })
+    }, top_k);
 
     // Generate reason for recommendation
     const reason = generateReason(prediction, weather, mood, temperature, timeOfDay);
@@ -29,6 +45,7 @@ const recommendBeverage = async (req, res, next) => {
     const response = {
       recommended_beverage: prediction,
       reason: reason,
+      ...(alternatives && { alternatives }),
       input_data: {
         weather,
         mood,
@@ -53,7 +70,7 @@ const recommendBeverage = async (req, res, next) => {
  */
 const getRecommendationWithLocation = async (req, res, next) => {
   try {
-    const { latitude, longitude, mood } = req.body;
+    const { latitude, longitude, mood, top_k, user_id } = req.body;
 
     // Validate input
     if (!latitude || !longitude) {
@@ -73,7 +90,7 @@ const getRecommendationWithLocation = async (req, res, next) => {
     console.log('📍 Fetching weather for location:', { latitude, longitude });
 
     // Fetch weather data from API
-    const weatherData = await getWeatherByLocation(latitude, longitude);
+    const weatherData = await timeStage('weather', getWeatherByLocation(latitude, longitude));
 
     console.log('🌤️  Weather data retrieved:', weatherData);
 
@@ -81,12 +98,13 @@ const getRecommendationWithLocation = async (req, res, next) => {
     const timeOfDay = getCurrentTimeOfDay();
 
     // Call Python ML model
-    const prediction = await predictBeverage({
+    const { prediction, alternatives } = await getPrediction({
       weather: weatherData.weather,
       mood,
       temperature: weatherData.temperature,
-      humidity: weatherData.humidity
-    });
+      humidity: weatherData.humidity,
+      ...(user_id !== undefined && { user_id })
+    }, top_k);
 
     // Generate reason for recommendation
     const reason = generateReason(
@@ -100,6 +118,7 @@ const getRecommendationWithLocation = async (req, res, next) => {
     const response = {
       recommended_beverage: prediction,
       reason: reason,
+      ...(alternatives && { alternatives }),
       location_data: {
         latitude,
         longitude,
@@ -140,7 +159,8 @@ const submitFeedback = async (req, res, next) => {
       temperature, 
       humidity, 
       liked, 
-      comment 
+      comment,
+      user_id
     } = req.body;
 
     // Validate required fields
@@ -152,6 +172,7 @@ const submitFeedback = async (req, res, next) => {
     }
 
     // Save feedback
+    const start = process.hrtime.bigint();
     const feedback = addFeedback({
       recommended_beverage,
       weather,
@@ -159,8 +180,10 @@ const submitFeedback = async (req, res, next) => {
       temperature,
       humidity,
       liked: Boolean(liked),
-      comment: comment || ''
+      comment: comment || '',
+      ...(user_id !== undefined && { user_id })
     });
+    recordTiming('feedback_write', Number(process.hrtime.bigint() - start) / 1e6);
 
     console.log(`📝 Feedback received: ${liked ? '👍 Liked' : '👎 Disliked'} - ${recommended_beverage}`);
 
@@ -180,12 +203,11 @@ const submitFeedback = async (req, res, next) => {
  */
 const getFeedbackStatistics = async (req, res, next) => {
   try {
-    const stats = getFeedbackStats();
-    const patterns = getFeedbackPatterns();
+    const { statistics, improvement_patterns } = await timeStage('analytics', getFeedbackAnalytics());
 
     res.json({
-      statistics: stats,
-      improvement_patterns: patterns,
+      statistics,
+      improvement_patterns,
       message: 'Feedback data successfully retrieved'
     });
   } catch (error) {
@@ -2,12 +2,22 @@
  * Global error handler middleware
  */
 const errorHandler = (err, req, res, next) => {
-  console.error('Error:', err);
+  // Shed requests can come in bursts; one line each is enough
+  if (err.retryAfterSec) {
+    console.error('Error:', err.message);
+  } else {
+    console.error('Error:', err);
+  }
 
   // Default error status and message
   const statusCode = err.statusCode || 500;
   const message = err.message || 'Internal Server Error';
 
+  // Load shedding (services/predictionScheduler.js): tell clients when to retry
+  if (err.retryAfterSec) {
+    res.set('Retry-After', String(err.retryAfterSec));
+  }
+
   res.status(statusCode).json({
     error: message,
     ...(process.env.NODE_ENV === 'development' && { stack: err.stack })
@@ -0,0 +1,63 @@
+const { AsyncLocalStorage } = require('async_hooks');
+
+// Timings of the request currently being handled, followed through awaits
+const requestTimings = new AsyncLocalStorage();
+
+/**
+ * Add a stage duration to the current request's Server-Timing header
+ * (no-op outside a timed request; repeated stages add up)
+ * @param {string} name - Stage name, e.g. 'weather' or 'python_run'
+ * @param {number} ms - Duration in milliseconds
+ */
+const recordTiming = (name, ms) => {
+  const timings = requestTimings.getStore();
+  if (timings) {
+    timings.set(name, (timings.get(name) || 0) + ms);
+  }
+};
+
+/**
+ * Time a promise as one stage of the current request
+ * @param {string} name - Stage name
+ * @param {Promise} promise - Work to time
+ * @returns {Promise} - The promise's result
+ */
+const timeStage = async (name, promise) => {
+  const start = process.hrtime.bigint();
+  try {
+    return await promise;
+  } finally {
+    recordTiming(name, Number(process.hrtime.bigint() - start) / 1e6);
+  }
+};
+
+/**
+ * Report per-stage latency in a Server-Timing response header
+ * (weather, python_wait, python_run, feedback_write, ..., total).
+ * Enabled with SERVER_TIMING=1, e.g. for benchmarks/loadTest.js.
+ */
+const serverTiming = (req, res, next) => {
+  if (process.env.SERVER_TIMING !== '1') {
+    return next();
+  }
+
+  const start = process.hrtime.bigint();
+  const timings = new Map();
+  const writeHead = res.writeHead;
+  res.writeHead = function (...args) {
+    const entries = [...timings].map(([name, ms]) => `${name};dur=${ms.toFixed(2)}`);
+    entries.push(`total;dur=${(Number(process.hrtime.bigint() - start) / 1e6).toFixed(2)}`);
+    if (!res.headersSent) {
+      res.setHeader('Server-Timing', entries.join(', '));
+    }
+    return writeHead.apply(this, args);
+  };
+
+  requestTimings.run(timings, next);
+};
+
+module.exports = {
+  serverTiming,
+  recordTiming,
+  timeStage
+};
@@ -1,3 +1,34 @@
+/**
+ * Check an optional top_k (number of ranked alternatives)
+ * @param {*} value - top_k from the request body
+ * @returns {string|null} - Validation error, or null when absent or valid
+ */
+const topKError = (value) => {
+  if (value === undefined || value === null) {
+    return null;
+  }
+  const topK = Number(value);
+  if (!Number.isInteger(topK) || topK < 1 || topK > 20) {
+    return 'top_k must be an integer between 1 and 20';
+  }
+  return null;
+};
+
+/**
+ * Validate the optional top_k on routes that take no other validated input
+ */
+const validateTopK = (req, res, next) => {
+  const error = topKError(req.body.top_k);
+  if (error) {
+    return res.status(400).json({
+      error: 'Validation failed',
+      details: [error]
+    });
+  }
+
+  next();
+};
+
 /**
  * Validate recommendation input
  */
@@ -36,6 +67,11 @@ const validateRecommendationInput = (req, res, next) => {
     errors.push('Temperature must be between -50 and 60 degrees Celsius');
   }
 
+  const topKProblem = topKError(req.body.top_k);
+  if (topKProblem) {
+    errors.push(topKProblem);
+  }
+
   if (errors.length > 0) {
     return res.status(400).json({
       error: 'Validation failed',
@@ -47,5 +83,6 @@ const validateRecommendationInput = (req, res, next) => {
 };
 
 module.exports = {
-  validateRecommendationInput
+  validateRecommendationInput,
+  validateTopK
 };
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Parallel bulk scoring of JSONL request logs
+Splits the input file into byte-range shards, scores them in a process pool
+(each worker loads the model or rule tables once) and merges the results
+back in input order through per-shard part files, so memory stays bounded
+however large the input is
+
+Usage:
+  python bulk_score.py requests.jsonl -o scored.jsonl [--predictor model|feedback|mock]
+                       [--workers N] [--shard-mb MB] [--seed S]
+
+Output line N is the result for the N-th non-blank input line.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from predictor_cli import parse_line, parse_request
+
+PREDICTORS = ('model', 'feedback', 'mock')
+MIN_SHARD_BYTES = 1 << 20
+MAX_SHARD_BYTES = 64 << 20
+
+# Per-process scorer, set up once by the pool initializer
+_score_rows = None
+
+
+def rule_scorer(predict_fn, personalized=False):
+    """
+    Score rows one by one with a rule predictor function returning a beverage
+    (personalized: also passed the row's user_id)
+    """
+    def score_rows(rows):
+        for row in rows:
+            try:
+                if 'error' in row:
+                    raise Exception(row['error'])
+                weather, mood, temperature, humidity = parse_request(row)
+                args = (weather, mood, float(temperature), float(humidity))
+                if personalized:
+                    args += (row.get('user_id'),)
+                result = {
+                    "prediction": predict_fn(*args),
+                    "success": True
+                }
+            except Exception as e:
+                result = {"error": str(e), "success": False}
+            if 'id' in row:
+                result["id"] = row['id']
+            yield result
+    return score_rows
+
+
+def make_scorer(predictor):
+    """Load one predictor and return a function mapping request dicts to result dicts"""
+    if predictor == 'model':
+        import predict
+        model, feature_encoder, target_encoder = predict.get_model_and_encoders()
+
+        def score_rows(rows):
+            # Vectorized predict_beverage: one encode/predict/decode per chunk
+            for result in predict.predict_batch(rows, model, feature_encoder, target_encoder):
+                result.pop('row', None)
+                yield result
+        return score_rows
+
+    if predictor == 'feedback':
+        import predict_with_feedback
+        predict_with_feedback.freeze_feedback()
+        return rule_scorer(lambda *args: predict_with_feedback.predict_beverage_with_feedback(*args)[0],
+                           personalized=True)
+
+    import predict_mock
+    return rule_scorer(predict_mock.mock_predict_beverage)
+
+
+def init_worker(predictor):
+    global _score_rows
+    _score_rows = make_scorer(predictor)
+
+
+def plan_shards(path, shard_bytes):
+    """Split [0, file size) into byte ranges of about shard_bytes"""
+    size = os.path.getsize(path)
+    return [(start, min(start + shard_bytes, size)) for start in range(0, size, shard_bytes)]
+
+
+def iter_shard_rows(path, start, end):
+    """
+    Request dicts for the lines that start inside [start, end)
+    A line crossing the boundary belongs to the shard it starts in.
+    """
+    with open(path, 'rb') as f:
+        if start:
+            # Skip the rest of the line owned by the previous shard
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            row = parse_line(line.decode('utf-8', errors='replace'))
+            if row is not None:
+                yield row
+
+
+def score_shard(index, path, start, end, part_path, seed):
+    """Score one shard into its part file; returns (index, rows, failed)"""
+    if seed is not None:
+        random.seed(seed + index)
+    rows = failed = 0
+    with open(part_path, 'w') as out:
+        for result in _score_rows(iter_shard_rows(path, start, end)):
+            rows += 1
+            failed += not result['success']
+            out.write(json.dumps(result) + '\n')
+    return index, rows, failed
+
+
+def bulk_score(path, out, predictor='model', workers=None, shard_bytes=None, seed=None):
+    """
+    Score every line of a JSONL file into `out` (a binary file object), in input order.
+    Returns (rows, failed).
+    """
+    workers = workers or os.cpu_count() or 1
+    if shard_bytes is None:
+        # A few shards per worker keeps the pool busy when shard costs differ
+        shard_bytes = os.path.getsize(path) // (workers * 4) or 1
+        shard_bytes = max(MIN_SHARD_BYTES, min(MAX_SHARD_BYTES, shard_bytes))
+    shards = plan_shards(path, shard_bytes)
+
+    part_dir = tempfile.mkdtemp(prefix='bulk_score_')
+    rows = failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(predictor,)) as pool:
+            in_flight = set()
+            done = set()
+            next_submit = next_merge = 0
+
+            def part_path(i):
+                return os.path.join(part_dir, f'part-{i:06d}.jsonl')
+
+            while next_merge < len(shards):
+                # Bounded submission: at most two shards per worker queued or running
+                while next_submit < len(shards) and len(in_flight) < workers * 2:
+                    start, end = shards[next_submit]
+                    in_flight.add(pool.submit(score_shard, next_submit, path, start, end,
+                                              part_path(next_submit), seed))
+                    next_submit += 1
+
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, shard_rows, shard_failed = future.result()
+                    rows += shard_rows
+                    failed += shard_failed
+                    done.add(index)
+
+                # Append finished parts in input order
+                while next_merge in done:
+                    with open(part_path(next_merge), 'rb') as part:
+                        shutil.copyfileobj(part, out)
+                    os.unlink(part_path(next_merge))
+                    done.discard(next_merge)
+                    next_merge += 1
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    return rows, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a JSONL request log on all cores')
+    parser.add_argument('input', help='JSONL file with weather, mood, temperature, humidity')
+    parser.add_argument('--output', '-o', default='-', help='JSONL output file (default: stdout)')
+    parser.add_argument('--predictor', choices=PREDICTORS, default='model',
+                        help='model = predict.py, feedback = predict_with_feedback.py, mock = predict_mock.py')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--shard-mb', type=float, default=None, help='Shard size in MB (default: automatic)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed the rule predictors for repeatable runs')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    shard_bytes = int(args.shard_mb * (1 << 20)) if args.shard_mb else None
+
+    out = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    start = time.perf_counter()
+    try:
+        rows, failed = bulk_score(args.input, out, args.predictor, workers, shard_bytes, args.seed)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    elapsed = time.perf_counter() - start
+
+    rate = rows / elapsed if elapsed else 0
+    print(f"Scored {rows} rows ({failed} failed) in {elapsed:.2f}s with {workers} workers: "
+          f"{rate:,.0f} rows/s, {rate / workers:,.0f} rows/s/core", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 """
 Diagnostic script to check pickle files
+
+Usage:
+  python diagnose.py            check that the pickle files load
+  python diagnose.py convert    build the compact model artifacts, verify them
+                                against the pickles and report cold-start timing
 """
 
 import pickle
 import sys
+import json
+import subprocess
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,38 +22,122 @@ files = {
     'Target Encoder': BASE_DIR / 'target_encoder.pkl'
 }
 
-print("🔍 Checking pickle files...\n")
-
-for name, filepath in files.items():
-    print(f"📄 {name}: {filepath}")
-    
-    if not filepath.exists():
-        print(f"   ❌ File not found!\n")
-        continue
-    
-    print(f"   ✅ File exists ({filepath.stat().st_size} bytes)")
-    
-    # Try different loading methods
-    methods = [
-        ('default', {}),
-        ('latin1', {'encoding': 'latin1'}),
-        ('bytes', {'encoding': 'bytes'}),
-    ]
-    
-    for method_name, kwargs in methods:
-        try:
-            with open(filepath, 'rb') as f:
-                obj = pickle.load(f, **kwargs)
-            print(f"   ✅ Loaded successfully with {method_name} encoding")
-            print(f"      Type: {type(obj).__name__}")
-            if hasattr(obj, '__dict__'):
-                print(f"      Attributes: {list(obj.__dict__.keys())[:5]}")
-            break
-        except Exception as e:
-            print(f"   ❌ Failed with {method_name}: {str(e)[:50]}")
-    
-    print()
-
-print("\n💡 Recommendation:")
-print("If all files failed to load, please re-export them from Google Colab.")
-print("Make sure to use: pickle.dump(obj, f, protocol=4) for Python 3.10 compatibility")
+
+def check_pickles():
+    """Try to load each pickle file with several encodings"""
+    print("🔍 Checking pickle files...\n")
+
+    for name, filepath in files.items():
+        print(f"📄 {name}: {filepath}")
+
+        if not filepath.exists():
+            print(f"   ❌ File not found!\n")
+            continue
+
+        print(f"   ✅ File exists ({filepath.stat().st_size} bytes)")
+
+        # Try different loading methods
+        methods = [
+            ('default', {}),
+            ('latin1', {'encoding': 'latin1'}),
+            ('bytes', {'encoding': 'bytes'}),
+        ]
+
+        for method_name, kwargs in methods:
+            try:
+                with open(filepath, 'rb') as f:
+                    obj = pickle.load(f, **kwargs)
+                print(f"   ✅ Loaded successfully with {method_name} encoding")
+                print(f"      Type: {type(obj).__name__}")
+                if hasattr(obj, '__dict__'):
+                    print(f"      Attributes: {list(obj.__dict__.keys())[:5]}")
+                break
+            except Exception as e:
+                print(f"   ❌ Failed with {method_name}: {str(e)[:50]}")
+
+        print()
+
+    print("\n💡 Recommendation:")
+    print("If all files failed to load, please re-export them from Google Colab.")
+    print("Make sure to use: pickle.dump(obj, f, protocol=4) for Python 3.10 compatibility")
+
+
+# Run in a fresh interpreter so imports are not already cached
+COLD_START_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {python_dir!r})
+import predict
+predict.ARTIFACT_DIR = predict.Path({artifact_dir!r})
+model, feature_encoder, target_encoder = predict.load_model_and_encoders()
+predict.load_timings['total_ms'] = round((time.perf_counter() - start) * 1000, 2)
+print(json.dumps(predict.load_timings))
+"""
+
+
+def measure_cold_start(artifact_dir):
+    """Time import + model load in a new Python process"""
+    code = COLD_START_SNIPPET.format(python_dir=str(Path(__file__).resolve().parent),
+                                     artifact_dir=str(artifact_dir))
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def convert_artifacts():
+    """Convert the pickles to compact artifacts and check both give identical results"""
+    import numpy as np
+    import predict
+    import model_artifacts
+
+    print("🔧 Converting pickle files to compact artifacts...\n")
+    try:
+        model, feature_encoder, target_encoder = predict.load_pickled_model_and_encoders()
+    except Exception as e:
+        print(f"   ❌ Could not load pickle files: {e}")
+        return 1
+
+    try:
+        manifest = model_artifacts.convert(model, feature_encoder, target_encoder,
+                                           predict.model_sources(), predict.ARTIFACT_DIR)
+    except ValueError as e:
+        print(f"   ❌ {e}")
+        return 1
+    print(f"   ✅ Wrote {manifest['kind']} model artifacts to {predict.ARTIFACT_DIR}")
+
+    compact_model, compact_features, compact_targets = model_artifacts.load(predict.ARTIFACT_DIR)
+
+    # Encoders must round-trip exactly
+    ok = (list(compact_features.classes_) == [str(c) for c in feature_encoder.classes_] and
+          list(compact_targets.classes_) == [str(c) for c in target_encoder.classes_])
+    print(f"   {'✅' if ok else '❌'} Encoder classes match")
+
+    # Predictions over every known class x a temperature/humidity grid
+    encoded = np.arange(len(feature_encoder.classes_))
+    temperatures = np.arange(-10, 51, 3)
+    humidities = np.arange(0, 101, 10)
+    grid = np.array(np.meshgrid(encoded, temperatures, humidities, indexing='ij')).reshape(3, -1).T
+    expected = model.predict(grid)
+    actual = compact_model.predict(grid)
+    matches = int((np.asarray(expected) == np.asarray(actual)).sum())
+    print(f"   {'✅' if matches == len(grid) else '❌'} Predictions match on {matches}/{len(grid)} grid points")
+    ok = ok and matches == len(grid)
+
+    if hasattr(model, 'predict_proba'):
+        close = np.allclose(model.predict_proba(grid), compact_model.predict_proba(grid))
+        print(f"   {'✅' if close else '❌'} Probabilities match")
+        ok = ok and close
+
+    print("\n⏱️  Cold start (fresh interpreter):")
+    pickled = measure_cold_start(predict.BASE_DIR / 'no_such_artifacts')
+    compact = measure_cold_start(predict.ARTIFACT_DIR)
+    for label, timing in (('pickle', pickled), ('artifacts', compact)):
+        print(f"   {label:9} total {timing['total_ms']:8.1f} ms "
+              f"(numpy import {timing['import_numpy_ms']:.1f} ms, load {timing['load_ms']:.1f} ms)")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'convert':
+        sys.exit(convert_artifacts())
+    check_pickles()
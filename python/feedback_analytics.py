@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Feedback analytics for GET /api/beverage/feedback/stats
+Computes the same statistics and improvement patterns as feedbackService.js
+(satisfaction rate, top/worst beverages, disliked beverages per
+weather_mood_temperature-decade) with vectorized group-bys over columns of
+the feedback log, instead of re-reading and re-scanning it per request.
+
+The columns are appended to as the log grows (and rebuilt when it is
+compacted), and each report is cached until the log changes, so a stats
+request costs a stat() of the log when nothing changed and one pass of
+numpy over the rows when it did.
+
+Usage: python python/feedback_analytics.py '{"report": "stats"}'   (or --worker)
+"""
+
+import math
+from array import array
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+
+from feedback_log import FeedbackLogReader
+from instrumentation import stage
+from predictor_cli import main as run_predictor
+from vocab import Vocabulary
+
+# Same limits as feedbackService.js
+TOP_BEVERAGES = 5
+MIN_FEEDBACK_FOR_WORST = 3
+RECENT_FEEDBACKS = 10
+
+REPORTS = ('stats', 'patterns')
+
+
+def temperature_bucket(temperature):
+    """Whole-degree bucket like feedbackLog.js temperatureBucket (NaN when unusable)"""
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not math.isfinite(temperature):
+        return math.nan
+    return math.floor(temperature)
+
+
+def to_fixed(value, digits):
+    """Number.prototype.toFixed: round the exact binary value, halves away from zero"""
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+class FeedbackAnalytics:
+    """
+    Columnar copy of the feedback log: one row per compacted count row or
+    raw record, in log order, so group order and tie-breaking come out
+    exactly as in the JavaScript implementation
+    """
+
+    def __init__(self, reader=None):
+        self.reader = reader or FeedbackLogReader()
+        # Bumped whenever the rows change; cached reports are tied to it
+        self.generation = 0
+        self._cache = {}
+        self._reset()
+
+    def _reset(self):
+        self.total = 0
+        self.recent = deque(maxlen=RECENT_FEEDBACKS)
+        # Ids are assigned in first-seen order, which is the JS object key order
+        self.weathers = Vocabulary()
+        self.moods = Vocabulary()
+        self.beverages = Vocabulary()
+        self.weather_ids = array('i')
+        self.mood_ids = array('i')
+        self.buckets = array('d')
+        self.beverage_ids = array('i')
+        self.likes = array('q')
+        self.dislikes = array('q')
+
+    def _append(self, weather, mood, bucket, beverage, likes, dislikes):
+        ids = (self.weathers.add(weather), self.moods.add(mood), self.beverages.add(beverage))
+        self.weather_ids.append(ids[0])
+        self.mood_ids.append(ids[1])
+        self.buckets.append(bucket)
+        self.beverage_ids.append(ids[2])
+        self.likes.append(likes)
+        self.dislikes.append(dislikes)
+
+    def refresh(self):
+        """Apply what the log gained since the last call"""
+        with stage('load_feedback'):
+            snapshot, records = self.reader.read_updates()
+        if snapshot is None and not records:
+            return
+
+        if snapshot is not None:
+            # First load, or the log was compacted: rebuild from the snapshot
+            self._reset()
+            self.total = snapshot.get('total', 0)
+            self.recent.extend(snapshot.get('recent', []))
+            for weather, mood, bucket, beverage, likes, dislikes in snapshot.get('counts', []):
+                self._append(weather, mood, math.nan if bucket is None else bucket, beverage, likes, dislikes)
+
+        for record in records:
+            self.total += 1
+            self.recent.append(record)
+            if not isinstance(record, dict):
+                continue
+            liked = 1 if record.get('liked') else 0
+            try:
+                self._append(record.get('weather'), record.get('mood'), temperature_bucket(record.get('temperature')),
+                             record.get('recommended_beverage'), liked, 1 - liked)
+            except TypeError:
+                # Unhashable names cannot be grouped
+                continue
+
+        self.generation += 1
+        self._cache.clear()
+
+    def report(self, name):
+        """'stats' or 'patterns' for the current log, computed once per generation"""
+        self.refresh()
+        if name not in self._cache:
+            with stage(f'analytics_{name}'):
+                self._cache[name] = self.statistics() if name == 'stats' else self.patterns()
+        return self._cache[name]
+
+    def statistics(self):
+        """feedbackService.getFeedbackStats"""
+        import numpy as np
+
+        if self.total == 0:
+            return {
+                'total': 0,
+                'satisfied': 0,
+                'dissatisfied': 0,
+                'satisfactionRate': 0,
+                'topBeverages': [],
+                'worstBeverages': []
+            }
+
+        beverage_ids = np.frombuffer(self.beverage_ids, dtype=np.int32)
+        likes = np.frombuffer(self.likes, dtype=np.int64)
+        dislikes = np.frombuffer(self.dislikes, dtype=np.int64)
+        satisfied = int(likes.sum())
+        dissatisfied = int(dislikes.sum())
+
+        # Per-beverage counts, indexed by beverage id (= first-seen order)
+        n = len(self.beverages)
+        beverage_likes = np.bincount(beverage_ids, weights=likes, minlength=n).astype(np.int64)
+        beverage_dislikes = np.bincount(beverage_ids, weights=dislikes, minlength=n).astype(np.int64)
+        beverage_totals = beverage_likes + beverage_dislikes
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = beverage_likes / beverage_totals * 100
+
+        def rating(i):
+            return {
+                'name': self.beverages.names[i],
+                'likes': int(beverage_likes[i]),
+                'dislikes': int(beverage_dislikes[i]),
+                'total': int(beverage_totals[i]),
+                'satisfactionRate': float(rates[i])
+            }
+
+        # Stable sorts keep first-seen order among equal rates, as Array.prototype.sort does
+        best = np.argsort(-rates, kind='stable')[:TOP_BEVERAGES]
+        worst = np.argsort(rates, kind='stable')
+        worst = worst[beverage_totals[worst] >= MIN_FEEDBACK_FOR_WORST][:TOP_BEVERAGES]
+
+        return {
+            'total': self.total,
+            'satisfied': satisfied,
+            'dissatisfied': dissatisfied,
+            'satisfactionRate': to_fixed(satisfied / self.total * 100, 2),
+            'topBeverages': [rating(i) for i in best],
+            'worstBeverages': [rating(i) for i in worst],
+            'recentFeedbacks': list(reversed(self.recent))
+        }
+
+    def patterns(self):
+        """feedbackService.getFeedbackPatterns: disliked beverages per weather/mood/temperature decade"""
+        import numpy as np
+
+        dislikes = np.frombuffer(self.dislikes, dtype=np.int64)
+        rows = np.flatnonzero(dislikes > 0)
+        if len(rows) == 0:
+            return []
+        dislikes = dislikes[rows]
+        weather_ids = np.frombuffer(self.weather_ids, dtype=np.int32)[rows]
+        mood_ids = np.frombuffer(self.mood_ids, dtype=np.int32)[rows]
+        beverage_ids = np.frombuffer(self.beverage_ids, dtype=np.int32)[rows]
+        decades = np.floor(np.frombuffer(self.buckets, dtype=np.float64)[rows] / 10) * 10
+
+        # One int64 key per (weather, mood, decade); NaN (no temperature) sorts last in np.unique
+        decade_values, decade_codes = np.unique(decades, return_inverse=True)
+        keys = (weather_ids.astype(np.int64) * len(self.moods) + mood_ids) * len(decade_values) + decade_codes
+        _, first_rows, groups = np.unique(keys, return_index=True, return_inverse=True)
+        counts = np.bincount(groups, weights=dislikes).astype(np.int64)
+
+        # Disliked beverages of each group in row order, each repeated once per dislike
+        by_group = np.argsort(groups, kind='stable')
+        repeated = np.repeat(beverage_ids[by_group], dislikes[by_group])
+        ends = np.cumsum(counts)
+        beverage_names = np.asarray(self.beverages.names, dtype=object)
+
+        # Groups in first-seen order, then by count (stable), like the JS sort over object values
+        order = np.argsort(first_rows, kind='stable')
+        order = order[np.argsort(-counts[order], kind='stable')]
+
+        patterns = []
+        for group in order:
+            row = first_rows[group]
+            decade = decades[row]
+            start = ends[group] - counts[group]
+            patterns.append({
+                'weather': self.weathers.names[weather_ids[row]],
+                'mood': self.moods.names[mood_ids[row]],
+                'tempRange': 'null-10°C' if math.isnan(decade) else f'{int(decade)}-{int(decade) + 10}°C',
+                'dislikedBeverages': beverage_names[repeated[start:ends[group]]].tolist(),
+                'count': int(counts[group])
+            })
+        return patterns
+
+
+_analytics = FeedbackAnalytics()
+
+
+def handle_request(input_data):
+    """Build the requested reports ("report": "stats" or "patterns", both by default)"""
+    report = input_data.get('report')
+    if report is not None and report not in REPORTS:
+        raise Exception(f"Unknown report: {report}")
+
+    result = {"success": True}
+    if report in (None, 'stats'):
+        result["statistics"] = _analytics.report('stats')
+    if report in (None, 'patterns'):
+        result["improvement_patterns"] = _analytics.report('patterns')
+    result["generation"] = _analytics.generation
+    return result
+
+
+def get_stats():
+    """Counters reported to the worker pool's "stats" message"""
+    return {
+        "feedback_analytics": {
+            "generation": _analytics.generation,
+            "rows": len(_analytics.likes),
+            "total_feedback": _analytics.total
+        }
+    }
+
+
+def main():
+    """Main function to handle analytics requests"""
+    run_predictor(handle_request, get_stats)
+
+
+if __name__ == "__main__":
+    main()
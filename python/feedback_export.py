@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Columnar export of the feedback log for offline retraining
+Streams the feedback log into numpy .npz part files, partitioned by the
+date of each record, with the categorical columns dictionary-encoded. Each
+run appends parts for the records added since the previous run, so the
+export can be kept current with a cron job; existing parts are never
+rewritten. Loading concatenates the parts straight into training arrays.
+
+Usage: python python/feedback_export.py export [--output DIR]
+       python python/feedback_export.py info [DIR]
+
+Layout of data/feedback_export/:
+  manifest.json                  parts in export order and the log position covered
+  date=YYYY-MM-DD/part-NNNNNN.npz one part per date per run
+
+Columns of a part (one row per record):
+  timestamp     int64    epoch milliseconds (-1 when unknown)
+  weather       int32    index into weather_dict (-1 when missing); likewise
+  mood, beverage, user   with mood_dict, beverage_dict, user_dict
+  temperature   float32  NaN when missing
+  humidity      float32  NaN when missing
+  liked         uint8
+  weight        uint32   1 per record; compacted history exported on a first
+                         run (date=compacted) keeps its counts here instead
+
+The manifest is written last and atomically, so readers only ever see parts
+that were completely written.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+from datetime import datetime, timezone
+
+from feedback_log import DATA_DIR, FeedbackLogReader
+from vocab import Vocabulary
+
+EXPORT_DIR = os.path.join(DATA_DIR, 'feedback_export')
+MANIFEST_NAME = 'manifest.json'
+EXPORT_VERSION = 1
+
+CATEGORICAL = ('weather', 'mood', 'beverage', 'user')
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return math.nan
+    return value
+
+
+def _name(value):
+    return value if isinstance(value, str) and value else None
+
+
+def record_time(record):
+    """Epoch milliseconds of a record from its timestamp (or its Date.now() id), -1 when unknown"""
+    timestamp = record.get('timestamp')
+    if isinstance(timestamp, str):
+        try:
+            return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp() * 1000)
+        except ValueError:
+            pass
+    try:
+        return int(record.get('id'))
+    except (TypeError, ValueError):
+        return -1
+
+
+def partition_for(millis):
+    if millis < 0:
+        return 'date=unknown'
+    return 'date=' + datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class PartBuilder:
+    """Rows of one part file, with its own dictionaries"""
+
+    def __init__(self):
+        self.dictionaries = {column: Vocabulary() for column in CATEGORICAL}
+        self.columns = {column: [] for column in
+                        ('timestamp', *CATEGORICAL, 'temperature', 'humidity', 'liked', 'weight')}
+
+    def _code(self, column, value):
+        name = _name(value)
+        return -1 if name is None else self.dictionaries[column].add(name)
+
+    def add(self, timestamp, weather, mood, beverage, user, temperature, humidity, liked, weight=1):
+        columns = self.columns
+        columns['timestamp'].append(timestamp)
+        columns['weather'].append(self._code('weather', weather))
+        columns['mood'].append(self._code('mood', mood))
+        columns['beverage'].append(self._code('beverage', beverage))
+        columns['user'].append(self._code('user', None if user is None else str(user)))
+        columns['temperature'].append(_number(temperature))
+        columns['humidity'].append(_number(humidity))
+        columns['liked'].append(1 if liked else 0)
+        columns['weight'].append(weight)
+
+    def __len__(self):
+        return len(self.columns['timestamp'])
+
+    def write(self, path):
+        import numpy as np
+
+        dtypes = {'timestamp': np.int64, 'temperature': np.float32, 'humidity': np.float32,
+                  'liked': np.uint8, 'weight': np.uint32}
+        arrays = {column: np.asarray(values, dtype=dtypes.get(column, np.int32))
+                  for column, values in self.columns.items()}
+        for column, vocabulary in self.dictionaries.items():
+            arrays[f'{column}_dict'] = np.asarray(vocabulary.names, dtype=str)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
+
+
+def read_manifest(export_dir):
+    try:
+        with open(os.path.join(export_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == EXPORT_VERSION else None
+
+
+def write_manifest(export_dir, manifest):
+    tmp_path = os.path.join(export_dir, f'{MANIFEST_NAME}.tmp-{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(export_dir, MANIFEST_NAME))
+
+
+def export(export_dir=EXPORT_DIR, reader=None):
+    """
+    Append the feedback added since the last export; returns the new manifest entries
+    """
+    manifest = read_manifest(export_dir) or {'version': EXPORT_VERSION, 'position': None, 'next_part': 0,
+                                             'rows': 0, 'parts': []}
+    reader = reader or FeedbackLogReader()
+    if manifest['position'] is not None:
+        reader.seek(manifest['position'])
+    snapshot, records = reader.read_updates()
+
+    parts = {}
+    if snapshot is not None and manifest['position'] is not None:
+        print("Warning: Feedback log was compacted past the last export; "
+              "feedback compacted in between is not exported", file=sys.stderr)
+    elif snapshot is not None and snapshot.get('counts'):
+        # First export of a compacted log: the history survives only as counts
+        part = parts.setdefault('date=compacted', PartBuilder())
+        for weather, mood, bucket, beverage, likes, dislikes in snapshot['counts']:
+            if likes:
+                part.add(-1, weather, mood, beverage, None, bucket, None, True, likes)
+            if dislikes:
+                part.add(-1, weather, mood, beverage, None, bucket, None, False, dislikes)
+
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        millis = record_time(record)
+        parts.setdefault(partition_for(millis), PartBuilder()).add(
+            millis, record.get('weather'), record.get('mood'), record.get('recommended_beverage'),
+            record.get('user_id'), record.get('temperature'), record.get('humidity'), record.get('liked')
+        )
+
+    added = []
+    for partition in sorted(parts):
+        part = parts[partition]
+        name = f"{partition}/part-{manifest['next_part']:06d}.npz"
+        part.write(os.path.join(export_dir, name))
+        manifest['next_part'] += 1
+        added.append({'path': name, 'partition': partition, 'rows': len(part),
+                      'weight': int(sum(part.columns['weight']))})
+
+    manifest['parts'].extend(added)
+    manifest['rows'] += sum(entry['rows'] for entry in added)
+    manifest['position'] = reader.position()
+    manifest['exported_at'] = time.time()
+    os.makedirs(export_dir, exist_ok=True)
+    write_manifest(export_dir, manifest)
+    return added
+
+
+def load(export_dir=EXPORT_DIR, since=None, until=None):
+    """
+    All exported rows as one set of column arrays, optionally limited to the
+    date partitions in [since, until] ('YYYY-MM-DD'; compacted and unknown-date
+    parts are only included without limits)
+
+    Returns (columns, dictionaries): categorical columns hold codes into the
+    merged dictionaries (lists of names), -1 where the value was missing.
+    """
+    import numpy as np
+
+    manifest = read_manifest(export_dir)
+    if manifest is None:
+        raise Exception(f"No feedback export in {export_dir}; run feedback_export.py export")
+
+    merged = {column: Vocabulary() for column in CATEGORICAL}
+    pieces = {}
+    for entry in manifest['parts']:
+        date = entry['partition'].partition('=')[2]
+        if (since or until) and not date[:1].isdigit():
+            continue
+        if (since and date < since) or (until and date > until):
+            continue
+        with np.load(os.path.join(export_dir, entry['path']), allow_pickle=False) as part:
+            for column in ('timestamp', 'temperature', 'humidity', 'liked', 'weight'):
+                pieces.setdefault(column, []).append(part[column])
+            for column in CATEGORICAL:
+                # Part codes -> merged codes; the extra last slot maps -1 to -1
+                remap = np.array([merged[column].add(str(name)) for name in part[f'{column}_dict']] + [-1],
+                                 dtype=np.int32)
+                pieces.setdefault(column, []).append(remap[part[column]])
+
+    empty = {'timestamp': np.int64, 'temperature': np.float32, 'humidity': np.float32,
+             'liked': np.uint8, 'weight': np.uint32}
+    columns = {}
+    for column in (*empty, *CATEGORICAL):
+        arrays = pieces.get(column)
+        columns[column] = np.concatenate(arrays) if arrays else np.empty(0, dtype=empty.get(column, np.int32))
+    return columns, {column: list(vocabulary.names) for column, vocabulary in merged.items()}
+
+
+def info(export_dir):
+    manifest = read_manifest(export_dir)
+    if manifest is None:
+        raise Exception(f"No feedback export in {export_dir}")
+    partitions = {}
+    for entry in manifest['parts']:
+        stats = partitions.setdefault(entry['partition'], {'parts': 0, 'rows': 0})
+        stats['parts'] += 1
+        stats['rows'] += entry['rows']
+    return {'rows': manifest['rows'], 'parts': len(manifest['parts']), 'partitions': partitions,
+            'exported_at': manifest.get('exported_at')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the feedback log to columnar .npz parts')
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='Append the feedback added since the last export')
+    export_parser.add_argument('--output', '-o', default=EXPORT_DIR)
+    info_parser = commands.add_parser('info', help='Describe an export')
+    info_parser.add_argument('path', nargs='?', default=EXPORT_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        added = export(args.output)
+        print(json.dumps({
+            'parts_added': len(added),
+            'rows_added': sum(entry['rows'] for entry in added),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)
+        }))
+    else:
+        print(json.dumps(info(args.path), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+In-memory feedback index for the feedback-learning predictor
+Groups feedback by (weather, mood) and keeps each group sorted by temperature,
+so the ±5°C preference window is two bisects instead of a scan over all feedback.
+Names are interned to vocab.py ids and counts live in typed arrays.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from vocab import BEVERAGES, MOODS, WEATHERS
+
+# Temperature range (±5 degrees) used when matching similar conditions
+TEMPERATURE_WINDOW = 5
+
+
+def _count_key(feedback):
+    """(weather, mood, temperature, beverage, liked) for a usable feedback dict, else None"""
+    try:
+        key = (feedback['weather'], feedback['mood'], feedback['temperature'],
+               feedback['recommended_beverage'], bool(feedback['liked']))
+        temperature = key[2]
+        if isinstance(temperature, bool) or not isinstance(temperature, (int, float)):
+            return None
+        # Names become vocabulary keys; unhashable values are as unusable as missing ones
+        hash(key)
+    except (KeyError, TypeError):
+        return None
+    return key
+
+
+class _Group:
+    """
+    Counts for one (weather, mood) in typed arrays
+
+    Slots (one per distinct temperature and beverage id) are append-only;
+    `order` lists them by temperature, with `sorted_temperatures` alongside
+    it for the bisects. A slot is found by bisecting to its temperature and
+    scanning the few beverages recorded there, so there is no per-slot
+    Python object at all: about 32 bytes per slot.
+    """
+
+    __slots__ = ('beverages', 'likes', 'dislikes', 'sorted_temperatures', 'order')
+
+    def __init__(self):
+        self.beverages = array('i')
+        self.likes = array('q')
+        self.dislikes = array('q')
+        self.sorted_temperatures = array('d')
+        self.order = array('i')
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Group from distinct (temperature, beverage id, likes, dislikes) rows"""
+        group = cls()
+        rows.sort(key=lambda row: row[0])
+        temperatures, beverages, likes, dislikes = zip(*rows)
+        group.sorted_temperatures = array('d', temperatures)
+        group.beverages = array('i', beverages)
+        group.likes = array('q', likes)
+        group.dislikes = array('q', dislikes)
+        group.order = array('i', range(len(rows)))
+        return group
+
+    def add(self, temperature, beverage_id, likes, dislikes):
+        temperatures, order, beverages = self.sorted_temperatures, self.order, self.beverages
+        lo = bisect_left(temperatures, temperature)
+        hi = bisect_right(temperatures, temperature, lo)
+        for position in range(lo, hi):
+            slot = order[position]
+            if beverages[slot] == beverage_id:
+                break
+        else:
+            slot = len(beverages)
+            beverages.append(beverage_id)
+            self.likes.append(0)
+            self.dislikes.append(0)
+            temperatures.insert(hi, temperature)
+            order.insert(hi, slot)
+        self.likes[slot] += likes
+        self.dislikes[slot] += dislikes
+
+
+class FeedbackIndex:
+    """
+    Feedback grouped by (weather id, mood id)
+
+    Each group holds one like/dislike count slot per distinct (temperature,
+    beverage) in typed arrays sorted by temperature. Duplicate feedback only
+    bumps a counter, so a window lookup touches at most one slot per distinct
+    (temperature, beverage) pair however much feedback there is.
+    """
+
+    def __init__(self):
+        # (weather id, mood id) -> _Group
+        self._groups = {}
+        self.total = 0
+
+    @classmethod
+    def from_feedbacks(cls, feedbacks):
+        """Build an index from a list of feedback dicts"""
+        index = cls()
+        index.extend(feedbacks)
+        return index
+
+    def extend(self, feedbacks):
+        """
+        Add many feedback dicts. Counts are merged per (weather, mood,
+        temperature, beverage) first, so groups seen for the first time are
+        built in one sorted pass and the rest get one update per distinct key.
+        """
+        merged = {}
+        for feedback in feedbacks:
+            self.total += 1
+            # Same checks as _count_key, inlined: this loop runs once per record on a full load
+            try:
+                key = (feedback['weather'], feedback['mood'], feedback['temperature'],
+                       feedback['recommended_beverage'])
+                liked = feedback['liked']
+                temperature = key[2]
+                if isinstance(temperature, bool) or not isinstance(temperature, (int, float)):
+                    continue
+                counts = merged.get(key)
+                if counts is None:
+                    counts = merged[key] = [0, 0]
+            except (KeyError, TypeError):
+                continue
+            counts[0 if liked else 1] += 1
+        self._add_merged(merged)
+
+    def _add_merged(self, merged):
+        """Add {(weather, mood, temperature, beverage): [likes, dislikes]} counts"""
+        rows_by_group = {}
+        for (weather, mood, temperature, beverage), (likes, dislikes) in merged.items():
+            key = (WEATHERS.add(weather), MOODS.add(mood))
+            rows_by_group.setdefault(key, []).append((temperature, BEVERAGES.add(beverage), likes, dislikes))
+
+        for key, rows in rows_by_group.items():
+            group = self._groups.get(key)
+            if group is None:
+                self._groups[key] = _Group.from_rows(rows)
+            else:
+                for row in rows:
+                    group.add(*row)
+
+    def apply_snapshot(self, snapshot):
+        """
+        Add the aggregate counts of a compacted feedback log snapshot
+        (rows of [weather, mood, temp_bucket, beverage, likes, dislikes])
+        """
+        self.total += snapshot.get('total', 0)
+        merged = {}
+        for weather, mood, temperature, beverage, likes, dislikes in snapshot.get('counts', []):
+            if temperature is not None:
+                counts = merged.setdefault((weather, mood, temperature, beverage), [0, 0])
+                counts[0] += likes
+                counts[1] += dislikes
+        self._add_merged(merged)
+
+    def add(self, feedback, count=1):
+        """
+        Add one feedback dict (weather, mood, temperature, recommended_beverage, liked)
+
+        Records missing a field or with a non-numeric temperature still count
+        towards the total but can never match a window, as before.
+        """
+        self.total += count
+        key = _count_key(feedback)
+        if key is not None:
+            weather, mood, temperature, beverage, liked = key
+            self.add_counts(weather, mood, temperature, beverage,
+                            count if liked else 0, 0 if liked else count)
+
+    def add_counts(self, weather, mood, temperature, beverage, likes, dislikes):
+        """Add aggregated like/dislike counts without touching the total"""
+        key = (WEATHERS.add(weather), MOODS.add(mood))
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group()
+        group.add(temperature, BEVERAGES.add(beverage), likes, dislikes)
+
+    def window_ids(self, weather, mood, temperature):
+        """Yield (beverage id, likes, dislikes) for every slot within ±5°C"""
+        group = self._groups.get((WEATHERS.get(weather), MOODS.get(mood)))
+        if group is None:
+            return
+        lo = bisect_left(group.sorted_temperatures, temperature - TEMPERATURE_WINDOW)
+        hi = bisect_right(group.sorted_temperatures, temperature + TEMPERATURE_WINDOW)
+        beverages, likes, dislikes = group.beverages, group.likes, group.dislikes
+        for slot in group.order[lo:hi]:
+            yield beverages[slot], likes[slot], dislikes[slot]
+
+    def window(self, weather, mood, temperature):
+        """Yield (beverage, likes, dislikes) for every slot within ±5°C"""
+        names = BEVERAGES.names
+        for beverage_id, likes, dislikes in self.window_ids(weather, mood, temperature):
+            yield names[beverage_id], likes, dislikes
+
+    def preference_ids(self, weather, mood, temperature):
+        """(liked, disliked) beverage id sets for this weather/mood within ±5°C"""
+        liked = set()
+        disliked = set()
+        for beverage_id, likes, dislikes in self.window_ids(weather, mood, temperature):
+            if likes:
+                liked.add(beverage_id)
+            if dislikes:
+                disliked.add(beverage_id)
+        return liked, disliked
+
+    def preferences(self, weather, mood, temperature):
+        """
+        Liked and disliked beverages for this weather/mood within ±5°C,
+        in the same shape get_feedback_preferences has always returned
+        """
+        liked, disliked = self.preference_ids(weather, mood, temperature)
+        return {
+            'liked': BEVERAGES.decode(liked),
+            'disliked': BEVERAGES.decode(disliked),
+            'total_feedback': self.total
+        }
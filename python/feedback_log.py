@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Reader for the append-only feedback log written by services/feedbackLog.js
+Tails only the bytes appended since the last read instead of re-parsing everything
+
+Layout of data/feedback_log/:
+  segment-000001.jsonl ...  one feedback JSON object per line, append-only
+  snapshot.json             aggregate counts of every segment up to through_segment,
+                            rows of [weather, mood, temp_bucket, beverage, likes, dislikes]
+
+FEEDBACK_LOG_DIR moves the log elsewhere (as it does for services/feedbackLog.js).
+When the log directory does not exist yet the legacy data/feedback.json is read instead.
+"""
+
+import os
+import re
+import sys
+import json
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+LOG_DIR = os.environ.get('FEEDBACK_LOG_DIR') or os.path.join(DATA_DIR, 'feedback_log')
+LEGACY_FEEDBACK_FILE = os.path.join(DATA_DIR, 'feedback.json')
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d+)\.jsonl$')
+
+EMPTY_SNAPSHOT = {'version': 1, 'through_segment': 0, 'total': 0, 'recent': [], 'counts': []}
+
+
+def _file_stamp(path):
+    """(inode, mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class FeedbackLogReader:
+    """
+    Incremental reader over the feedback log
+
+    read_updates() returns (snapshot, records). snapshot is None when the
+    caller only needs to apply the new records on top of what it already has;
+    otherwise (first read, or a compaction that folded in records the caller
+    had not read yet) the caller must discard its state, apply the snapshot
+    and then the records. A compaction of segments already read is not
+    reported, so the active segment is never replayed. Only complete lines
+    are consumed, so a record being written concurrently is picked up by the
+    next call instead of half-parsed.
+    """
+
+    def __init__(self, log_dir=LOG_DIR, legacy_file=LEGACY_FEEDBACK_FILE):
+        self.log_dir = log_dir
+        self.snapshot_file = os.path.join(log_dir, 'snapshot.json')
+        self.legacy_file = legacy_file
+        self.snapshot_stamp = None
+        self.segment = None
+        self.offset = 0
+        self.legacy_stamp = None
+
+    def _segments(self):
+        segments = []
+        for name in os.listdir(self.log_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _segment_path(self, n):
+        return os.path.join(self.log_dir, f'segment-{n:06d}.jsonl')
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict(EMPTY_SNAPSHOT)
+
+    def _read_legacy(self):
+        """Fallback for trees that still only have data/feedback.json"""
+        stamp = _file_stamp(self.legacy_file)
+        if stamp == self.legacy_stamp:
+            return None, []
+        self.legacy_stamp = stamp
+        feedbacks = []
+        if stamp is not None:
+            with open(self.legacy_file, 'r') as f:
+                feedbacks = json.load(f).get('feedbacks', [])
+        return dict(EMPTY_SNAPSHOT), feedbacks
+
+    def _tail(self, n, offset):
+        """Parse complete lines of segment n from offset; returns (records, new offset)"""
+        with open(self._segment_path(n), 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                print(f"Warning: Skipping corrupt feedback line in segment {n}", file=sys.stderr)
+        return records, offset + end
+
+    def position(self):
+        """Where the next read_updates() continues, to checkpoint alongside derived state"""
+        return {
+            'snapshot_stamp': list(self.snapshot_stamp) if self.snapshot_stamp else None,
+            'segment': self.segment,
+            'offset': self.offset,
+            'legacy_stamp': list(self.legacy_stamp) if self.legacy_stamp else None
+        }
+
+    def seek(self, position):
+        """
+        Resume from a position() taken earlier. If the log was compacted
+        since, the next read_updates() returns the new snapshot as usual.
+        """
+        stamp = position.get('snapshot_stamp')
+        legacy_stamp = position.get('legacy_stamp')
+        self.snapshot_stamp = tuple(stamp) if stamp else None
+        self.segment = position.get('segment')
+        self.offset = position.get('offset', 0)
+        self.legacy_stamp = tuple(legacy_stamp) if legacy_stamp else None
+
+    def read_updates(self, _retry=True):
+        """Return (snapshot or None, new records) since the previous call"""
+        if not os.path.isdir(self.log_dir):
+            return self._read_legacy()
+
+        snapshot = None
+        stamp = _file_stamp(self.snapshot_file)
+        if stamp != self.snapshot_stamp or self.segment is None:
+            snapshot = self._load_snapshot()
+            self.snapshot_stamp = stamp
+            if self.segment is not None and snapshot['through_segment'] < self.segment:
+                # Compaction only folded segments we had read in full: what the
+                # caller holds still matches, so keep tailing from where we are
+                snapshot = None
+            else:
+                self.segment = snapshot['through_segment'] + 1
+                self.offset = 0
+
+        records = []
+        try:
+            segments = [n for n in self._segments() if n >= self.segment]
+            if segments and segments[0] != self.segment and _retry:
+                # Our segment was compacted away under us
+                raise FileNotFoundError(self._segment_path(self.segment))
+            for n in segments:
+                if n > self.segment:
+                    self.segment, self.offset = n, 0
+                new_records, self.offset = self._tail(n, self.offset)
+                records.extend(new_records)
+        except FileNotFoundError:
+            if not _retry:
+                raise
+            # Start over from the new snapshot
+            self.snapshot_stamp = None
+            self.segment = None
+            return self.read_updates(_retry=False)
+
+        return snapshot, records
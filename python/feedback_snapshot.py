@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped feedback snapshot shared by all predictor workers
+The builder folds the whole feedback log into like/dislike counts per
+(weather, mood, whole-degree temperature bucket, beverage) and writes them
+to one fixed-layout binary file. Workers mmap it read-only, so the counts
+live once in the page cache however many workers there are, and only the
+feedback appended after the snapshot is held in each worker's memory.
+
+A new generation is written to a temporary file and renamed over the old
+one; workers notice the new inode on their next request and switch.
+
+Usage: python python/feedback_snapshot.py build [--output PATH] [--watch SECONDS]
+       python python/feedback_snapshot.py info [PATH]
+
+File layout (little-endian):
+  header      magic, version, generation, total feedback, metadata length, groups, rows
+  metadata    JSON: weather/mood/beverage names and the feedback log position covered
+  groups      per (weather, mood): name indices and the [start, end) range of its rows
+  rows        four column arrays sorted by temperature within each group:
+              temperature bucket (int32), beverage index (int32), likes, dislikes (uint32)
+"""
+
+import os
+import sys
+import json
+import math
+import mmap
+import time
+import struct
+import argparse
+from bisect import bisect_left, bisect_right
+
+from feedback_index import TEMPERATURE_WINDOW, FeedbackIndex
+from feedback_log import DATA_DIR, FeedbackLogReader
+from vocab import BEVERAGES
+
+SNAPSHOT_FILE = os.path.join(DATA_DIR, 'feedback_snapshot.bin')
+MAGIC = b'BVFSNAP\x00'
+VERSION = 1
+
+HEADER = struct.Struct('<8sIQQIII')
+GROUP = struct.Struct('<IIII')
+
+
+def file_stamp(path):
+    """(inode, mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def temperature_bucket(temperature):
+    """Whole-degree bucket, as the feedback log snapshot uses (None when unusable)"""
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)) or not math.isfinite(temperature):
+        return None
+    return int(math.floor(temperature))
+
+
+class SnapshotBuilder:
+    """
+    Aggregate counts for the whole feedback log, kept up to date
+    incrementally so --watch only reads what was appended
+    """
+
+    def __init__(self, reader=None):
+        self.reader = reader or FeedbackLogReader()
+        self.total = 0
+        # (weather, mood, bucket, beverage) -> [likes, dislikes]
+        self.counts = {}
+
+    def _add(self, weather, mood, bucket, beverage, likes, dislikes):
+        try:
+            counts = self.counts.get((weather, mood, bucket, beverage))
+        except TypeError:
+            return
+        if counts is None:
+            counts = self.counts[(weather, mood, bucket, beverage)] = [0, 0]
+        counts[0] += likes
+        counts[1] += dislikes
+
+    def refresh(self):
+        """Apply what the log gained since the last call; True if anything changed"""
+        snapshot, records = self.reader.read_updates()
+        if snapshot is not None:
+            self.total = snapshot.get('total', 0)
+            self.counts = {}
+            for weather, mood, bucket, beverage, likes, dislikes in snapshot.get('counts', []):
+                if bucket is not None:
+                    self._add(weather, mood, int(bucket), beverage, likes, dislikes)
+        for record in records:
+            self.total += 1
+            try:
+                bucket = temperature_bucket(record['temperature'])
+                if bucket is not None:
+                    liked = 1 if record['liked'] else 0
+                    self._add(record['weather'], record['mood'], bucket,
+                              record['recommended_beverage'], liked, 1 - liked)
+            except (KeyError, TypeError):
+                continue
+        return snapshot is not None or bool(records)
+
+    def write(self, path=SNAPSHOT_FILE):
+        """Write the next generation atomically; returns its generation number"""
+        previous = read_header(path)
+        generation = previous['generation'] + 1 if previous else 1
+
+        weathers, moods, beverages = {}, {}, {}
+
+        def index_of(names, name):
+            if name not in names:
+                names[name] = len(names)
+            return names[name]
+
+        rows_by_group = {}
+        for (weather, mood, bucket, beverage), (likes, dislikes) in self.counts.items():
+            key = (index_of(weathers, weather), index_of(moods, mood))
+            rows_by_group.setdefault(key, []).append((bucket, index_of(beverages, beverage), likes, dislikes))
+
+        groups = []
+        columns = ([], [], [], [])
+        for key in sorted(rows_by_group):
+            rows = sorted(rows_by_group[key])
+            start = len(columns[0])
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(values)
+            groups.append((key[0], key[1], start, len(columns[0])))
+
+        metadata = json.dumps({
+            'weathers': list(weathers),
+            'moods': list(moods),
+            'beverages': list(beverages),
+            'position': self.reader.position(),
+            'built_at': time.time()
+        }).encode('utf-8')
+        metadata += b' ' * (-len(metadata) % 8)
+
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, generation, self.total, len(metadata), len(groups), len(columns[0])))
+            f.write(metadata)
+            for group in groups:
+                f.write(GROUP.pack(*group))
+            n = len(columns[0])
+            f.write(struct.pack(f'<{n}i', *columns[0]))
+            f.write(struct.pack(f'<{n}i', *columns[1]))
+            f.write(struct.pack(f'<{n}I', *(min(v, 0xFFFFFFFF) for v in columns[2])))
+            f.write(struct.pack(f'<{n}I', *(min(v, 0xFFFFFFFF) for v in columns[3])))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return generation
+
+
+def read_header(path):
+    """Header fields of a snapshot file, or None when there is no valid one"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, version, generation, total, metadata_length, n_groups, n_rows = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        return None
+    return {'generation': generation, 'total': total, 'metadata_length': metadata_length,
+            'groups': n_groups, 'rows': n_rows}
+
+
+class FeedbackSnapshot:
+    """
+    Read-only, zero-copy view of a snapshot file
+
+    The row columns are memoryviews over the mapping, so bisecting and
+    reading them never copies the counts into the worker's heap; only the
+    name tables and the per-(weather, mood) group ranges are parsed.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self.stamp = file_stamp(path)
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = read_header(path)
+        if header is None:
+            raise ValueError(f"{path} is not a feedback snapshot")
+        view = memoryview(self._map)
+        self.generation = header['generation']
+        self.total = header['total']
+
+        offset = HEADER.size
+        metadata = json.loads(bytes(view[offset:offset + header['metadata_length']]))
+        offset += header['metadata_length']
+        self.position = metadata['position']
+
+        weathers, moods = metadata['weathers'], metadata['moods']
+        self._ranges = {}
+        for i in range(header['groups']):
+            weather, mood, start, end = GROUP.unpack_from(view, offset + i * GROUP.size)
+            self._ranges[(weathers[weather], moods[mood])] = (start, end)
+        offset += header['groups'] * GROUP.size
+
+        n = header['rows']
+        self.temperatures = view[offset:offset + 4 * n].cast('i')
+        self.beverages = view[offset + 4 * n:offset + 8 * n].cast('i')
+        self.likes = view[offset + 8 * n:offset + 12 * n].cast('I')
+        self.dislikes = view[offset + 12 * n:offset + 16 * n].cast('I')
+        # Snapshot-local beverage index -> process-wide vocabulary id
+        self.beverage_ids = [BEVERAGES.add(name) for name in metadata['beverages']]
+
+    def window_ids(self, weather, mood, temperature):
+        """Yield (beverage id, likes, dislikes) for every bucket within ±5°C"""
+        try:
+            start, end = self._ranges[(weather, mood)]
+        except (KeyError, TypeError):
+            return
+        lo = bisect_left(self.temperatures, temperature - TEMPERATURE_WINDOW, start, end)
+        hi = bisect_right(self.temperatures, temperature + TEMPERATURE_WINDOW, lo, end)
+        beverage_ids, beverages, likes, dislikes = self.beverage_ids, self.beverages, self.likes, self.dislikes
+        for row in range(lo, hi):
+            yield beverage_ids[beverages[row]], likes[row], dislikes[row]
+
+
+class MappedFeedbackIndex(FeedbackIndex):
+    """
+    FeedbackIndex over a mapped snapshot: lookups read the snapshot and
+    then the feedback added on top of it, which is held in memory as usual
+    """
+
+    def __init__(self, snapshot):
+        super().__init__()
+        self.snapshot = snapshot
+        self.total = snapshot.total
+
+    def window_ids(self, weather, mood, temperature):
+        yield from self.snapshot.window_ids(weather, mood, temperature)
+        yield from super().window_ids(weather, mood, temperature)
+
+
+def build(args):
+    builder = SnapshotBuilder()
+    last_position = None
+    while True:
+        changed = builder.refresh()
+        position = builder.reader.position()
+        if changed or last_position is None or position != last_position:
+            generation = builder.write(args.output)
+            print(f"Wrote generation {generation}: {builder.total} feedback, "
+                  f"{len(builder.counts)} counts -> {args.output}", file=sys.stderr)
+            last_position = position
+        if not args.watch:
+            return
+        time.sleep(args.watch)
+
+
+def info(args):
+    snapshot = FeedbackSnapshot(args.path)
+    print(json.dumps({
+        'path': args.path,
+        'generation': snapshot.generation,
+        'total': snapshot.total,
+        'groups': len(snapshot._ranges),
+        'rows': len(snapshot.temperatures),
+        'bytes': os.path.getsize(args.path),
+        'position': snapshot.position
+    }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the memory-mapped feedback snapshot')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='Write a new snapshot generation from the feedback log')
+    build_parser.add_argument('--output', '-o', default=SNAPSHOT_FILE)
+    build_parser.add_argument('--watch', type=float, default=0,
+                              help='Keep running and write a new generation every SECONDS when the log changed')
+    info_parser = commands.add_parser('info', help='Describe a snapshot file')
+    info_parser.add_argument('path', nargs='?', default=SNAPSHOT_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build(args)
+    else:
+        info(args)
+
+
+if __name__ == "__main__":
+    main()
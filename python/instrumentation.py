@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Hot-path instrumentation for the predictor scripts
+Per-stage timers, counters and latency histograms aggregated across requests,
+rendered as Prometheus text or a JSON snapshot, plus sampled cProfile dumps
+
+Environment:
+  PREDICTOR_METRICS=0            disable timing (stage() becomes a shared no-op)
+  PREDICTOR_STATS_INTERVAL=SEC   worker mode writes a JSON stats line to stderr every SEC seconds
+  PREDICTOR_PROFILE=N            profile N sampled requests, then dump cProfile stats
+  PREDICTOR_PROFILE_EVERY=K      sample every K-th request (default 1)
+  PREDICTOR_PROFILE_DIR=DIR      where the .prof dump goes (default: system temp dir)
+"""
+
+import os
+import sys
+import time
+import tempfile
+from bisect import bisect_left
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in milliseconds"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, ms):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.sum += ms
+        self.count += 1
+
+    def snapshot(self):
+        return {'buckets': list(self.counts), 'sum': round(self.sum, 3), 'count': self.count}
+
+
+class _NoopStage:
+    """Shared do-nothing context manager used when metrics are disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+class _Stage:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class Metrics:
+    """Counters, gauges and per-stage latency histograms for one process"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def stage(self, name):
+        """Context manager timing one pipeline stage into the `name` histogram"""
+        if not self.enabled:
+            return _NOOP_STAGE
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return _Stage(histogram)
+
+    def inc(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self, extra=None):
+        """
+        JSON-friendly view of everything recorded so far. Numeric leaves of
+        `extra` (e.g. a predictor's get_stats()) are flattened into gauges.
+        """
+        gauges = dict(self.gauges)
+        if extra:
+            gauges.update(flatten(extra))
+        return {
+            'enabled': self.enabled,
+            'bucket_bounds_ms': list(LATENCY_BUCKETS_MS),
+            'counters': dict(self.counters),
+            'gauges': gauges,
+            'stages': {name: h.snapshot() for name, h in self.histograms.items()}
+        }
+
+
+def flatten(stats, prefix=''):
+    """{'cache': {'hits': 3}} -> {'cache_hits': 3}, keeping only numbers"""
+    flat = {}
+    for key, value in stats.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{name}_'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def render_prometheus(snapshot, prefix='predictor', labels=''):
+    """Prometheus text exposition of a Metrics.snapshot()"""
+    label_block = f'{{{labels}}}' if labels else ''
+    lines = []
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f'# TYPE {prefix}_{name} counter')
+        lines.append(f'{prefix}_{name}{label_block} {value}')
+    for name, value in sorted(snapshot['gauges'].items()):
+        lines.append(f'# TYPE {prefix}_{name} gauge')
+        lines.append(f'{prefix}_{name}{label_block} {value}')
+    if snapshot['stages']:
+        metric = f'{prefix}_stage_duration_ms'
+        lines.append(f'# TYPE {metric} histogram')
+        bounds = [str(b) for b in snapshot['bucket_bounds_ms']] + ['+Inf']
+        for stage, histogram in sorted(snapshot['stages'].items()):
+            stage_labels = f'stage="{stage}"' + (f',{labels}' if labels else '')
+            cumulative = 0
+            for bound, count in zip(bounds, histogram['buckets']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{stage_labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{{stage_labels}}} {histogram["sum"]}')
+            lines.append(f'{metric}_count{{{stage_labels}}} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    """
+    Profile a sample of requests with cProfile and dump the combined
+    stats once `limit` requests have been captured
+    """
+
+    def __init__(self, limit, every=1, out_dir=None):
+        self.limit = limit
+        self.every = max(1, every)
+        self.out_dir = out_dir or tempfile.gettempdir()
+        self.seen = 0
+        self.sampled = 0
+        self.profile = None
+
+    @property
+    def active(self):
+        return self.sampled < self.limit
+
+    def run(self, fn, *args):
+        """Call fn(*args), profiling it if this request is sampled"""
+        self.seen += 1
+        if not self.active or (self.seen - 1) % self.every:
+            return fn(*args)
+
+        import cProfile
+        if self.profile is None:
+            self.profile = cProfile.Profile()
+        self.profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            self.profile.disable()
+            self.sampled += 1
+            if not self.active:
+                self.dump()
+
+    def dump(self):
+        """Write the .prof file and a short cumulative-time summary to stderr"""
+        import io
+        import pstats
+        path = os.path.join(self.out_dir, f'predictor-{os.getpid()}.prof')
+        self.profile.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(self.profile, stream=summary).sort_stats('cumulative').print_stats(20)
+        print(f"Profiled {self.sampled} requests -> {path}\n{summary.getvalue()}", file=sys.stderr)
+        return path
+
+
+def profiler_from_env():
+    limit = int(os.environ.get('PREDICTOR_PROFILE', 0) or 0)
+    if limit <= 0:
+        return None
+    return Profiler(limit, int(os.environ.get('PREDICTOR_PROFILE_EVERY', 1) or 1),
+                    os.environ.get('PREDICTOR_PROFILE_DIR'))
+
+
+# Process-wide registry used by the predictor scripts
+metrics = Metrics(enabled=os.environ.get('PREDICTOR_METRICS', '1') != '0')
+
+
+def stage(name):
+    """Time a pipeline stage on the process-wide registry"""
+    return metrics.stage(name)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mappable model artifacts for fast predictor start-up
+Converts the pickled model and label encoders into plain numpy arrays plus
+JSON class lists, and loads them back without unpickling or importing sklearn
+
+Layout of model_artifacts/:
+  manifest.json            model kind, source file stamps, array names, generation directory
+  model-<id>/              one generation, named after its content:
+    feature_classes.json   feature encoder classes (sorted, as LabelEncoder keeps them)
+    target_classes.json    target encoder classes
+    model_classes.npy      model.classes_ (encoded target ids)
+    <name>.npy             model arrays (tree nodes or linear coefficients)
+
+A conversion never rewrites files in place: running workers keep the
+previous generation mapped, and only the manifest swap makes them switch.
+"""
+
+import os
+import glob
+import json
+import shutil
+import hashlib
+
+ARTIFACT_VERSION = 2
+
+
+def file_stamp(path):
+    """(size, mtime_ns) of a file, used to detect stale artifacts cheaply"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CompactLabelEncoder:
+    """Drop-in replacement for a fitted LabelEncoder backed by a sorted class array"""
+
+    def __init__(self, classes):
+        import numpy as np
+        self.classes_ = np.asarray(classes, dtype=object)
+        self._index = {c: i for i, c in enumerate(classes)}
+
+    def transform(self, values):
+        import numpy as np
+        try:
+            return np.array([self._index[v] for v in values], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e}")
+
+    def inverse_transform(self, encoded):
+        import numpy as np
+        return self.classes_[np.asarray(encoded, dtype=np.int64)]
+
+
+class CompactTreeEnsemble:
+    """
+    One or more decision trees stored as flat node arrays
+
+    Trees are concatenated; `roots` holds each tree's first node. Leaves
+    have children_left == -1 and carry per-class probabilities in `value`.
+    """
+
+    def __init__(self, arrays, classes):
+        self.children_left = arrays['children_left']
+        self.children_right = arrays['children_right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes_ = classes
+
+    def _leaves(self, X):
+        import numpy as np
+        # sklearn trees compare float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X.shape[0])
+        leaves = []
+        for root in self.roots:
+            node = np.full(X.shape[0], root, dtype=np.int64)
+            while True:
+                left = self.children_left[node]
+                active = left != -1
+                if not active.any():
+                    break
+                go_left = X[rows, np.maximum(self.feature[node], 0)] <= self.threshold[node]
+                node = np.where(active, np.where(go_left, left, self.children_right[node]), node)
+            leaves.append(node)
+        return leaves
+
+    def predict_proba(self, X):
+        import numpy as np
+        leaves = self._leaves(X)
+        return np.mean([self.value[leaf] for leaf in leaves], axis=0)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+class CompactLinearModel:
+    """Multinomial / one-vs-rest linear classifier stored as coefficient arrays"""
+
+    def __init__(self, arrays, classes, multinomial):
+        self.coef = arrays['coef']
+        self.intercept = arrays['intercept']
+        self.classes_ = classes
+        self.multinomial = multinomial
+
+    def decision_function(self, X):
+        import numpy as np
+        return np.asarray(X, dtype=np.float64) @ self.coef.T + self.intercept
+
+    def predict_proba(self, X):
+        import numpy as np
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            positive = 1 / (1 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - positive, positive])
+        if self.multinomial:
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        else:
+            scores = 1 / (1 + np.exp(-scores))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _tree_arrays(trees, n_classes):
+    """Flatten fitted sklearn tree_ objects into one set of node arrays"""
+    import numpy as np
+    parts = {name: [] for name in ('children_left', 'children_right', 'feature', 'threshold', 'value')}
+    roots = []
+    offset = 0
+    for tree in trees:
+        left = tree.children_left.astype(np.int32)
+        right = tree.children_right.astype(np.int32)
+        parts['children_left'].append(np.where(left == -1, -1, left + offset))
+        parts['children_right'].append(np.where(right == -1, -1, right + offset))
+        parts['feature'].append(tree.feature.astype(np.int32))
+        parts['threshold'].append(tree.threshold.astype(np.float64))
+        # Normalise leaf counts/fractions to probabilities
+        value = tree.value[:, 0, :n_classes].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        parts['value'].append(np.divide(value, totals, out=np.zeros_like(value), where=totals > 0))
+        roots.append(offset)
+        offset += tree.node_count
+    arrays = {name: np.concatenate(values) for name, values in parts.items()}
+    arrays['roots'] = np.asarray(roots, dtype=np.int32)
+    return arrays
+
+
+def describe_model(model):
+    """Return (kind, arrays, extra manifest fields) for a supported sklearn model"""
+    import numpy as np
+    n_classes = len(model.classes_)
+    if hasattr(model, 'tree_'):
+        return 'tree', _tree_arrays([model.tree_], n_classes), {}
+    if hasattr(model, 'estimators_') and all(hasattr(e, 'tree_') for e in np.ravel(model.estimators_)):
+        if type(model).__name__.startswith('GradientBoosting'):
+            raise ValueError("Gradient boosting models are not supported by the compact format")
+        return 'tree', _tree_arrays([e.tree_ for e in np.ravel(model.estimators_)], n_classes), {}
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        multinomial = n_classes > 2 and getattr(model, 'multi_class', 'auto') != 'ovr'
+        arrays = {'coef': np.asarray(model.coef_, dtype=np.float64),
+                  'intercept': np.asarray(model.intercept_, dtype=np.float64)}
+        return 'linear', arrays, {'multinomial': multinomial}
+    raise ValueError(f"Unsupported model type for compact artifacts: {type(model).__name__}")
+
+
+def convert(model, feature_encoder, target_encoder, sources, artifact_dir):
+    """
+    Write compact artifacts for an already-loaded model and encoders.
+    `sources` maps 'model'/'feature_encoder'/'target_encoder' to the pickle paths.
+    """
+    import numpy as np
+    kind, arrays, extra = describe_model(model)
+    arrays = dict(arrays, model_classes=np.asarray(model.classes_))
+    class_lists = {name: json.dumps([str(c) for c in encoder.classes_])
+                   for name, encoder in (('feature_classes', feature_encoder), ('target_classes', target_encoder))}
+
+    # Each generation goes to a new content-named directory: overwriting the
+    # .npy files in place would truncate arrays live workers have mapped
+    digest = hashlib.sha256(kind.encode())
+    for name in sorted(arrays):
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    for name in sorted(class_lists):
+        digest.update(class_lists[name].encode())
+    generation = f'model-{digest.hexdigest()[:12]}'
+    generation_dir = os.path.join(artifact_dir, generation)
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    if not os.path.isdir(generation_dir):
+        tmp_dir = f'{generation_dir}.tmp-{os.getpid()}'
+        os.makedirs(tmp_dir, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+        for name, classes in class_lists.items():
+            with open(os.path.join(tmp_dir, f'{name}.json'), 'w') as f:
+                f.write(classes)
+        try:
+            os.rename(tmp_dir, generation_dir)
+        except OSError:
+            # Another converter published the same content first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'kind': kind,
+        'dir': generation,
+        'arrays': sorted(name for name in arrays if name != 'model_classes'),
+        'sources': {
+            name: {'path': os.path.basename(path), 'stamp': file_stamp(path), 'sha256': file_sha256(path)}
+            for name, path in sources.items()
+        },
+        **extra
+    }
+    # Manifest last, atomically: a half-written artifact set is never picked up
+    tmp_path = os.path.join(artifact_dir, f'manifest.json.tmp-{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(artifact_dir, 'manifest.json'))
+
+    # Workers that still have an older generation mapped keep reading it after the unlink
+    for path in glob.glob(os.path.join(artifact_dir, 'model-*')):
+        if os.path.basename(path) != generation and '.tmp-' not in path:
+            shutil.rmtree(path, ignore_errors=True)
+    return manifest
+
+
+def read_manifest(artifact_dir):
+    try:
+        with open(os.path.join(artifact_dir, 'manifest.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(manifest, sources):
+    """True when the artifacts were built from the current pickle files"""
+    if not manifest or manifest.get('version') != ARTIFACT_VERSION:
+        return False
+    for name, path in sources.items():
+        recorded = manifest['sources'].get(name)
+        try:
+            if recorded is None or recorded['stamp'] != file_stamp(path):
+                return False
+        except OSError:
+            # Pickle removed after conversion: the artifacts are all that is left
+            continue
+    return True
+
+
+def load(artifact_dir, manifest=None):
+    """Load (model, feature_encoder, target_encoder) with memory-mapped arrays"""
+    import numpy as np
+    manifest = manifest or read_manifest(artifact_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No model artifacts in {artifact_dir}")
+    generation_dir = os.path.join(artifact_dir, manifest['dir'])
+
+    def array(name):
+        return np.load(os.path.join(generation_dir, f'{name}.npy'), mmap_mode='r')
+
+    def classes(name):
+        with open(os.path.join(generation_dir, f'{name}.json'), 'r') as f:
+            return json.load(f)
+
+    arrays = {name: array(name) for name in manifest['arrays']}
+    model_classes = np.asarray(array('model_classes'))
+    if manifest['kind'] == 'tree':
+        model = CompactTreeEnsemble(arrays, model_classes)
+    else:
+        model = CompactLinearModel(arrays, model_classes, manifest.get('multinomial', True))
+
+    return model, CompactLabelEncoder(classes('feature_classes')), CompactLabelEncoder(classes('target_classes'))
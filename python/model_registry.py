@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Versioned model slots with background hot reload and shadow scoring
+A ModelRegistry holds the active ModelSlot (model, encoders and the file
+stamps they were loaded from). A watcher thread polls the source files;
+when they change and then stay unchanged for one more poll (so a file still
+being copied is not picked up half-written), and their checksums differ
+from the active version, the new version is loaded and warmed on the
+watcher thread and then swapped in with a single reference assignment.
+
+Callers take the active slot once per request (or per batch), so a request
+that started on the old version finishes on it; the old slot is freed when
+the last such request drops it. A version that fails to load or warm is
+logged and skipped, and the active one keeps serving.
+
+A ShadowScorer sends a sampled fraction of requests to a candidate model on
+its own thread and compares the answers with the ones already returned, so
+shadow traffic never changes a response or waits on the candidate.
+"""
+
+import sys
+import time
+import queue
+import random
+import threading
+
+from model_artifacts import file_sha256, file_stamp
+
+
+def _stamps(sources):
+    """{name: (size, mtime_ns) or None when missing} for the source files"""
+    stamps = {}
+    for name, path in sources.items():
+        try:
+            stamps[name] = tuple(file_stamp(path))
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+
+def _digests(sources, stamps):
+    return {name: file_sha256(path) for name, path in sources.items() if stamps[name] is not None}
+
+
+class ModelSlot:
+    """One loaded version of the model and its encoders"""
+
+    def __init__(self, version, loaded, stamps, digests):
+        self.version = version
+        self.loaded = loaded
+        self.model, self.feature_encoder, self.target_encoder = loaded
+        self.stamps = stamps
+        self.digests = digests
+        self.loaded_at = time.time()
+        self.load_ms = 0.0
+        self.warm_ms = 0.0
+        # Per-version state filled in while warming (e.g. FeatureCodes)
+        self.codes = None
+
+    def info(self):
+        return {
+            "version": self.version,
+            "sha256": self.digests.get('model', '')[:12],
+            "loaded_at": round(self.loaded_at, 3),
+            "load_ms": self.load_ms,
+            "warm_ms": self.warm_ms
+        }
+
+
+class ModelRegistry:
+    """
+    The active model version, reloaded in the background when its files change
+
+    `load()` returns (model, feature_encoder, target_encoder); `warm(slot)`
+    exercises a new slot before it takes traffic and raises if it is unusable.
+    `watch_interval` is the polling period in seconds (0 = never reload).
+    """
+
+    def __init__(self, name, sources, load, warm=None, watch_interval=5.0):
+        self.name = name
+        self.sources = sources
+        self._load = load
+        self._warm = warm
+        self.watch_interval = watch_interval
+        self._active = None
+        self._lock = threading.Lock()
+        self._watcher = None
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error = None
+
+    def current(self):
+        """The active slot, loading the first version on first use"""
+        slot = self._active
+        if slot is None:
+            with self._lock:
+                if self._active is None:
+                    self._active = self._build(1, _stamps(self.sources))
+                slot = self._active
+            self._start_watcher()
+        return slot
+
+    def _build(self, version, stamps):
+        start = time.perf_counter()
+        digests = _digests(self.sources, stamps)
+        slot = ModelSlot(version, self._load(), stamps, digests)
+        loaded = time.perf_counter()
+        if self._warm is not None:
+            self._warm(slot)
+        slot.load_ms = round((loaded - start) * 1000, 2)
+        slot.warm_ms = round((time.perf_counter() - loaded) * 1000, 2)
+        return slot
+
+    def _start_watcher(self):
+        if self.watch_interval > 0 and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name=f'{self.name}-watcher', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        pending = None
+        failed = None
+        while True:
+            time.sleep(self.watch_interval)
+            stamps = _stamps(self.sources)
+            if stamps == self._active.stamps or stamps == failed:
+                pending = None
+                continue
+            if stamps != pending:
+                # Changed since the last poll: wait until the files settle
+                pending = stamps
+                continue
+            pending = None
+            if not self.check(stamps):
+                failed = stamps
+
+    def check(self, stamps=None):
+        """
+        Load and swap in the version on disk if it differs from the active one
+        Returns False when the new version could not be loaded or warmed.
+        """
+        stamps = stamps or _stamps(self.sources)
+        active = self.current()
+        try:
+            digests = _digests(self.sources, stamps)
+            if digests == active.digests:
+                # Touched or rewritten with the same bytes: nothing to load
+                active.stamps = stamps
+                return True
+            slot = self._build(active.version + 1, stamps)
+        except Exception as e:
+            self.reload_failures += 1
+            self.last_error = str(e)
+            print(f"Warning: Could not load new {self.name} version, keeping "
+                  f"v{active.version}: {e}", file=sys.stderr)
+            return False
+        self._active = slot
+        self.reloads += 1
+        print(f"Swapped in {self.name} v{slot.version} ({slot.digests.get('model', '')[:12]}), "
+              f"loaded in {slot.load_ms} ms, warmed in {slot.warm_ms} ms", file=sys.stderr)
+        return True
+
+    def stats(self):
+        stats = self._active.info() if self._active is not None else {}
+        stats.update({"reloads": self.reloads, "reload_failures": self.reload_failures})
+        if self.last_error:
+            stats["last_error"] = self.last_error
+        return stats
+
+
+class ShadowScorer:
+    """
+    Score a sampled fraction of requests on a candidate model, off the request path
+
+    `score(slot, data)` returns the candidate's answer for one request.
+    submit() only enqueues; when the queue is full the sample is dropped.
+    """
+
+    def __init__(self, registry, score, rate=0.1, queue_size=256, rng=random):
+        self.registry = registry
+        self.score = score
+        self.rate = rate
+        self.rng = rng
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self.sampled = 0
+        self.dropped = 0
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+        self.primary_ms = 0.0
+        self.shadow_ms = 0.0
+
+    def submit(self, data, primary, primary_ms):
+        """Maybe queue one request with the answer (and latency) it was given"""
+        if self.rate <= 0 or self.rng.random() >= self.rate:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+            self._thread.start()
+        try:
+            self._queue.put_nowait((data, primary, primary_ms))
+            self.sampled += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            data, primary, primary_ms = self._queue.get()
+            try:
+                slot = self.registry.current()
+                start = time.perf_counter()
+                answer = self.score(slot, data)
+                shadow_ms = (time.perf_counter() - start) * 1000
+            except Exception as e:
+                self.errors += 1
+                self.registry.last_error = str(e)
+                continue
+            self.compared += 1
+            self.agreed += answer == primary
+            self.primary_ms += primary_ms
+            self.shadow_ms += shadow_ms
+
+    def stats(self):
+        compared = self.compared
+        return {
+            "rate": self.rate,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "compared": compared,
+            "agreed": self.agreed,
+            "errors": self.errors,
+            "agreement_rate": round(self.agreed / compared, 4) if compared else None,
+            "primary_ms_mean": round(self.primary_ms / compared, 3) if compared else None,
+            "shadow_ms_mean": round(self.shadow_ms / compared, 3) if compared else None,
+            "candidate": self.registry.stats()
+        }
@@ -6,11 +6,26 @@ This script loads the trained model and encoders, makes predictions
 
 import sys
 import json
+import time
 import pickle
-import numpy as np
+import argparse
 import os
+import threading
+import weakref
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
+import model_artifacts
+import prediction_grid
+from instrumentation import metrics, stage
+from model_registry import ModelRegistry, ShadowScorer
+from predictor_cli import UNSUPPORTED, UnsupportedInput, error_result, main as run_predictor, parse_request, parse_top_k, read_rows
+from vocab import FeatureCodes
+
+# numpy (and sklearn, via unpickling) are imported on first use rather than at
+# start-up, so worker processes come up fast and pay that cost only when needed
+
 # Get the parent directory to access the .pkl files
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -19,110 +34,517 @@ MODEL_PATH = BASE_DIR / 'beverage_model.pkl'
 FEATURE_ENCODER_PATH = BASE_DIR / 'feature_encoder.pkl'
 TARGET_ENCODER_PATH = BASE_DIR / 'target_encoder.pkl'
 
+# Compact, memory-mappable copies of the above (see model_artifacts.py / diagnose.py convert)
+ARTIFACT_DIR = BASE_DIR / 'model_artifacts'
+
+# Rows scored per model.predict call in batch mode
+BATCH_CHUNK_SIZE = 10000
+
+# The model and encoders are loaded on first use and reloaded in the
+# background when the pickles change (MODEL_WATCH_INTERVAL seconds between
+# checks, 0 = never); see model_registry.py
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+
+# MODEL_SHADOW_DIR holds a candidate model's pickles: MODEL_SHADOW_RATE of the
+# requests are also scored on it, off the request path, to compare answers
+MODEL_SHADOW_DIR = os.environ.get('MODEL_SHADOW_DIR', '')
+MODEL_SHADOW_RATE = float(os.environ.get('MODEL_SHADOW_RATE', 0.1))
+
+# feature_encoder -> (target_encoder, FeatureCodes), for the versions still in use;
+# warm_model fills it, so the serving path uses the codes built for its slot
+_feature_codes = weakref.WeakKeyDictionary()
+
+# PREDICTION_GRID=auto serves whole-degree / whole-percent requests from the
+# precomputed grid (predict.py --grid build) and rebuilds it in the background
+# when the model pickle changes; off always predicts live
+PREDICTION_GRID = os.environ.get('PREDICTION_GRID', 'auto')
+
+# model -> PredictionGrid or None, for the versions still in use
+_grids = weakref.WeakKeyDictionary()
+_grids_lock = threading.Lock()
+
+# How the last load went: source ('artifacts' or 'pickle') and timings in ms
+load_timings = {}
+
+
+def _load_pickle(path):
+    """Unpickle a file, falling back to joblib for files written with joblib.dump"""
+    # Try different encoding methods for compatibility
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f, encoding='latin1')
+    except FileNotFoundError:
+        raise
+    except Exception as pickle_error:
+        try:
+            import joblib
+        except ImportError:
+            raise pickle_error
+        return joblib.load(path)
+
+
+def model_sources(base_dir=None):
+    """Pickle files the compact artifacts are built from (in base_dir, if given)"""
+    if base_dir is not None:
+        base_dir = Path(base_dir)
+        return {name: str(base_dir / path.name) for name, path in (
+            ('model', MODEL_PATH), ('feature_encoder', FEATURE_ENCODER_PATH), ('target_encoder', TARGET_ENCODER_PATH)
+        )}
+    return {
+        'model': str(MODEL_PATH),
+        'feature_encoder': str(FEATURE_ENCODER_PATH),
+        'target_encoder': str(TARGET_ENCODER_PATH),
+    }
+
+
+def load_pickled_model_and_encoders(sources=None):
+    """Load the trained model and encoders from their pickle files"""
+    sources = sources or model_sources()
+    model = _load_pickle(sources['model'])
+    feature_encoder = _load_pickle(sources['feature_encoder'])
+    target_encoder = _load_pickle(sources['target_encoder'])
+    return model, feature_encoder, target_encoder
+
 
 def load_model_and_encoders():
-    """Load the trained model and encoders"""
+    """
+    Load the trained model and encoders
+    Uses the memory-mapped artifacts when they are up to date with the
+    pickles, and unpickles otherwise
+    """
     try:
-        # Try different encoding methods for compatibility
-        with open(MODEL_PATH, 'rb') as f:
-            model = pickle.load(f, encoding='latin1')
-        
-        with open(FEATURE_ENCODER_PATH, 'rb') as f:
-            feature_encoder = pickle.load(f, encoding='latin1')
+        start = time.perf_counter()
+        import numpy  # noqa: F401 - timed separately, it dominates cold start
+        imported = time.perf_counter()
         
-        with open(TARGET_ENCODER_PATH, 'rb') as f:
-            target_encoder = pickle.load(f, encoding='latin1')
+        manifest = model_artifacts.read_manifest(ARTIFACT_DIR)
+        if model_artifacts.is_fresh(manifest, model_sources()):
+            loaded = model_artifacts.load(ARTIFACT_DIR, manifest)
+            source = 'artifacts'
+        else:
+            loaded = load_pickled_model_and_encoders()
+            source = 'pickle'
         
-        return model, feature_encoder, target_encoder
+        done = time.perf_counter()
+        load_timings.clear()
+        load_timings.update({
+            'source': source,
+            'import_numpy_ms': round((imported - start) * 1000, 2),
+            'load_ms': round((done - imported) * 1000, 2),
+        })
+        metrics.set_gauge('import_numpy_ms', load_timings['import_numpy_ms'])
+        metrics.set_gauge('load_model_ms', load_timings['load_ms'])
+        return loaded
     except FileNotFoundError as e:
         raise Exception(f"Model files not found: {e}")
     except Exception as e:
         raise Exception(f"Error loading model: {e}")
 
 
-def encode_categorical_features(weather, mood, feature_encoder):
+def get_feature_codes(feature_encoder, target_encoder):
+    """Integer codes for an encoder pair, built once per loaded model version"""
     try:
-        # Combine weather and mood with underscore
-        combined_feature = f"{weather}_{mood}"
-        
-        # Encode the combined feature
-        encoded = feature_encoder.transform([combined_feature])
-        
-        return encoded[0]
-    except ValueError as e:
-        # Handle unknown categories
-        raise Exception(f"Unknown weather or mood combination: {combined_feature}. Error: {e}")
+        cached = _feature_codes.get(feature_encoder)
+    except TypeError:
+        return FeatureCodes(feature_encoder, target_encoder)
+    if cached is not None and cached[0] is target_encoder:
+        return cached[1]
+    codes = FeatureCodes(feature_encoder, target_encoder)
+    _feature_codes[feature_encoder] = (target_encoder, codes)
+    return codes
+
+
+def _rebuild_prediction_grid(model, feature_encoder):
+    """Build a fresh grid for the model and serve from it once published"""
+    try:
+        with stage('grid_build'):
+            grid = prediction_grid.build(model, feature_encoder, model_sources(), ARTIFACT_DIR)
     except Exception as e:
-        raise Exception(f"Error encoding features: {e}")
+        print(f"Warning: Could not rebuild prediction grid: {e}", file=sys.stderr)
+        return
+    with _grids_lock:
+        _grids[model] = grid
+
+
+def get_prediction_grid(model, feature_encoder):
+    """
+    The prediction grid for the loaded model, or None to predict live
+    A grid built from older pickles is rebuilt once, in the background: the
+    build takes seconds, so requests are predicted live until it is ready.
+    """
+    try:
+        return _grids[model]
+    except (KeyError, TypeError):
+        pass
+    
+    with _grids_lock:
+        try:
+            return _grids[model]
+        except (KeyError, TypeError):
+            pass
+        grid = None
+        if PREDICTION_GRID != 'off':
+            grid = prediction_grid.PredictionGrid.load(ARTIFACT_DIR)
+            if grid is not None and not prediction_grid.is_fresh(grid.manifest, model_sources()):
+                print("Prediction grid is older than the model, rebuilding it in the background", file=sys.stderr)
+                grid = None
+                threading.Thread(target=_rebuild_prediction_grid, args=(model, feature_encoder),
+                                 name='grid-rebuild', daemon=True).start()
+        try:
+            _grids[model] = grid
+        except TypeError:
+            pass
+    return grid
+
+
+def warm_model(slot, grid=True):
+    """
+    Exercise a freshly loaded model version before it takes traffic:
+    one prediction through encode/predict/decode and, for the served model,
+    its prediction grid (rebuilt in the background if the pickles changed)
+    """
+    import numpy as np
+    
+    slot.codes = get_feature_codes(slot.feature_encoder, slot.target_encoder)
+    features = np.array([[0, 20, 50]], dtype=np.float32)
+    slot.codes.decode(slot.model.predict(features))
+    if hasattr(slot.model, 'predict_proba'):
+        slot.model.predict_proba(features)
+    if grid:
+        get_prediction_grid(slot.model, slot.feature_encoder)
+
+
+def shadow_predict(slot, data):
+    """The candidate model's answer for one request, always predicted live"""
+    weather, mood, temperature, humidity = parse_request(data)
+    features = encode_features(weather, mood, temperature, humidity, slot.codes)
+    return str(slot.codes.decode(slot.model.predict(features))[0])
+
+
+def encode_features(weather, mood, temperature, humidity, codes):
+    """
+    One-row float32 feature matrix [encoded_weather_mood, temperature, humidity]
+    (sklearn trees work in float32, so this is the array they would convert to)
+    """
+    import numpy as np
+    
+    encoded_feature = codes.code(weather, mood)
+    if encoded_feature < 0:
+        # Handle unknown categories
+        raise UnsupportedInput(f"Unknown weather or mood combination: {weather}_{mood}")
+    return np.array([[encoded_feature, temperature, humidity]], dtype=np.float32)
 
 
 def predict_beverage(weather, mood, temperature, humidity, model, feature_encoder, target_encoder):
     try:
-        # Encode categorical features
-        encoded_feature = encode_categorical_features(weather, mood, feature_encoder)
+        codes = get_feature_codes(feature_encoder, target_encoder)
+        
+        # Whole-degree / whole-percent requests are answered from the grid
+        grid = get_prediction_grid(model, feature_encoder)
+        if grid is not None:
+            with stage('grid'):
+                encoded = grid.lookup(codes.code(weather, mood), temperature, humidity)
+            if encoded is not None:
+                return str(codes.decode([encoded])[0])
         
-        # Combine encoded feature with numeric features
-        # Format: [encoded_weather_mood, temperature, humidity]
-        input_features = np.array([[encoded_feature, temperature, humidity]])
+        # Encode categorical features and combine with numeric features
+        with stage('encode'):
+            input_features = encode_features(weather, mood, temperature, humidity, codes)
         
         # Make prediction
-        prediction_encoded = model.predict(input_features)
+        with stage('predict'):
+            prediction_encoded = model.predict(input_features)
         
         # Decode the prediction
-        predicted_beverage = target_encoder.inverse_transform(prediction_encoded)[0]
+        with stage('decode'):
+            predicted_beverage = str(codes.decode(prediction_encoded)[0])
         
         return predicted_beverage
     
+    except UnsupportedInput as e:
+        raise UnsupportedInput(f"Prediction error: {e}")
     except Exception as e:
         raise Exception(f"Prediction error: {e}")
 
 
-def main():
-    """Main function to handle prediction"""
+def top_k_from_proba(probabilities, model, codes, top_k):
+    """
+    Turn a (rows x classes) predict_proba matrix into per-row lists of
+    {"beverage", "score"}, best first (ties keep class order, like argmax)
+    """
+    import numpy as np
+    
+    order = np.argsort(-probabilities, axis=1, kind='stable')[:, :top_k]
+    scores = np.take_along_axis(probabilities, order, axis=1)
+    beverages = codes.decode(np.asarray(model.classes_)[order])
+    return [
+        [{"beverage": str(b), "score": round(float(p), 4)} for b, p in zip(row_beverages, row_scores)]
+        for row_beverages, row_scores in zip(beverages, scores)
+    ]
+
+
+def rank_beverages(weather, mood, temperature, humidity, model, feature_encoder, target_encoder, top_k):
+    """Top-k beverages with their predict_proba scores, best first"""
     try:
-        # Get input data from command line arguments
-        if len(sys.argv) < 2:
-            raise Exception("No input data provided")
-        
-        # Parse JSON input
-        input_data = json.loads(sys.argv[1])
-        
-        # Extract features
-        weather = input_data.get('weather')
-        mood = input_data.get('mood')
-        temperature = input_data.get('temperature')
-        humidity = input_data.get('humidity')
-        
-        # Validate input
-        if not all([weather, mood, temperature is not None, humidity is not None]):
-            raise Exception("Missing required fields: weather, mood, temperature, humidity")
+        codes = get_feature_codes(feature_encoder, target_encoder)
+        with stage('encode'):
+            input_features = encode_features(weather, mood, temperature, humidity, codes)
+        with stage('predict'):
+            probabilities = model.predict_proba(input_features)
+        with stage('decode'):
+            return top_k_from_proba(probabilities, model, codes, top_k)[0]
+    
+    except UnsupportedInput as e:
+        raise UnsupportedInput(f"Prediction error: {e}")
+    except Exception as e:
+        raise Exception(f"Prediction error: {e}")
+
+
+def _predict_chunk(rows, start, model, feature_encoder, target_encoder, top_k=None):
+    """
+    Score one chunk of request dicts with a single encode/predict/decode pass
+    Returns one result dict per row; bad rows get an error record instead
+    """
+    import numpy as np
+    
+    results = [None] * len(rows)
+    weathers, moods, temperatures, humidities, positions = [], [], [], [], []
+    
+    # Validate rows and collect the feature columns
+    for i, row in enumerate(rows):
+        try:
+            if 'error' in row:
+                raise Exception(row['error'])
+            weather, mood, temperature, humidity = parse_request(row)
+            temperature, humidity = float(temperature), float(humidity)
+        except Exception as e:
+            results[i] = {"row": start + i, **error_result(e)}
+            continue
+        weathers.append(weather)
+        moods.append(mood)
+        temperatures.append(temperature)
+        humidities.append(humidity)
+        positions.append(i)
+    
+    if positions:
+        # Encode the whole column pair at once through the vocabulary ids
+        codes = get_feature_codes(feature_encoder, target_encoder)
+        encoded = codes.codes(weathers, moods)
+        known = encoded >= 0
         
-        # Load model and encoders
-        model, feature_encoder, target_encoder = load_model_and_encoders()
+        for j in np.flatnonzero(~known):
+            results[positions[j]] = {
+                "row": start + positions[j],
+                "error": f"Prediction error: Unknown weather or mood combination: {weathers[j]}_{moods[j]}",
+                "code": UNSUPPORTED,
+                "success": False
+            }
         
-        # Make prediction
-        predicted_beverage = predict_beverage(
+        if known.any():
+            # One float32 feature matrix, one predict call, one decode
+            input_features = np.empty((int(known.sum()), 3), dtype=np.float32)
+            input_features[:, 0] = encoded[known]
+            input_features[:, 1] = np.asarray(temperatures, dtype=np.float32)[known]
+            input_features[:, 2] = np.asarray(humidities, dtype=np.float32)[known]
+            if top_k:
+                # Ranked mode: one predict_proba call, the best class is the prediction
+                ranked = top_k_from_proba(model.predict_proba(input_features), model, codes, top_k)
+                for j, alternatives in zip(np.flatnonzero(known), ranked):
+                    results[positions[j]] = {
+                        "row": start + positions[j],
+                        "prediction": alternatives[0]["beverage"],
+                        "alternatives": alternatives,
+                        "success": True
+                    }
+            else:
+                # Rows on the grid are looked up, the rest go through one predict call
+                predicted = np.empty(len(input_features), dtype=np.asarray(model.classes_).dtype)
+                on_grid = np.zeros(len(input_features), dtype=bool)
+                grid = get_prediction_grid(model, feature_encoder)
+                if grid is not None:
+                    on_grid, looked_up = grid.lookup_many(
+                        encoded[known],
+                        input_features[:, 1].astype(np.float64),
+                        input_features[:, 2].astype(np.float64)
+                    )
+                    predicted[on_grid] = looked_up
+                if not on_grid.all():
+                    predicted[~on_grid] = model.predict(input_features[~on_grid])
+                predicted = codes.decode(predicted)
+                
+                for j, beverage in zip(np.flatnonzero(known), predicted):
+                    results[positions[j]] = {
+                        "row": start + positions[j],
+                        "prediction": str(beverage),
+                        "success": True
+                    }
+    
+    # Carry request ids through so callers can correlate results
+    for row, result in zip(rows, results):
+        if isinstance(row, dict) and 'id' in row:
+            result["id"] = row['id']
+    
+    return results
+
+
+def predict_batch(rows, model, feature_encoder, target_encoder, chunk_size=BATCH_CHUNK_SIZE, top_k=None):
+    """
+    Vectorized prediction over an iterable of request dicts
+    
+    Rows are consumed chunk by chunk, so arbitrarily large inputs stream
+    through in bounded memory. Yields one result dict per input row, in order.
+    Rows that fail get their own error record and do not abort the batch.
+    With top_k, each result also carries its ranked "alternatives".
+    """
+    rows = iter(rows)
+    start = 0
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        with stage('batch_chunk'):
+            results = _predict_chunk(chunk, start, model, feature_encoder, target_encoder, top_k)
+        metrics.inc('batch_rows_total', len(chunk))
+        yield from results
+        start += len(chunk)
+
+
+def run_batch(argv):
+    """Batch CLI mode: score a JSONL or CSV file and write JSONL results"""
+    parser = argparse.ArgumentParser(prog='predict.py --batch', description='Score many rows at once')
+    parser.add_argument('input', help='JSONL or CSV file with weather, mood, temperature, humidity ("-" for stdin)')
+    parser.add_argument('--output', '-o', default='-', help='JSONL output file (default: stdout)')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_CHUNK_SIZE, help='Rows per model.predict call')
+    parser.add_argument('--top-k', type=int, default=None, help='Also return the K most likely beverages per row')
+    args = parser.parse_args(argv)
+    
+    model, feature_encoder, target_encoder = get_model_and_encoders()
+    
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    failed = 0
+    try:
+        for result in predict_batch(read_rows(args.input), model, feature_encoder,
+                                    target_encoder, args.chunk_size, args.top_k):
+            failed += not result['success']
+            out.write(json.dumps(result) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    if failed:
+        print(f"Warning: {failed} rows failed", file=sys.stderr)
+
+
+def run_grid(argv):
+    """Grid mode: precompute the prediction grid, or check it against live inference"""
+    parser = argparse.ArgumentParser(prog='predict.py --grid', description='Precompute or check the prediction grid')
+    parser.add_argument('command', choices=['build', 'check'])
+    parser.add_argument('--samples', type=int, default=prediction_grid.CHECK_SAMPLES,
+                        help='Grid points to re-predict live')
+    args = parser.parse_args(argv)
+    
+    model, feature_encoder, target_encoder = get_model_and_encoders()
+    
+    start = time.perf_counter()
+    if args.command == 'build':
+        grid = prediction_grid.build(model, feature_encoder, model_sources(), ARTIFACT_DIR, samples=args.samples)
+        mismatches = []
+    else:
+        grid = prediction_grid.PredictionGrid.load(ARTIFACT_DIR)
+        if grid is None:
+            raise Exception(f"No prediction grid in {ARTIFACT_DIR}; run predict.py --grid build")
+        mismatches = prediction_grid.check(grid, model, args.samples)
+    
+    fresh = prediction_grid.is_fresh(grid.manifest, model_sources())
+    print(json.dumps({
+        "file": str(ARTIFACT_DIR / grid.manifest['file']),
+        "shape": list(grid.values.shape),
+        "fresh": fresh,
+        "checked": args.samples,
+        "mismatches": mismatches,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+    }, indent=2))
+    if mismatches or not fresh:
+        sys.exit(1)
+
+
+_registry = ModelRegistry('model', model_sources(), load_model_and_encoders,
+                          warm=warm_model, watch_interval=MODEL_WATCH_INTERVAL)
+
+_shadow = None
+if MODEL_SHADOW_DIR:
+    _shadow_sources = model_sources(MODEL_SHADOW_DIR)
+    _shadow = ShadowScorer(
+        ModelRegistry('shadow model', _shadow_sources, partial(load_pickled_model_and_encoders, _shadow_sources),
+                      warm=partial(warm_model, grid=False), watch_interval=MODEL_WATCH_INTERVAL),
+        shadow_predict,
+        rate=MODEL_SHADOW_RATE
+    )
+
+
+def get_model_and_encoders():
+    """
+    The active model version's (model, feature_encoder, target_encoder)
+    Take it once per request: a version swapped in meanwhile is used from the next call.
+    """
+    return _registry.current().loaded
+
+
+def handle_request(input_data):
+    """Predict a beverage for one request dict and build the JSON result"""
+    weather, mood, temperature, humidity = parse_request(input_data)
+    top_k = parse_top_k(input_data)
+    
+    # Load model and encoders (cached between worker requests)
+    model, feature_encoder, target_encoder = get_model_and_encoders()
+    
+    if top_k:
+        # Ranked mode: one predict_proba call gives the prediction and its alternatives
+        start = time.perf_counter()
+        alternatives = rank_beverages(
             weather, mood, temperature, humidity,
-            model, feature_encoder, target_encoder
+            model, feature_encoder, target_encoder, top_k
         )
-        
-        # Return result as JSON
-        result = {
-            "prediction": predicted_beverage,
+        if _shadow is not None:
+            _shadow.submit(input_data, alternatives[0]["beverage"], (time.perf_counter() - start) * 1000)
+        return {
+            "prediction": alternatives[0]["beverage"],
+            "alternatives": alternatives,
             "success": True
         }
-        
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # Return error as JSON
-        error_result = {
-            "error": str(e),
-            "success": False
-        }
-        print(json.dumps(error_result))
-        sys.exit(1)
+    
+    # Make prediction
+    start = time.perf_counter()
+    predicted_beverage = predict_beverage(
+        weather, mood, temperature, humidity,
+        model, feature_encoder, target_encoder
+    )
+    if _shadow is not None:
+        _shadow.submit(input_data, predicted_beverage, (time.perf_counter() - start) * 1000)
+    
+    # Return result as JSON
+    return {
+        "prediction": predicted_beverage,
+        "success": True
+    }
+
+
+def get_stats():
+    """Counters reported to the worker pool's "stats" message"""
+    stats = {"model": _registry.stats()}
+    if _shadow is not None:
+        stats["shadow"] = _shadow.stats()
+    return stats
+
+
+def main():
+    """Main function to handle prediction"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        run_batch(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == '--grid':
+        run_grid(sys.argv[2:])
+    else:
+        run_predictor(handle_request, get_stats)
 
 
 if __name__ == "__main__":
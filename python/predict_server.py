@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Micro-batching prediction server
+Accepts newline-delimited JSON requests (the same messages as --worker mode)
+on a Unix socket or TCP port, collects concurrent requests into micro-batches
+and scores each batch with one vectorized pass through predict.py's batch pipeline
+
+Usage:
+  python predict_server.py --socket /tmp/beverage-predictor.sock
+  python predict_server.py --port 8765 [--max-batch-size 64] [--max-wait-ms 2]
+
+A batch is flushed as soon as it holds --max-batch-size requests or
+--max-wait-ms after its first request arrived, whichever comes first.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from predict import get_model_and_encoders, predict_batch
+from predictor_cli import RequestError, error_result, parse_top_k
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class MicroBatcher:
+    """
+    Queue of pending requests drained into batches by a single loop
+
+    Scoring runs on one background thread, so the event loop keeps
+    accepting requests (which form the next batch) while a batch is scored.
+    """
+
+    def __init__(self, score_rows, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.score_rows = score_rows
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.requests = 0
+        self.largest_batch = 0
+
+    async def submit(self, row, top_k=None):
+        """Queue one request dict and wait for its result dict"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, top_k, future))
+        return await future
+
+    async def _collect(self):
+        """Wait for one request, then gather more until the batch is full or the deadline passes"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch):
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+
+        # Requests asking for a different number of alternatives are scored separately
+        groups = {}
+        for item in batch:
+            groups.setdefault(item[1], []).append(item)
+
+        for top_k, items in groups.items():
+            rows = [row for row, _, _ in items]
+            try:
+                results = await loop.run_in_executor(self.executor, self.score_rows, rows, top_k)
+            except Exception as e:
+                results = [{"error": str(e), "success": False}] * len(items)
+            for (_, _, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def run(self):
+        while True:
+            await self._flush(await self._collect())
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'requests': self.requests,
+            'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0,
+            'largest_batch': self.largest_batch,
+            'queued': self.queue.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+
+def make_scorer():
+    """Score a list of request dicts with one vectorized predict.py pass"""
+    get_model_and_encoders()
+
+    def score_rows(rows, top_k=None):
+        # The whole batch is scored on the model version active when it starts
+        model, feature_encoder, target_encoder = get_model_and_encoders()
+        results = []
+        for result in predict_batch(rows, model, feature_encoder, target_encoder,
+                                    chunk_size=len(rows), top_k=top_k):
+            result.pop('row', None)
+            results.append(result)
+        return results
+
+    return score_rows
+
+
+async def answer(message, batcher, state):
+    """Build the response for one protocol message"""
+    request_id = message.get('id')
+    message_type = message.get('type', 'predict')
+
+    if message_type == 'ping':
+        return {"id": request_id, "type": "pong", "success": True, "served": state['served']}
+    if message_type == 'stats':
+        return {"id": request_id, "type": "stats", "success": True,
+                "served": state['served'], "stats": {"batching": batcher.stats()}}
+
+    data = message.get('data', {})
+    try:
+        if not isinstance(data, dict):
+            raise RequestError("data must be a JSON object")
+        top_k = parse_top_k(data)
+        result = await batcher.submit(data, top_k)
+    except Exception as e:
+        result = error_result(e)
+
+    state['served'] += 1
+    result = dict(result, id=request_id)
+    return result
+
+
+async def handle_connection(reader, writer, batcher, state):
+    """
+    Serve one client connection. Clients may pipeline many requests;
+    responses are written as they complete and matched by id.
+    """
+    pending = set()
+
+    async def respond(message):
+        response = await answer(message, batcher, state)
+        writer.write((json.dumps(response) + '\n').encode())
+        await writer.drain()
+
+    try:
+        async for line in reader:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError("message must be a JSON object")
+            except ValueError as e:
+                writer.write((json.dumps({"id": None, "error": f"Invalid JSON message: {e}",
+                                          "success": False}) + '\n').encode())
+                continue
+            if message.get('type') == 'shutdown':
+                break
+            task = asyncio.ensure_future(respond(message))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args):
+    batcher = MicroBatcher(make_scorer(), args.max_batch_size, args.max_wait_ms)
+    state = {'served': 0}
+    batch_loop = asyncio.ensure_future(batcher.run())
+
+    def on_connect(reader, writer):
+        return handle_connection(reader, writer, batcher, state)
+
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = await asyncio.start_unix_server(on_connect, path=args.socket)
+        address = args.socket
+    else:
+        server = await asyncio.start_server(on_connect, host=args.host, port=args.port)
+        address = f"{args.host}:{server.sockets[0].getsockname()[1]}"
+
+    # Readiness line for supervisors and benchmarks
+    print(json.dumps({"listening": address, "max_batch_size": args.max_batch_size,
+                      "max_wait_ms": args.max_wait_ms}), flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        batch_loop.cancel()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-batching beverage prediction server')
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument('--socket', help='Unix socket path to listen on')
+    address.add_argument('--port', type=int, default=8765, help='TCP port to listen on (0 = any free port)')
+    parser.add_argument('--host', default='127.0.0.1', help='TCP host (default: 127.0.0.1)')
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help='Flush a batch once it holds this many requests')
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help='Flush a batch this long after its first request arrived')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(json.dumps({"error": str(e), "success": False}), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
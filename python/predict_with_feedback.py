@@ -5,249 +5,328 @@ This predictor uses feedback data to avoid disliked beverages and prefer liked o
 """
 
 import sys
-import json
-import random
 import os
 
-# Path to feedback file
-FEEDBACK_FILE = os.path.join(os.path.dirname(__file__), '../data/feedback.json')
+from feedback_index import FeedbackIndex
+from feedback_log import FeedbackLogReader
+from feedback_snapshot import SNAPSHOT_FILE, FeedbackSnapshot, MappedFeedbackIndex, file_stamp
+from instrumentation import stage
+from prediction_cache import PredictionCache
+from preference_model import CHECKPOINT_FILE, PreferenceLearner
+from predictor_cli import main as run_predictor, parse_request, parse_top_k
+from rules import FEEDBACK_TABLE, draw, lookup, make_candidates, rank
+from user_profiles import PROFILES_FILE, UserProfiles, user_key
+from vocab import BEVERAGES
+
+# Feedback log reader and the index built from it, kept between worker requests
+_feedback_reader = FeedbackLogReader()
+_feedback_index = FeedbackIndex()
+_feedback_frozen = False
+
+# Memory-mapped feedback snapshot (feedback_snapshot.py build) shared by all
+# workers; when the file exists only feedback newer than it is held in memory
+FEEDBACK_SNAPSHOT = os.environ.get('FEEDBACK_SNAPSHOT', SNAPSHOT_FILE)
+_snapshot_stamp = None
+
+# Candidate sets per (weather, mood, temperature);
+# PREDICTION_CACHE_SIZE=0 disables caching
+_prediction_cache = PredictionCache(
+    capacity=int(os.environ.get('PREDICTION_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+)
+
+# FEEDBACK_LEARNER=thompson picks candidates by Thompson sampling against the
+# online preference model (preference_model.py) instead of the 3x-weight rules
+FEEDBACK_LEARNER = os.environ.get('FEEDBACK_LEARNER', 'index')
+PREFERENCE_CHECKPOINT = os.environ.get('PREFERENCE_CHECKPOINT', CHECKPOINT_FILE)
+_preference_learner = None
+
+# Per-user profiles (user_profiles.py) for requests that carry a user_id;
+# USER_PROFILES_DB= (empty) disables personalization
+USER_PROFILES_DB = os.environ.get('USER_PROFILES_DB', PROFILES_FILE)
+_user_profiles = None
 
 def load_feedback():
-    """Load feedback data from JSON file"""
+    """Load feedback data from the feedback log (raw records, excluding compacted history)"""
     try:
-        if os.path.exists(FEEDBACK_FILE):
-            with open(FEEDBACK_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('feedbacks', [])
-        return []
+        _, records = FeedbackLogReader().read_updates()
+        return records
     except Exception as e:
         print(f"Warning: Could not load feedback: {e}", file=sys.stderr)
         return []
 
+def map_feedback_snapshot():
+    """
+    Switch to a new generation of the mapped feedback snapshot, if one
+    was written since the last call, and tail the log from where it ends
+    """
+    global _feedback_index, _snapshot_stamp
+    stamp = file_stamp(FEEDBACK_SNAPSHOT) if FEEDBACK_SNAPSHOT else None
+    if stamp is None or stamp == _snapshot_stamp:
+        return
+    _snapshot_stamp = stamp
+    try:
+        snapshot = FeedbackSnapshot(FEEDBACK_SNAPSHOT)
+    except (OSError, ValueError) as e:
+        print(f"Warning: Could not map feedback snapshot: {e}", file=sys.stderr)
+        return
+    _feedback_reader.seek(snapshot.position)
+    _feedback_index = MappedFeedbackIndex(snapshot)
+    _prediction_cache.clear()
+
+def get_feedback_index():
+    """
+    Return the feedback index, loading it once and then applying only
+    the records appended to the log since the last call.
+    Cached predictions affected by the new feedback are invalidated.
+    """
+    global _feedback_index
+    if _feedback_frozen:
+        return _feedback_index
+    try:
+        map_feedback_snapshot()
+        with stage('load_feedback'):
+            snapshot, records = _feedback_reader.read_updates()
+    except Exception as e:
+        print(f"Warning: Could not load feedback: {e}", file=sys.stderr)
+        return _feedback_index
+
+    if snapshot is not None:
+        # First load, or the log was compacted: rebuild from the snapshot.
+        # A mapped snapshot no longer lines up with the log either, so this
+        # worker holds the feedback in memory until the next generation.
+        _feedback_index = FeedbackIndex()
+        _feedback_index.apply_snapshot(snapshot)
+        _prediction_cache.clear()
+    _feedback_index.extend(records)
+    for record in records:
+        if isinstance(record, dict):
+            _prediction_cache.invalidate(record.get('weather'), record.get('mood'), record.get('temperature'))
+    return _feedback_index
+
+def freeze_feedback():
+    """
+    Load the feedback log once and stop tailing it, for bulk scoring
+    where every row should see the same feedback
+    """
+    global _feedback_frozen
+    if FEEDBACK_LEARNER == 'thompson':
+        get_preference_model()
+    else:
+        get_feedback_index()
+    get_user_profiles()
+    _feedback_frozen = True
+
+def get_preference_model():
+    """
+    Return the online preference model, restored from its checkpoint once
+    and then updated with only the feedback appended since the last call
+    """
+    global _preference_learner
+    if _preference_learner is None:
+        _preference_learner = PreferenceLearner(PREFERENCE_CHECKPOINT)
+    elif _feedback_frozen:
+        return _preference_learner.model
+    with stage('load_feedback'):
+        return _preference_learner.refresh()
+
+def get_user_profiles():
+    """
+    Return the user profile store, after ingesting any new user feedback
+    (None when personalization is disabled)
+    """
+    global _user_profiles
+    if not USER_PROFILES_DB:
+        return None
+    if _user_profiles is None:
+        _user_profiles = UserProfiles(USER_PROFILES_DB, int(os.environ.get('USER_PROFILE_CACHE_SIZE', 10000)))
+    elif _feedback_frozen:
+        return _user_profiles
+    try:
+        with stage('load_profiles'):
+            _user_profiles.refresh()
+    except Exception as e:
+        print(f"Warning: Could not update user profiles: {e}", file=sys.stderr)
+    return _user_profiles
+
+def get_user_scores(user_id, beverages):
+    """
+    The user's net like score for each beverage, or None without a profile.
+    Profiles are refreshed even for anonymous requests, so feedback is
+    ingested before a compaction can fold its user ids away.
+    """
+    profiles = get_user_profiles()
+    if profiles is None or user_key(user_id) is None:
+        return None
+    profile = profiles.get(user_id)
+    if not len(profile):
+        return None
+    return [profiles.score(profile, beverage) for beverage in beverages]
+
+def personalize(candidates, scores):
+    """
+    Apply one user's profile on top of the shared candidates: drop the
+    beverages they dislike on balance, triple the weight of those they like
+    """
+    if not scores or not any(scores):
+        return candidates
+    keep = [i for i, score in enumerate(scores) if score >= 0] or range(len(scores))
+    weights = [candidates.cum_weights[i] - (candidates.cum_weights[i - 1] if i else 0) for i in keep]
+    weights = [weight * 3 if scores[i] > 0 else weight for i, weight in zip(keep, weights)]
+    return make_candidates([candidates.beverages[i] for i in keep], weights, [candidates.ids[i] for i in keep])
+
 def get_feedback_preferences(weather, mood, temperature):
     """
     Analyze feedback to determine liked and disliked beverages
     for this specific weather/mood/temperature combination
     """
-    feedbacks = load_feedback()
-    
-    # Temperature range (±5 degrees)
-    temp_min = temperature - 5
-    temp_max = temperature + 5
-    
-    liked_beverages = []
-    disliked_beverages = []
-    
-    for feedback in feedbacks:
-        # Match similar conditions
-        if (feedback['weather'] == weather and 
-            feedback['mood'] == mood and 
-            temp_min <= feedback['temperature'] <= temp_max):
-            
-            beverage = feedback['recommended_beverage']
-            
-            if feedback['liked']:
-                liked_beverages.append(beverage)
-            else:
-                disliked_beverages.append(beverage)
-    
-    return {
-        'liked': list(set(liked_beverages)),  # Remove duplicates
-        'disliked': list(set(disliked_beverages)),
-        'total_feedback': len(feedbacks)
-    }
+    return get_feedback_index().preferences(weather, mood, temperature)
+
+def get_candidates(weather, mood, temperature):
+    """
+    Feedback-weighted candidates and preferences for a request,
+    served from the prediction cache when possible
+    """
+    # Pick up new feedback first so it can invalidate stale cache entries
+    index = get_feedback_index()
+    
+    key = PredictionCache.make_key(weather, mood, temperature)
+    cached = _prediction_cache.get(key)
+    if cached is None:
+        with stage('rules'):
+            cached = build_candidates(index, weather, mood, temperature)
+        _prediction_cache.put(key, cached)
+    candidates, preferences = cached
+    
+    # The overall feedback count changes with feedback for other keys too
+    return candidates, dict(preferences, total_feedback=index.total)
+
+def recommend(weather, mood, temperature, user_id=None, top_k=None):
+    """
+    Feedback-aware prediction for one request, personalized when it carries
+    a user_id: (beverage, preferences, the user's scores for the candidates
+    or None, top_k ranked alternatives or None)
+    """
+    if FEEDBACK_LEARNER == 'thompson':
+        # Thompson sample the rule candidates against the online preference model
+        model = get_preference_model()
+        with stage('rules'):
+            options = lookup(FEEDBACK_TABLE, weather, mood, temperature).beverages
+        scores = get_user_scores(user_id, options)
+        if scores:
+            options = [beverage for beverage, score in zip(options, scores) if score >= 0] or options
+        alternatives = model.rank(weather, mood, temperature, options, top_k) if top_k else None
+        return (model.sample(weather, mood, temperature, options), model.preferences(weather, mood, temperature),
+                scores, alternatives)
+    
+    candidates, preferences = get_candidates(weather, mood, temperature)
+    scores = get_user_scores(user_id, candidates.beverages)
+    candidates = personalize(candidates, scores)
+    
+    # Same candidate set as the draw, ranked instead of sampled
+    alternatives = rank(candidates, top_k) if top_k else None
+    
+    # Select one beverage with a single weighted draw (on every call, cached or not)
+    return draw(candidates), preferences, scores, alternatives
 
-def predict_beverage_with_feedback(weather, mood, temperature, humidity):
-    """
-    Predict beverage using rules + feedback learning
-    """
-    # Get feedback preferences
-    preferences = get_feedback_preferences(weather, mood, temperature)
-    
-    # Base beverage options (same as before)
-    beverages = {
-        # Hot weather combinations
-        ('Hot', 'Tired'): ['Iced Coffee', 'Cold Brew', 'Iced Latte'],
-        ('Hot', 'Energetic'): ['Energy Drink', 'Iced Green Tea', 'Cold Coffee'],
-        ('Hot', 'Happy'): ['Fresh Juice', 'Fruit Smoothie', 'Iced Tea'],
-        ('Hot', 'Stressed'): ['Iced Tea', 'Mint Lemonade', 'Cucumber Water'],
-        ('Hot', 'Sad'): ['Mango Smoothie', 'Strawberry Shake', 'Iced Chocolate'],
-        ('Hot', 'Relaxed'): ['Iced Herbal Tea', 'Coconut Water', 'Watermelon Juice'],
-        ('Hot', 'Focused'): ['Cold Brew Coffee', 'Iced Green Tea', 'Iced Matcha'],
-        ('Hot', 'Excited'): ['Energy Drink', 'Orange Juice', 'Tropical Smoothie'],
-        
-        # Sunny weather combinations
-        ('Sunny', 'Happy'): ['Lemonade', 'Orange Juice', 'Pineapple Juice'],
-        ('Sunny', 'Tired'): ['Iced Coffee', 'Cold Brew', 'Iced Americano'],
-        ('Sunny', 'Energetic'): ['Smoothie', 'Fresh Juice', 'Iced Green Tea'],
-        ('Sunny', 'Stressed'): ['Iced Tea', 'Lemonade', 'Herbal Iced Tea'],
-        ('Sunny', 'Sad'): ['Chocolate Smoothie', 'Strawberry Milkshake', 'Iced Mocha'],
-        ('Sunny', 'Relaxed'): ['Coconut Water', 'Iced Herbal Tea', 'Fresh Lemonade'],
-        ('Sunny', 'Focused'): ['Iced Americano', 'Green Tea', 'Iced Matcha'],
-        ('Sunny', 'Excited'): ['Tropical Smoothie', 'Mango Lassi', 'Berry Smoothie'],
-        
-        # Cold weather combinations
-        ('Cold', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Espresso'],
-        ('Cold', 'Happy'): ['Hot Chocolate', 'Caramel Latte', 'Mocha'],
-        ('Cold', 'Stressed'): ['Chamomile Tea', 'Green Tea', 'Lavender Tea'],
-        ('Cold', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Caramel Macchiato'],
-        ('Cold', 'Energetic'): ['Hot Coffee', 'Black Tea', 'Chai Latte'],
-        ('Cold', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'White Tea'],
-        ('Cold', 'Focused'): ['Black Coffee', 'Green Tea', 'Matcha Latte'],
-        ('Cold', 'Excited'): ['Spiced Chai', 'Hot Coffee', 'Cinnamon Latte'],
-        
-        # Rainy weather combinations
-        ('Rainy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Ginger Tea'],
-        ('Rainy', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Honey Tea'],
-        ('Rainy', 'Happy'): ['Chai', 'Masala Chai', 'Spiced Tea'],
-        ('Rainy', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Latte'],
-        ('Rainy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Green Tea'],
-        ('Rainy', 'Energetic'): ['Black Coffee', 'Chai Latte', 'Black Tea'],
-        ('Rainy', 'Focused'): ['Green Tea', 'Black Coffee', 'Oolong Tea'],
-        ('Rainy', 'Excited'): ['Masala Chai', 'Hot Chocolate', 'Spiced Coffee'],
-        
-        # Cloudy weather combinations
-        ('Cloudy', 'Focused'): ['Green Tea', 'Black Coffee', 'Matcha'],
-        ('Cloudy', 'Happy'): ['Cappuccino', 'Latte', 'Hot Chocolate'],
-        ('Cloudy', 'Tired'): ['Coffee', 'Espresso', 'Black Tea'],
-        ('Cloudy', 'Stressed'): ['Green Tea', 'Herbal Tea', 'White Tea'],
-        ('Cloudy', 'Sad'): ['Hot Chocolate', 'Mocha', 'Caramel Latte'],
-        ('Cloudy', 'Energetic'): ['Black Coffee', 'Americano', 'Cold Brew'],
-        ('Cloudy', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'Chamomile Tea'],
-        ('Cloudy', 'Excited'): ['Cappuccino', 'Espresso', 'Iced Coffee'],
-        
-        # Snowy weather combinations
-        ('Snowy', 'Happy'): ['Hot Chocolate', 'Peppermint Mocha', 'Eggnog'],
-        ('Snowy', 'Tired'): ['Hot Coffee', 'Espresso', 'Strong Black Tea'],
-        ('Snowy', 'Stressed'): ['Chamomile Tea', 'Warm Milk', 'Lavender Tea'],
-        ('Snowy', 'Sad'): ['Hot Chocolate', 'Warm Milk with Honey', 'Vanilla Latte'],
-        ('Snowy', 'Energetic'): ['Black Coffee', 'Espresso', 'Americano'],
-        ('Snowy', 'Relaxed'): ['Herbal Tea', 'Cinnamon Tea', 'Ginger Tea'],
-        ('Snowy', 'Focused'): ['Black Coffee', 'Green Tea', 'Espresso'],
-        ('Snowy', 'Excited'): ['Hot Chocolate', 'Peppermint Latte', 'Spiced Coffee'],
-        
-        # Stormy weather combinations
-        ('Stormy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Warm Milk'],
-        ('Stormy', 'Sad'): ['Hot Chocolate', 'Comfort Tea', 'Honey Tea'],
-        ('Stormy', 'Tired'): ['Strong Coffee', 'Black Tea', 'Espresso'],
-        ('Stormy', 'Happy'): ['Chai', 'Hot Chocolate', 'Spiced Tea'],
-        ('Stormy', 'Energetic'): ['Black Coffee', 'Americano', 'Strong Tea'],
-        ('Stormy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Green Tea'],
-        ('Stormy', 'Focused'): ['Black Coffee', 'Green Tea', 'Oolong Tea'],
-        ('Stormy', 'Excited'): ['Espresso', 'Strong Coffee', 'Chai Latte'],
-        
-        # Windy weather combinations
-        ('Windy', 'Energetic'): ['Cold Brew', 'Iced Coffee', 'Energy Drink'],
-        ('Windy', 'Happy'): ['Fresh Juice', 'Smoothie', 'Iced Tea'],
-        ('Windy', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Latte'],
-        ('Windy', 'Stressed'): ['Green Tea', 'Herbal Tea', 'Chamomile Tea'],
-        ('Windy', 'Sad'): ['Hot Chocolate', 'Warm Beverage', 'Comfort Drink'],
-        ('Windy', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'Iced Tea'],
-        ('Windy', 'Focused'): ['Black Coffee', 'Green Tea', 'Americano'],
-        ('Windy', 'Excited'): ['Energy Drink', 'Cold Brew', 'Iced Coffee'],
-        
-        # Foggy weather combinations
-        ('Foggy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Green Tea'],
-        ('Foggy', 'Tired'): ['Hot Coffee', 'Black Tea', 'Espresso'],
-        ('Foggy', 'Happy'): ['Cappuccino', 'Latte', 'Hot Chocolate'],
-        ('Foggy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Green Tea'],
-        ('Foggy', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Honey Tea'],
-        ('Foggy', 'Energetic'): ['Black Coffee', 'Americano', 'Strong Tea'],
-        ('Foggy', 'Focused'): ['Green Tea', 'Black Coffee', 'Matcha'],
-        ('Foggy', 'Excited'): ['Espresso', 'Cappuccino', 'Strong Coffee'],
+def predict_beverage_with_feedback(weather, mood, temperature, humidity, user_id=None):
+    """
+    Predict beverage using rules + feedback learning (and the user's profile)
+    """
+    selected_beverage, preferences, _, _ = recommend(weather, mood, temperature, user_id)
+    return selected_beverage, preferences
+
+def build_candidates(index, weather, mood, temperature):
+    """
+    Weighted candidate set for one weather/mood/temperature after applying the
+    feedback in index, returned together with the preferences it was built from
+    """
+    # Get feedback preferences as beverage id sets
+    liked, disliked = index.preference_ids(weather, mood, temperature)
+    
+    # Get base options from the precompiled rule table
+    options = lookup(FEEDBACK_TABLE, weather, mood, temperature)
+    
+    preferences = {
+        'liked': BEVERAGES.decode(liked),
+        'disliked': BEVERAGES.decode(disliked),
+        'total_feedback': index.total
     }
     
-    # Get base options
-    key = (weather, mood)
-    if key in beverages:
-        options = beverages[key].copy()
-    else:
-        # Temperature-based fallback
-        if temperature > 35:
-            options = ['Iced Coffee', 'Cold Brew', 'Lemonade', 'Iced Tea']
-        elif temperature > 25:
-            options = ['Iced Coffee', 'Lemonade', 'Fresh Juice']
-        elif temperature < 10:
-            options = ['Hot Coffee', 'Hot Tea', 'Hot Chocolate']
-        elif temperature < 20:
-            options = ['Hot Coffee', 'Cappuccino', 'Green Tea']
-        else:
-            options = ['Green Tea', 'Coffee', 'Fresh Juice']
+    # No feedback on any of these beverages: the precompiled entry is the answer
+    if disliked.isdisjoint(options.ids) and liked.isdisjoint(options.ids):
+        return options, preferences
     
     # LEARNING PHASE: Apply feedback filtering
     
     # Step 1: Remove disliked beverages
-    filtered_options = [b for b in options if b not in preferences['disliked']]
+    keep = [i for i, beverage_id in enumerate(options.ids) if beverage_id not in disliked]
     
     # Step 2: If we filtered everything, keep original options (avoid empty list)
-    if not filtered_options:
-        filtered_options = options
-    
-    # Step 3: Prefer liked beverages (increase their weight)
-    weighted_options = []
-    for beverage in filtered_options:
-        if beverage in preferences['liked']:
-            # Add liked beverages 3 times (3x probability)
-            weighted_options.extend([beverage] * 3)
-        else:
-            # Add normal beverages once
-            weighted_options.append(beverage)
-    
-    # Step 4: Select random beverage from weighted options
-    selected_beverage = random.choice(weighted_options)
+    if not keep:
+        keep = range(len(options.ids))
     
-    return selected_beverage, preferences
+    # Step 3: Prefer liked beverages (3x weight)
+    ids = [options.ids[i] for i in keep]
+    weights = [3 if beverage_id in liked else 1 for beverage_id in ids]
+    
+    return make_candidates([options.beverages[i] for i in keep], weights, ids), preferences
 
 
-def main():
-    """Main function to handle prediction"""
-    try:
-        # Get input data from command line arguments
-        if len(sys.argv) < 2:
-            raise Exception("No input data provided")
-        
-        # Parse JSON input
-        input_data = json.loads(sys.argv[1])
-        
-        # Extract features
-        weather = input_data.get('weather')
-        mood = input_data.get('mood')
-        temperature = input_data.get('temperature')
-        humidity = input_data.get('humidity')
-        
-        # Validate input
-        if not all([weather, mood, temperature is not None, humidity is not None]):
-            raise Exception("Missing required fields: weather, mood, temperature, humidity")
-        
-        # Make smart prediction with feedback learning
-        predicted_beverage, preferences = predict_beverage_with_feedback(
-            weather, mood, temperature, humidity
-        )
-        
-        # Return result as JSON
-        result = {
-            "prediction": predicted_beverage,
-            "success": True,
-            "learning_applied": True,
-            "feedback_stats": {
-                "total_feedbacks": preferences['total_feedback'],
-                "liked_for_this_combo": len(preferences['liked']),
-                "disliked_for_this_combo": len(preferences['disliked']),
-                "filtered_out": preferences['disliked']
-            }
+def handle_request(input_data):
+    """Make a feedback-aware prediction for one request dict and build the JSON result"""
+    weather, mood, temperature, humidity = parse_request(input_data)
+    top_k = parse_top_k(input_data)
+    
+    user_id = input_data.get('user_id')
+    
+    # Make smart prediction with feedback learning
+    predicted_beverage, preferences, scores, alternatives = recommend(weather, mood, temperature, user_id, top_k)
+    
+    # Return result as JSON
+    result = {
+        "prediction": predicted_beverage,
+        "success": True,
+        "learning_applied": True,
+        "feedback_stats": {
+            "total_feedbacks": preferences['total_feedback'],
+            "liked_for_this_combo": len(preferences['liked']),
+            "disliked_for_this_combo": len(preferences['disliked']),
+            "filtered_out": preferences['disliked']
         }
-        
-        print(json.dumps(result))
-        sys.exit(0)
-        
-    except Exception as e:
-        # Return error as JSON
-        error_result = {
-            "error": str(e),
-            "success": False
+    }
+    if user_key(user_id) is not None:
+        result["user_profile"] = {
+            "liked_for_this_combo": sum(1 for score in scores or () if score > 0),
+            "disliked_for_this_combo": sum(1 for score in scores or () if score < 0)
+        }
+    if alternatives is not None:
+        result["alternatives"] = alternatives
+    return result
+
+
+def get_stats():
+    """Counters reported to the worker pool's "stats" message"""
+    stats = {"prediction_cache": _prediction_cache.stats()}
+    if _preference_learner is not None:
+        stats["preference_model"] = {
+            "total_feedback": _preference_learner.model.total,
+            "unsaved_updates": _preference_learner.unsaved
+        }
+    if _user_profiles is not None:
+        stats["user_profiles"] = _user_profiles.stats()
+    if isinstance(_feedback_index, MappedFeedbackIndex):
+        stats["feedback_snapshot"] = {
+            "generation": _feedback_index.snapshot.generation,
+            "total_feedback": _feedback_index.snapshot.total,
+            "feedback_since": _feedback_index.total - _feedback_index.snapshot.total
         }
-        print(json.dumps(error_result))
-        sys.exit(1)
+    return stats
+
+
+def main():
+    """Main function to handle prediction"""
+    run_predictor(handle_request, get_stats)
 
 
 if __name__ == "__main__":
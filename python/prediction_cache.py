@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Prediction cache for the feedback-learning predictor
+Caches the weighted candidate set per (weather, mood, temperature) with
+LRU capacity and TTL eviction. The caller still makes
+a random draw from the cached candidates, so repeated queries keep their variety.
+"""
+
+import time
+from collections import OrderedDict
+
+from feedback_index import TEMPERATURE_WINDOW
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache keyed on (weather, mood, temperature)
+
+    The temperature is kept exact: both the rule band and the ±5°C feedback
+    window depend on it, so any rounding would let a cached entry differ
+    from what the request builds without the cache (35.3 is very_hot, 35 is
+    warm). Repeated weather service readings still share an entry, and
+    24.0 and 24 are the same key.
+
+    Entries are also indexed by (weather, mood) so that new feedback can
+    invalidate exactly the keys whose ±5°C preference window it falls into.
+    """
+
+    def __init__(self, capacity=4096, ttl=300.0, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._by_condition = {}        # (weather, mood) -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(weather, mood, temperature):
+        return (weather, mood, temperature)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        keys = self._by_condition.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_condition[key[:2]]
+
+    def get(self, key):
+        """Return the cached value or None; expired entries count as misses"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= self.clock():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        if self.capacity <= 0:
+            return
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (self.clock() + self.ttl, value)
+        self._by_condition.setdefault(key[:2], set()).add(key)
+        while len(self._entries) > self.capacity:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, weather, mood, temperature):
+        """Drop entries whose preference window covers feedback at this temperature"""
+        keys = self._by_condition.get((weather, mood))
+        if not keys or not isinstance(temperature, (int, float)):
+            return
+        # Entries are built at their key's temperature, so the window is exact
+        for key in [k for k in keys
+                    if isinstance(k[2], (int, float)) and abs(k[2] - temperature) <= TEMPERATURE_WINDOW]:
+            self._remove(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self._by_condition.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
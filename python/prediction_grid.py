@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Precomputed prediction grid for the trained model
+The model's inputs are a Weather_Mood class plus temperature and humidity,
+and in practice requests carry whole degrees and whole humidity percentages.
+The grid evaluates the model once over every encoder class x integer
+temperature x integer humidity and stores the predicted class codes as a
+dense array, so serving such a request is one array index.
+
+Requests outside the grid (fractional values, out-of-range temperatures) are
+still predicted live, so grid answers are always the model's own answers.
+
+Layout of model_artifacts/:
+  prediction_grid.json         ranges, source stamps and the grid file name
+  prediction_grid-<id>.npy     class codes, shape (classes, temperatures, humidities)
+
+The manifest is written last and atomically and names its own array file,
+so workers never see a grid paired with the wrong manifest.
+"""
+
+import os
+import json
+import glob
+import hashlib
+
+from model_artifacts import file_sha256, file_stamp
+
+GRID_VERSION = 1
+MANIFEST_NAME = 'prediction_grid.json'
+
+# Quantized domain: whole °C and whole humidity percentages, inclusive
+TEMPERATURE_RANGE = (-30, 55)
+HUMIDITY_RANGE = (0, 100)
+
+# Grid points re-predicted live after a build to check the grid
+CHECK_SAMPLES = 500
+
+
+def _index(value, low, size):
+    """Grid index for an integer-valued number within [low, low + size), else -1"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return -1
+    if isinstance(value, float):
+        if not value.is_integer():
+            return -1
+        value = int(value)
+    value -= low
+    return value if 0 <= value < size else -1
+
+
+class PredictionGrid:
+    """Dense (class code, temperature, humidity) -> predicted class code lookup"""
+
+    def __init__(self, values, manifest):
+        self.values = values
+        self.manifest = manifest
+        self.temperature_min = manifest['temperature_range'][0]
+        self.humidity_min = manifest['humidity_range'][0]
+        self.n_codes, self.n_temperatures, self.n_humidities = values.shape
+
+    @classmethod
+    def load(cls, artifact_dir):
+        """Memory-map the grid named by the manifest, or None when there is none"""
+        import numpy as np
+
+        manifest = read_manifest(artifact_dir)
+        if manifest is None:
+            return None
+        try:
+            values = np.load(os.path.join(artifact_dir, manifest['file']), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return cls(values, manifest)
+
+    def lookup(self, code, temperature, humidity):
+        """Predicted class code for one request, or None when it falls outside the grid"""
+        if not 0 <= code < self.n_codes:
+            return None
+        t = _index(temperature, self.temperature_min, self.n_temperatures)
+        h = _index(humidity, self.humidity_min, self.n_humidities)
+        if t < 0 or h < 0:
+            return None
+        return int(self.values[code, t, h])
+
+    def lookup_many(self, codes, temperatures, humidities):
+        """
+        Vectorized lookup over int codes and float temperature / humidity arrays
+        Returns (hit mask, class codes for the hits)
+        """
+        import numpy as np
+
+        t = temperatures - self.temperature_min
+        h = humidities - self.humidity_min
+        hit = ((codes >= 0) & (codes < self.n_codes) &
+               (t >= 0) & (t < self.n_temperatures) & (t == np.floor(t)) &
+               (h >= 0) & (h < self.n_humidities) & (h == np.floor(h)))
+        return hit, self.values[codes[hit], t[hit].astype(np.intp), h[hit].astype(np.intp)]
+
+
+def read_manifest(artifact_dir):
+    try:
+        with open(os.path.join(artifact_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == GRID_VERSION else None
+
+
+def is_fresh(manifest, sources):
+    """True when the grid was built from the current pickle files"""
+    if not manifest:
+        return False
+    for name, path in sources.items():
+        try:
+            stamp = file_stamp(path)
+        except OSError:
+            # No pickle (serving from model artifacts): nothing newer to compare against
+            continue
+        recorded = manifest['sources'].get(name)
+        if recorded is None or recorded['stamp'] != stamp:
+            return False
+    return True
+
+
+def evaluate(model, n_codes, temperature_range=TEMPERATURE_RANGE, humidity_range=HUMIDITY_RANGE):
+    """
+    Predicted class codes over the whole domain, shape (codes, temperatures, humidities)
+
+    Every feature row is built in float32, exactly as predict.encode_features
+    builds a request, and the model is called once per encoder class.
+    """
+    import numpy as np
+
+    temperatures = np.arange(temperature_range[0], temperature_range[1] + 1, dtype=np.float32)
+    humidities = np.arange(humidity_range[0], humidity_range[1] + 1, dtype=np.float32)
+    dtype = np.min_scalar_type(int(np.max(model.classes_)))
+
+    features = np.empty((len(temperatures) * len(humidities), 3), dtype=np.float32)
+    features[:, 1] = np.repeat(temperatures, len(humidities))
+    features[:, 2] = np.tile(humidities, len(temperatures))
+
+    values = np.empty((n_codes, len(temperatures), len(humidities)), dtype=dtype)
+    for code in range(n_codes):
+        features[:, 0] = code
+        values[code] = np.asarray(model.predict(features)).reshape(len(temperatures), len(humidities))
+    return values
+
+
+def check(grid, model, samples=CHECK_SAMPLES, seed=0):
+    """
+    Re-predict random grid points one row at a time, as live requests are
+    predicted, and return the points where the grid disagrees
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    mismatches = []
+    for _ in range(samples):
+        code = int(rng.integers(grid.n_codes))
+        temperature = grid.temperature_min + int(rng.integers(grid.n_temperatures))
+        humidity = grid.humidity_min + int(rng.integers(grid.n_humidities))
+        live = int(np.asarray(model.predict(np.array([[code, temperature, humidity]], dtype=np.float32)))[0])
+        stored = grid.lookup(code, temperature, humidity)
+        if stored != live:
+            mismatches.append({'code': code, 'temperature': temperature, 'humidity': humidity,
+                               'grid': stored, 'live': live})
+    return mismatches
+
+
+def build(model, feature_encoder, sources, artifact_dir,
+          temperature_range=TEMPERATURE_RANGE, humidity_range=HUMIDITY_RANGE, samples=CHECK_SAMPLES):
+    """
+    Evaluate, check and publish a new grid; returns it
+    Raises if the check finds a grid point that disagrees with live inference.
+    """
+    import numpy as np
+
+    values = evaluate(model, len(feature_encoder.classes_), temperature_range, humidity_range)
+    manifest = {
+        'version': GRID_VERSION,
+        'temperature_range': list(temperature_range),
+        'humidity_range': list(humidity_range),
+        'shape': list(values.shape),
+        'dtype': values.dtype.name,
+        'sources': {
+            name: {'path': os.path.basename(path), 'stamp': file_stamp(path), 'sha256': file_sha256(path)}
+            for name, path in sources.items() if os.path.exists(path)
+        }
+    }
+
+    grid = PredictionGrid(values, manifest)
+    mismatches = check(grid, model, samples)
+    if mismatches:
+        raise Exception(f"Prediction grid disagrees with live inference at {len(mismatches)}/{samples} "
+                        f"sampled points, e.g. {mismatches[0]}")
+
+    # Array first under a content-derived name, then the manifest that points at it
+    os.makedirs(artifact_dir, exist_ok=True)
+    grid_id = hashlib.sha256(values.tobytes()).hexdigest()[:12]
+    manifest['file'] = f'prediction_grid-{grid_id}.npy'
+    grid_path = os.path.join(artifact_dir, manifest['file'])
+    tmp_path = f'{grid_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, grid_path)
+
+    tmp_path = os.path.join(artifact_dir, f'{MANIFEST_NAME}.tmp-{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(artifact_dir, MANIFEST_NAME))
+
+    # Workers that still have an older grid mapped keep reading it after the unlink
+    for path in glob.glob(os.path.join(artifact_dir, 'prediction_grid-*.npy')):
+        if os.path.basename(path) != manifest['file']:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return grid
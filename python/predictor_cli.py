@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Shared command-line plumbing for the predictor scripts
+Handles request validation, the one-shot argv mode, the persistent worker
+mode and the streaming JSONL mode
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+from instrumentation import metrics, profiler_from_env, render_prometheus, stage
+
+# Error "code" of a request rejected for its own content (see RequestError)
+BAD_REQUEST = 'bad_request'
+
+
+# Error "code" of a well-formed request this predictor has no answer for (see UnsupportedInput)
+UNSUPPORTED = 'unsupported'
+
+
+class RequestError(Exception):
+    """
+    A malformed request (missing fields, bad top_k). Reported with
+    "code": "bad_request", so the Node engine passes it back to the client
+    instead of counting it against the predictor.
+    """
+
+
+class UnsupportedInput(Exception):
+    """
+    A valid request outside what this predictor knows (a weather/mood pair
+    the model was not trained on). Reported with "code": "unsupported", so
+    the Node engine falls back to the next tier without counting it against
+    the predictor.
+    """
+
+
+def error_result(e):
+    """The {"error", "success": False} result for an exception"""
+    result = {"error": str(e), "success": False}
+    if isinstance(e, RequestError):
+        result["code"] = BAD_REQUEST
+    elif isinstance(e, UnsupportedInput):
+        result["code"] = UNSUPPORTED
+    return result
+
+
+def parse_request(input_data):
+    """Extract and validate the prediction fields from a request dict"""
+    # Extract features
+    weather = input_data.get('weather')
+    mood = input_data.get('mood')
+    temperature = input_data.get('temperature')
+    humidity = input_data.get('humidity')
+
+    # Validate input
+    if not all([weather, mood, temperature is not None, humidity is not None]):
+        raise RequestError("Missing required fields: weather, mood, temperature, humidity")
+
+    return weather, mood, temperature, humidity
+
+
+def parse_top_k(input_data):
+    """Optional number of ranked alternatives requested (top_k), or None"""
+    top_k = input_data.get('top_k')
+    if top_k is None:
+        return None
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or top_k < 1:
+        raise RequestError("top_k must be a positive integer")
+    return top_k
+
+
+def parse_line(line):
+    """
+    Parse one JSONL line into a request dict (None for blank lines)
+
+    Lines that are not valid JSON come back as {"error": ...} so the
+    caller can report them in place instead of aborting the whole run.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    if not isinstance(row, dict):
+        return {"error": "Each line must be a JSON object"}
+    return row
+
+
+def read_rows(path):
+    """Stream request dicts from a JSONL or CSV file ('-' reads JSONL from stdin)"""
+    if path != '-' and path.lower().endswith('.csv'):
+        with open(path, newline='') as f:
+            yield from csv.DictReader(f)
+        return
+
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        for line in f:
+            row = parse_line(line)
+            if row is not None:
+                yield row
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def run_once(handle_request):
+    """
+    Original single-request mode: JSON request in sys.argv[1],
+    JSON result on stdout and a non-zero exit code on failure
+    """
+    try:
+        # Get input data from command line arguments
+        if len(sys.argv) < 2:
+            raise Exception("No input data provided")
+
+        # Parse JSON input
+        input_data = json.loads(sys.argv[1])
+
+        result = handle_request(input_data)
+
+        print(json.dumps(result))
+        sys.exit(0)
+
+    except Exception as e:
+        # Return error as JSON
+        print(json.dumps(error_result(e)))
+        sys.exit(1)
+
+
+def handle_message(message, handle_request, state, get_stats=None):
+    """
+    Answer one worker protocol message
+
+    Messages look like {"id": ..., "type": "predict", "data": {...}}.
+    "ping" is used by the Node pool as a health check, "stats" returns
+    the predictor's counters (get_stats()), "metrics" returns the stage
+    timings and counters (add "data": {"format": "prometheus"} for text);
+    anything else is treated as a prediction request, and skipped if its
+    "deadline" (epoch milliseconds) has already passed. Prediction results
+    carry "worker_ms", the time the worker spent on them.
+    """
+    request_id = message.get('id')
+    message_type = message.get('type', 'predict')
+
+    if message_type == 'ping':
+        return {
+            "id": request_id,
+            "type": "pong",
+            "success": True,
+            "served": state['served']
+        }
+
+    if message_type == 'stats':
+        return {
+            "id": request_id,
+            "type": "stats",
+            "success": True,
+            "served": state['served'],
+            "stats": get_stats() if get_stats else {}
+        }
+
+    if message_type == 'metrics':
+        snapshot = metrics.snapshot(get_stats() if get_stats else None)
+        response = {
+            "id": request_id,
+            "type": "metrics",
+            "success": True,
+            "pid": os.getpid(),
+            "metrics": snapshot
+        }
+        if (message.get('data') or {}).get('format') == 'prometheus':
+            response["text"] = render_prometheus(snapshot)
+        return response
+
+    deadline = message.get('deadline')
+    if isinstance(deadline, (int, float)) and time.time() * 1000 > deadline:
+        # The caller gave up on this request while it was queued
+        metrics.inc('deadline_expired_total')
+        return {
+            "id": request_id,
+            "error": "Deadline exceeded before the request was processed",
+            "success": False
+        }
+
+    start = time.perf_counter()
+    result = run_request(handle_request, message.get('data', {}), state)
+    result["id"] = request_id
+    # Lets the caller tell time spent predicting from time spent queued
+    result["worker_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
+
+
+def run_request(handle_request, data, state):
+    """Run one prediction, turning a failure into an error result"""
+    profiler = state.get('profiler')
+    try:
+        with stage('request'):
+            if profiler is not None:
+                result = profiler.run(handle_request, data)
+            else:
+                result = handle_request(data)
+    except Exception as e:
+        metrics.inc('request_errors_total')
+        result = error_result(e)
+
+    metrics.inc('requests_total')
+    state['served'] += 1
+    return result
+
+
+def run_worker(handle_request, get_stats=None):
+    """
+    Persistent worker mode: newline-delimited JSON requests on stdin,
+    one JSON response per line on stdout, correlated by request id.
+
+    The process stays alive between requests, so anything the predictor
+    caches at module level (model, encoders, feedback) is loaded only once.
+    With PREDICTOR_STATS_INTERVAL set, a JSON metrics line goes to stderr
+    at most that often (checked between messages).
+    """
+    state = {'served': 0, 'profiler': profiler_from_env()}
+    stats_interval = float(os.environ.get('PREDICTOR_STATS_INTERVAL', 0) or 0)
+    next_stats_line = time.monotonic() + stats_interval
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            response = {
+                "id": None,
+                "error": f"Invalid JSON message: {e}",
+                "success": False
+            }
+        else:
+            if message.get('type') == 'shutdown':
+                break
+            response = handle_message(message, handle_request, state, get_stats)
+
+        with stage('serialize'):
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+
+        if stats_interval and time.monotonic() >= next_stats_line:
+            next_stats_line = time.monotonic() + stats_interval
+            snapshot = metrics.snapshot(get_stats() if get_stats else None)
+            print(json.dumps({"pid": os.getpid(), "served": state['served'], "metrics": snapshot}),
+                  file=sys.stderr, flush=True)
+
+
+def last_completed_line(path):
+    """
+    Input line number recorded in the last complete result of a stream
+    output file (0 if there is none). A torn final line left by an
+    interrupted run is truncated away so appending starts on a clean line.
+    """
+    try:
+        f = open(path, 'rb+')
+    except FileNotFoundError:
+        return 0
+    with f:
+        end = pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        # Read backwards until the tail holds the last complete line in full
+        while pos > 0:
+            step = min(1 << 16, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            last = tail.rfind(b'\n')
+            if last >= 0 and (pos == 0 or tail.rfind(b'\n', 0, last) >= 0):
+                break
+
+        last = tail.rfind(b'\n')
+        # Drop a partial last line
+        if pos + last + 1 < end:
+            f.truncate(pos + last + 1)
+        if last < 0:
+            return 0
+        record = tail[tail.rfind(b'\n', 0, last) + 1:last]
+
+    try:
+        return int(json.loads(record)['line'])
+    except (ValueError, KeyError, TypeError):
+        raise Exception(f"Cannot resume: last line of {path} is not a stream result")
+
+
+def run_stream(argv, handle_request):
+    """
+    Streaming mode: predict an unbounded JSONL request stream line by line
+
+    Each input line gets one result line carrying its 1-based input "line"
+    number (and "id" when the request has one). Bad lines get an inline
+    error result instead of stopping the stream. Results are written in
+    chunks of --flush-every lines, so a slow reader blocks the writer and,
+    through it, reading further input. --resume continues an interrupted
+    run from the last complete result in the output file.
+    """
+    parser = argparse.ArgumentParser(prog=f'{os.path.basename(sys.argv[0])} --stream',
+                                     description='Predict a JSONL request stream')
+    parser.add_argument('input', nargs='?', default='-', help='JSONL requests (default: stdin)')
+    parser.add_argument('--output', '-o', default='-', help='JSONL results (default: stdout)')
+    parser.add_argument('--flush-every', type=int, default=None,
+                        help='Write and flush after this many results (default: 1 for stdin, 1000 for a file)')
+    parser.add_argument('--skip-lines', type=int, default=0, help='Skip this many input lines first')
+    parser.add_argument('--resume', action='store_true',
+                        help='Append to --output, skipping the input lines it already has results for')
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        if args.output == '-':
+            parser.error('--resume needs --output FILE')
+        args.skip_lines = max(args.skip_lines, last_completed_line(args.output))
+    flush_every = args.flush_every or (1 if args.input == '-' else 1000)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume else 'w')
+    state = {'served': 0, 'profiler': profiler_from_env()}
+    pending = []
+    # Input line of the last result buffered / actually written out
+    buffered = written = args.skip_lines
+    results = errors = 0
+
+    def write_pending():
+        nonlocal written
+        if pending:
+            with stage('serialize'):
+                out.write(''.join(pending))
+                out.flush()
+            pending.clear()
+        written = buffered
+
+    try:
+        for line_number, line in enumerate(source, 1):
+            if line_number <= args.skip_lines:
+                continue
+            row = parse_line(line)
+            if row is None:
+                continue
+
+            if 'error' in row:
+                result = {"error": row['error'], "success": False}
+            else:
+                result = run_request(handle_request, row, state)
+            errors += not result.get('success', False)
+            result["line"] = line_number
+            if 'id' in row:
+                result["id"] = row['id']
+            pending.append(json.dumps(result) + '\n')
+            buffered = line_number
+            results += 1
+
+            if len(pending) >= flush_every:
+                write_pending()
+        write_pending()
+    except KeyboardInterrupt:
+        write_pending()
+        print(f"Interrupted after input line {written}; continue with --resume "
+              f"(or --skip-lines {written})", file=sys.stderr)
+        sys.exit(130)
+    except BrokenPipeError:
+        # Reader went away; point stdout at devnull so the exit-time flush stays quiet
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        print(f"Output closed after input line {written}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Streamed {results} results through input line {written} ({errors} errors)", file=sys.stderr)
+
+
+def main(handle_request, get_stats=None):
+    """Dispatch to worker mode (--worker), streaming mode (--stream) or the one-shot argv mode"""
+    if len(sys.argv) > 1 and sys.argv[1] == '--worker':
+        run_worker(handle_request, get_stats)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--stream':
+        run_stream(sys.argv[2:], handle_request)
+    else:
+        run_once(handle_request)
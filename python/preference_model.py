@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Online preference model for the feedback-learning predictor
+Keeps Beta(likes + 1, dislikes + 1) counts per (weather, mood, temperature
+bucket, beverage). Each feedback event is one counter update, and a prediction
+reads three buckets whatever the feedback volume. Candidates are chosen by
+Thompson sampling, so well-liked beverages win more often while untried ones
+still get picked.
+
+The counts and the feedback log position they cover are checkpointed to
+data/preference_model.json, so a restarted worker resumes tailing the log
+instead of replaying it.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+
+from feedback_log import FeedbackLogReader
+
+CHECKPOINT_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'preference_model.json')
+CHECKPOINT_VERSION = 1
+
+# °C per bucket; a query reads its own bucket and both neighbours (about ±5°C)
+TEMPERATURE_BUCKET = 5
+
+
+def temperature_bucket(temperature):
+    return int(math.floor(temperature / TEMPERATURE_BUCKET))
+
+
+class PreferenceModel:
+    """Like/dislike counts per (weather, mood, temperature bucket) and beverage"""
+
+    def __init__(self):
+        # (weather, mood, bucket) -> {beverage: [likes, dislikes]}
+        self._counts = {}
+        self.total = 0
+
+    def update(self, feedback, count=1):
+        """
+        Add one feedback dict (weather, mood, temperature, recommended_beverage, liked)
+
+        Records missing a field or with a non-numeric temperature count
+        towards the total only, as in FeedbackIndex.
+        """
+        self.total += count
+        try:
+            temperature = feedback['temperature']
+            if isinstance(temperature, bool) or not isinstance(temperature, (int, float)):
+                return
+            self.add_counts(feedback['weather'], feedback['mood'], temperature,
+                            feedback['recommended_beverage'],
+                            count if feedback['liked'] else 0, 0 if feedback['liked'] else count)
+        except (KeyError, TypeError):
+            return
+
+    def add_counts(self, weather, mood, temperature, beverage, likes, dislikes):
+        """Add aggregated like/dislike counts without touching the total"""
+        key = (weather, mood, temperature_bucket(temperature))
+        beverages = self._counts.get(key)
+        if beverages is None:
+            beverages = self._counts[key] = {}
+        counts = beverages.get(beverage)
+        if counts is None:
+            counts = beverages[beverage] = [0, 0]
+        counts[0] += likes
+        counts[1] += dislikes
+
+    def apply_snapshot(self, snapshot):
+        """Add the aggregate counts of a compacted feedback log snapshot"""
+        self.total += snapshot.get('total', 0)
+        for weather, mood, temperature, beverage, likes, dislikes in snapshot.get('counts', []):
+            if temperature is not None:
+                self.add_counts(weather, mood, temperature, beverage, likes, dislikes)
+
+    def counts(self, weather, mood, temperature):
+        """{beverage: [likes, dislikes]} summed over the neighbouring buckets"""
+        bucket = temperature_bucket(temperature)
+        merged = {}
+        for b in (bucket - 1, bucket, bucket + 1):
+            for beverage, (likes, dislikes) in self._counts.get((weather, mood, b), {}).items():
+                counts = merged.setdefault(beverage, [0, 0])
+                counts[0] += likes
+                counts[1] += dislikes
+        return merged
+
+    def preferences(self, weather, mood, temperature):
+        """Liked and disliked beverages, in the shape get_feedback_preferences returns"""
+        counts = self.counts(weather, mood, temperature)
+        return {
+            'liked': [beverage for beverage, (likes, _) in counts.items() if likes],
+            'disliked': [beverage for beverage, (_, dislikes) in counts.items() if dislikes],
+            'total_feedback': self.total
+        }
+
+    def sample(self, weather, mood, temperature, beverages, rng=random):
+        """Thompson sampling: draw from each candidate's Beta posterior and take the best"""
+        counts = self.counts(weather, mood, temperature)
+        best, best_draw = None, -1.0
+        for beverage in beverages:
+            likes, dislikes = counts.get(beverage, (0, 0))
+            draw = rng.betavariate(likes + 1, dislikes + 1)
+            if draw > best_draw:
+                best, best_draw = beverage, draw
+        return best
+
+    def rank(self, weather, mood, temperature, beverages, k=None):
+        """Candidates ordered by posterior mean like rate, as [{"beverage", "score"}]"""
+        counts = self.counts(weather, mood, temperature)
+        scores = {}
+        for beverage in beverages:
+            likes, dislikes = counts.get(beverage, (0, 0))
+            scores[beverage] = (likes + 1) / (likes + dislikes + 2)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return [{"beverage": beverage, "score": round(score, 4)} for beverage, score in ranked[:k]]
+
+    def to_state(self):
+        return {
+            'bucket_size': TEMPERATURE_BUCKET,
+            'total': self.total,
+            'counts': [[weather, mood, bucket, beverage, likes, dislikes]
+                       for (weather, mood, bucket), beverages in self._counts.items()
+                       for beverage, (likes, dislikes) in beverages.items()]
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if state.get('bucket_size') != TEMPERATURE_BUCKET:
+            raise ValueError("checkpoint uses a different temperature bucket size")
+        model = cls()
+        model.total = state['total']
+        for weather, mood, bucket, beverage, likes, dislikes in state['counts']:
+            model._counts.setdefault((weather, mood, bucket), {})[beverage] = [likes, dislikes]
+        return model
+
+
+class PreferenceLearner:
+    """
+    A PreferenceModel kept up to date from the feedback log
+
+    refresh() applies only the records appended since the last call.
+    The model is checkpointed after checkpoint_every new records or
+    checkpoint_interval seconds, whichever comes first.
+    """
+
+    def __init__(self, checkpoint_path=CHECKPOINT_FILE, reader=None,
+                 checkpoint_every=100, checkpoint_interval=30.0, clock=time.monotonic):
+        self.checkpoint_path = checkpoint_path
+        self.reader = reader or FeedbackLogReader()
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.clock = clock
+        self.model = PreferenceModel()
+        self.unsaved = 0
+        self.last_checkpoint = clock()
+        self._restore()
+
+    def _restore(self):
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('version') != CHECKPOINT_VERSION:
+                return
+            model = PreferenceModel.from_state(checkpoint['model'])
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Ignoring preference model checkpoint: {e}", file=sys.stderr)
+            return
+        self.model = model
+        self.reader.seek(checkpoint['position'])
+
+    def refresh(self):
+        """Apply new feedback from the log; returns the live model"""
+        try:
+            snapshot, records = self.reader.read_updates()
+        except Exception as e:
+            print(f"Warning: Could not load feedback: {e}", file=sys.stderr)
+            return self.model
+
+        if snapshot is not None:
+            # First load or the log was compacted: rebuild from the snapshot
+            self.model = PreferenceModel()
+            self.model.apply_snapshot(snapshot)
+            self.unsaved += 1
+        for record in records:
+            self.model.update(record)
+        self.unsaved += len(records)
+
+        if self.unsaved and (self.unsaved >= self.checkpoint_every or
+                             self.clock() - self.last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint()
+        return self.model
+
+    def checkpoint(self):
+        """Atomically write the model together with the log position it covers"""
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'position': self.reader.position(),
+            'model': self.model.to_state()
+        }
+        tmp_path = f'{self.checkpoint_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(checkpoint, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            print(f"Warning: Could not checkpoint preference model: {e}", file=sys.stderr)
+            return
+        self.unsaved = 0
+        self.last_checkpoint = self.clock()
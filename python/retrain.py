@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Retrain the beverage model from exported feedback
+Reads the columnar feedback export (feedback_export.py) and fits a new
+model with the same inputs as predict.py ("Weather_Mood" class, temperature,
+humidity), then writes beverage_model.pkl, feature_encoder.pkl and
+target_encoder.pkl that predict.py loads as they are.
+
+Training rows:
+  - every liked feedback record: its conditions labelled with the beverage,
+    weighted by its count
+  - base samples: random conditions labelled by the current model, so
+    combinations nobody gave feedback on keep their current answers; samples
+    whose label a user disliked under the same weather and mood within
+    ±5°C are dropped. Without a current model the feedback predictor's rule
+    tables label them instead, so the new model still knows every weather
+    and mood pair the API accepts.
+
+The new files go to a staging directory (retrained/ by default), where
+MODEL_SHADOW_DIR can compare them against live traffic; --install then
+moves them over the served pickles, which running workers hot-reload.
+
+Usage: python python/retrain.py [--export DIR] [--output DIR] [--base-samples N] [--install]
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+
+import feedback_export
+from feedback_index import TEMPERATURE_WINDOW
+from predict import BASE_DIR, model_sources, load_pickled_model_and_encoders
+from prediction_grid import HUMIDITY_RANGE, TEMPERATURE_RANGE
+from rules import FEEDBACK_TABLE, draw, lookup
+from vocab import MOODS, WEATHERS
+
+STAGING_DIR = BASE_DIR / 'retrained'
+BASE_SAMPLES = 20000
+
+
+def feedback_rows(columns, dictionaries):
+    """(feature keys, temperatures, humidities, beverages, weights, liked) of usable feedback rows"""
+    import numpy as np
+
+    usable = ((columns['weather'] >= 0) & (columns['mood'] >= 0) & (columns['beverage'] >= 0) &
+              ~np.isnan(columns['temperature']) & (columns['weight'] > 0))
+    weathers = np.asarray(dictionaries['weather'] + [''], dtype=object)
+    moods = np.asarray(dictionaries['mood'] + [''], dtype=object)
+    beverages = np.asarray(dictionaries['beverage'] + [''], dtype=object)
+    keys = weathers[columns['weather'][usable]] + '_' + moods[columns['mood'][usable]]
+
+    humidities = columns['humidity'][usable].copy()
+    # Compacted history has no humidity: train those rows at mid-range
+    humidities[np.isnan(humidities)] = (HUMIDITY_RANGE[0] + HUMIDITY_RANGE[1]) / 2
+    return (keys, columns['temperature'][usable], humidities, beverages[columns['beverage'][usable]],
+            columns['weight'][usable].astype(np.float64), columns['liked'][usable].astype(bool))
+
+
+def base_samples(model, feature_encoder, target_encoder, n, rng):
+    """n random conditions labelled by the current model, as (keys, temperatures, humidities, beverages)"""
+    import numpy as np
+
+    codes = rng.integers(len(feature_encoder.classes_), size=n)
+    features = np.empty((n, 3), dtype=np.float32)
+    features[:, 0] = codes
+    features[:, 1] = rng.integers(TEMPERATURE_RANGE[0], TEMPERATURE_RANGE[1] + 1, size=n)
+    features[:, 2] = rng.integers(HUMIDITY_RANGE[0], HUMIDITY_RANGE[1] + 1, size=n)
+    labels = target_encoder.inverse_transform(np.asarray(model.predict(features)).astype(int))
+    keys = np.asarray(feature_encoder.classes_, dtype=object)[codes]
+    return keys, features[:, 1], features[:, 2], np.asarray(labels, dtype=object)
+
+
+def rule_keys():
+    """Every "Weather_Mood" feature class the rule tables know"""
+    return [f'{weather}_{mood}' for weather in WEATHERS.names for mood in MOODS.names]
+
+
+def rule_samples(n, rng):
+    """n random conditions labelled by the rule tables, as (keys, temperatures, humidities, beverages)"""
+    import numpy as np
+
+    pairs = [(weather, mood) for weather in WEATHERS.names for mood in MOODS.names]
+    picks = rng.integers(len(pairs), size=n)
+    temperatures = rng.integers(TEMPERATURE_RANGE[0], TEMPERATURE_RANGE[1] + 1, size=n).astype(np.float32)
+    humidities = rng.integers(HUMIDITY_RANGE[0], HUMIDITY_RANGE[1] + 1, size=n).astype(np.float32)
+    keys = np.asarray([f'{pairs[i][0]}_{pairs[i][1]}' for i in picks], dtype=object)
+    beverages = np.asarray([draw(lookup(FEEDBACK_TABLE, *pairs[i], float(temperature)), rng)
+                            for i, temperature in zip(picks, temperatures)], dtype=object)
+    return keys, temperatures, humidities, beverages
+
+
+def drop_disliked(keys, temperatures, beverages, disliked):
+    """Mask of base samples not contradicted by a dislike (same key and beverage, within the window)"""
+    import numpy as np
+
+    d_keys, d_temperatures, d_beverages = disliked
+    seen = set(zip(d_keys, np.floor(d_temperatures).astype(int).tolist(), d_beverages))
+    # Base sample temperatures are whole degrees, so the window is a handful of set lookups
+    offsets = range(-TEMPERATURE_WINDOW, TEMPERATURE_WINDOW + 1)
+    return np.array([
+        not any((key, temperature + offset, beverage) in seen for offset in offsets)
+        for key, temperature, beverage in zip(keys, np.floor(temperatures).astype(int).tolist(), beverages)
+    ], dtype=bool)
+
+
+def retrain(export_dir, output_dir, n_base=BASE_SAMPLES, n_estimators=100, max_depth=None, seed=0):
+    """Fit and write a new model and encoders; returns a summary"""
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+
+    rng = np.random.default_rng(seed)
+    columns, dictionaries = feedback_export.load(export_dir)
+    keys, temperatures, humidities, beverages, weights, liked = feedback_rows(columns, dictionaries)
+
+    try:
+        current = load_pickled_model_and_encoders()
+    except FileNotFoundError:
+        print("Warning: No current model to sample from; labelling base samples with the rule tables",
+              file=sys.stderr)
+        current = None
+
+    parts = [(keys[liked], temperatures[liked], humidities[liked], beverages[liked], weights[liked])]
+    if n_base:
+        if current:
+            b_keys, b_temperatures, b_humidities, b_beverages = base_samples(*current, n_base, rng)
+        else:
+            b_keys, b_temperatures, b_humidities, b_beverages = rule_samples(n_base, rng)
+        keep = drop_disliked(b_keys, b_temperatures, b_beverages,
+                             (keys[~liked], temperatures[~liked], beverages[~liked]))
+        parts.append((b_keys[keep], b_temperatures[keep], b_humidities[keep], b_beverages[keep],
+                      np.ones(int(keep.sum()))))
+
+    keys, temperatures, humidities, beverages, weights = (np.concatenate(column) for column in zip(*parts))
+    if len(keys) == 0:
+        raise Exception("Nothing to train on: no liked feedback and no base samples")
+
+    # Encoders keep every class the current ones (or the rule tables) know, so old requests stay valid
+    known_keys = list(current[1].classes_) if current else rule_keys()
+    known_beverages = list(current[2].classes_) if current else []
+    feature_encoder = LabelEncoder().fit(np.asarray(sorted(set(known_keys) | set(keys)), dtype=object).astype(str))
+    target_encoder = LabelEncoder().fit(np.asarray(sorted(set(known_beverages) | set(beverages)), dtype=object).astype(str))
+
+    features = np.empty((len(keys), 3), dtype=np.float32)
+    features[:, 0] = feature_encoder.transform(keys.astype(str))
+    features[:, 1] = temperatures
+    features[:, 2] = humidities
+    labels = target_encoder.transform(beverages.astype(str))
+
+    start = time.perf_counter()
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=seed, n_jobs=1)
+    model.fit(features, labels, sample_weight=weights)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    # How often the new model gives liked feedback its beverage, and agrees with the base samples
+    n_liked = len(parts[0][0])
+    hits = model.predict(features) == labels
+    summary = {
+        'feedback_rows': int(len(columns['liked'])),
+        'liked_rows': n_liked,
+        'base_samples': int(len(keys) - n_liked),
+        'feature_classes': len(feature_encoder.classes_),
+        'beverages': len(target_encoder.classes_),
+        'liked_accuracy': round(float(hits[:n_liked].mean()), 4) if n_liked else None,
+        'base_agreement': round(float(hits[n_liked:].mean()), 4) if len(keys) > n_liked else None,
+        'fit_ms': round(fit_ms, 1)
+    }
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, obj in (('feature_encoder', feature_encoder), ('target_encoder', target_encoder), ('model', model)):
+        path = model_sources(output_dir)[name]
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_path, path)
+    summary['output'] = str(output_dir)
+    return summary
+
+
+def install(staging_dir):
+    """
+    Move staged pickles over the served ones: encoders first, model last,
+    each with an atomic rename (the hot-reload watcher waits for all three
+    to settle before loading)
+    """
+    staged = model_sources(staging_dir)
+    served = model_sources()
+    for name in ('feature_encoder', 'target_encoder', 'model'):
+        tmp_path = f"{served[name]}.tmp-{os.getpid()}"
+        shutil.copyfile(staged[name], tmp_path)
+        os.replace(tmp_path, served[name])
+    return served
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Retrain the beverage model from exported feedback')
+    parser.add_argument('--export', default=feedback_export.EXPORT_DIR, help='Feedback export directory')
+    parser.add_argument('--output', '-o', default=str(STAGING_DIR), help='Where to write the new pickles')
+    parser.add_argument('--base-samples', type=int, default=BASE_SAMPLES,
+                        help='Conditions labelled by the current model (0 = feedback only)')
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--install', action='store_true', help='Replace the served pickles with the new ones')
+    args = parser.parse_args()
+
+    summary = retrain(args.export, args.output, args.base_samples, args.n_estimators, args.max_depth, args.seed)
+    if args.install:
+        summary['installed'] = list(install(args.output).values())
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
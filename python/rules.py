@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Beverage rule tables shared by the rule-based predictors
+The rule dictionaries are compiled once at import time into an immutable
+lookup table keyed by (weather, mood, temperature band), so a prediction
+is one dictionary lookup plus one weighted draw. Every name is interned in
+vocab.py, and each candidate set carries its beverages' integer ids.
+"""
+
+import random
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate
+from types import MappingProxyType
+
+from vocab import BEVERAGES, MOODS, WEATHERS
+
+# Temperature bands, in the order the predictors have always tested them
+TEMPERATURE_BANDS = ('very_hot', 'warm', 'very_cold', 'cool', 'moderate')
+
+
+def temperature_band(temperature):
+    """Map a temperature (°C) to its rule band"""
+    if temperature > 35:  # Very hot
+        return 'very_hot'
+    elif temperature > 25:  # Warm
+        return 'warm'
+    elif temperature < 10:  # Very cold
+        return 'very_cold'
+    elif temperature < 20:  # Cool
+        return 'cool'
+    else:  # Moderate (20-25°C)
+        return 'moderate'
+
+
+# Comprehensive rule-based recommendations with multiple options
+BEVERAGE_RULES = {
+    # Hot weather combinations
+    ('Hot', 'Tired'): ['Iced Coffee', 'Cold Brew', 'Iced Latte'],
+    ('Hot', 'Energetic'): ['Energy Drink', 'Iced Green Tea', 'Cold Coffee'],
+    ('Hot', 'Happy'): ['Fresh Juice', 'Fruit Smoothie', 'Iced Tea'],
+    ('Hot', 'Stressed'): ['Iced Tea', 'Mint Lemonade', 'Cucumber Water'],
+    ('Hot', 'Sad'): ['Mango Smoothie', 'Strawberry Shake', 'Iced Chocolate'],
+    ('Hot', 'Relaxed'): ['Iced Herbal Tea', 'Coconut Water', 'Watermelon Juice'],
+    ('Hot', 'Focused'): ['Cold Brew Coffee', 'Iced Green Tea', 'Iced Matcha'],
+    ('Hot', 'Excited'): ['Energy Drink', 'Orange Juice', 'Tropical Smoothie'],
+
+    # Sunny weather combinations
+    ('Sunny', 'Happy'): ['Lemonade', 'Orange Juice', 'Pineapple Juice'],
+    ('Sunny', 'Tired'): ['Iced Coffee', 'Cold Brew', 'Iced Americano'],
+    ('Sunny', 'Energetic'): ['Smoothie', 'Fresh Juice', 'Iced Green Tea'],
+    ('Sunny', 'Stressed'): ['Iced Tea', 'Lemonade', 'Herbal Iced Tea'],
+    ('Sunny', 'Sad'): ['Chocolate Smoothie', 'Strawberry Milkshake', 'Iced Mocha'],
+    ('Sunny', 'Relaxed'): ['Coconut Water', 'Iced Herbal Tea', 'Fresh Lemonade'],
+    ('Sunny', 'Focused'): ['Iced Americano', 'Green Tea', 'Iced Matcha'],
+    ('Sunny', 'Excited'): ['Tropical Smoothie', 'Mango Lassi', 'Berry Smoothie'],
+
+    # Cold weather combinations
+    ('Cold', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Espresso'],
+    ('Cold', 'Happy'): ['Hot Chocolate', 'Caramel Latte', 'Mocha'],
+    ('Cold', 'Stressed'): ['Chamomile Tea', 'Green Tea', 'Lavender Tea'],
+    ('Cold', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Caramel Macchiato'],
+    ('Cold', 'Energetic'): ['Hot Coffee', 'Black Tea', 'Chai Latte'],
+    ('Cold', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'White Tea'],
+    ('Cold', 'Focused'): ['Black Coffee', 'Green Tea', 'Matcha Latte'],
+    ('Cold', 'Excited'): ['Spiced Chai', 'Hot Coffee', 'Cinnamon Latte'],
+
+    # Rainy weather combinations
+    ('Rainy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Ginger Tea'],
+    ('Rainy', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Honey Tea'],
+    ('Rainy', 'Happy'): ['Chai', 'Masala Chai', 'Spiced Tea'],
+    ('Rainy', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Latte'],
+    ('Rainy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Green Tea'],
+    ('Rainy', 'Energetic'): ['Black Coffee', 'Chai Latte', 'Black Tea'],
+    ('Rainy', 'Focused'): ['Green Tea', 'Black Coffee', 'Oolong Tea'],
+    ('Rainy', 'Excited'): ['Masala Chai', 'Hot Chocolate', 'Spiced Coffee'],
+
+    # Cloudy weather combinations
+    ('Cloudy', 'Focused'): ['Green Tea', 'Black Coffee', 'Matcha'],
+    ('Cloudy', 'Happy'): ['Cappuccino', 'Latte', 'Hot Chocolate'],
+    ('Cloudy', 'Tired'): ['Coffee', 'Espresso', 'Black Tea'],
+    ('Cloudy', 'Stressed'): ['Green Tea', 'Herbal Tea', 'White Tea'],
+    ('Cloudy', 'Sad'): ['Hot Chocolate', 'Mocha', 'Caramel Latte'],
+    ('Cloudy', 'Energetic'): ['Black Coffee', 'Americano', 'Cold Brew'],
+    ('Cloudy', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'Chamomile Tea'],
+    ('Cloudy', 'Excited'): ['Cappuccino', 'Espresso', 'Iced Coffee'],
+
+    # Snowy weather combinations
+    ('Snowy', 'Happy'): ['Hot Chocolate', 'Peppermint Mocha', 'Eggnog'],
+    ('Snowy', 'Tired'): ['Hot Coffee', 'Espresso', 'Strong Black Tea'],
+    ('Snowy', 'Stressed'): ['Chamomile Tea', 'Warm Milk', 'Lavender Tea'],
+    ('Snowy', 'Sad'): ['Hot Chocolate', 'Warm Milk with Honey', 'Vanilla Latte'],
+    ('Snowy', 'Energetic'): ['Black Coffee', 'Espresso', 'Americano'],
+    ('Snowy', 'Relaxed'): ['Herbal Tea', 'Cinnamon Tea', 'Ginger Tea'],
+    ('Snowy', 'Focused'): ['Black Coffee', 'Green Tea', 'Espresso'],
+    ('Snowy', 'Excited'): ['Hot Chocolate', 'Peppermint Latte', 'Spiced Coffee'],
+
+    # Stormy weather combinations
+    ('Stormy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Warm Milk'],
+    ('Stormy', 'Sad'): ['Hot Chocolate', 'Comfort Tea', 'Honey Tea'],
+    ('Stormy', 'Tired'): ['Strong Coffee', 'Black Tea', 'Espresso'],
+    ('Stormy', 'Happy'): ['Chai', 'Hot Chocolate', 'Spiced Tea'],
+    ('Stormy', 'Energetic'): ['Black Coffee', 'Americano', 'Strong Tea'],
+    ('Stormy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Green Tea'],
+    ('Stormy', 'Focused'): ['Black Coffee', 'Green Tea', 'Oolong Tea'],
+    ('Stormy', 'Excited'): ['Espresso', 'Strong Coffee', 'Chai Latte'],
+
+    # Windy weather combinations
+    ('Windy', 'Energetic'): ['Cold Brew', 'Iced Coffee', 'Energy Drink'],
+    ('Windy', 'Happy'): ['Fresh Juice', 'Smoothie', 'Iced Tea'],
+    ('Windy', 'Tired'): ['Hot Coffee', 'Cappuccino', 'Latte'],
+    ('Windy', 'Stressed'): ['Green Tea', 'Herbal Tea', 'Chamomile Tea'],
+    ('Windy', 'Sad'): ['Hot Chocolate', 'Warm Beverage', 'Comfort Drink'],
+    ('Windy', 'Relaxed'): ['Herbal Tea', 'Green Tea', 'Iced Tea'],
+    ('Windy', 'Focused'): ['Black Coffee', 'Green Tea', 'Americano'],
+    ('Windy', 'Excited'): ['Energy Drink', 'Cold Brew', 'Iced Coffee'],
+
+    # Foggy weather combinations
+    ('Foggy', 'Relaxed'): ['Herbal Tea', 'Chamomile Tea', 'Green Tea'],
+    ('Foggy', 'Tired'): ['Hot Coffee', 'Black Tea', 'Espresso'],
+    ('Foggy', 'Happy'): ['Cappuccino', 'Latte', 'Hot Chocolate'],
+    ('Foggy', 'Stressed'): ['Chamomile Tea', 'Lavender Tea', 'Green Tea'],
+    ('Foggy', 'Sad'): ['Hot Chocolate', 'Warm Milk', 'Honey Tea'],
+    ('Foggy', 'Energetic'): ['Black Coffee', 'Americano', 'Strong Tea'],
+    ('Foggy', 'Focused'): ['Green Tea', 'Black Coffee', 'Matcha'],
+    ('Foggy', 'Excited'): ['Espresso', 'Cappuccino', 'Strong Coffee'],
+}
+
+# Temperature-based fallback with mood consideration (mock predictor)
+MOOD_FALLBACK_RULES = {
+    # Very hot (> 35°C)
+    'very_hot': {
+        'Tired': ['Iced Coffee', 'Cold Brew', 'Iced Latte'],
+        'Stressed': ['Iced Tea', 'Mint Lemonade', 'Cucumber Water'],
+        'Happy': ['Fresh Juice', 'Fruit Smoothie', 'Tropical Drink'],
+        'Sad': ['Iced Chocolate', 'Milkshake', 'Smoothie'],
+        'Energetic': ['Energy Drink', 'Cold Coffee', 'Iced Green Tea'],
+        'Relaxed': ['Coconut Water', 'Iced Herbal Tea', 'Lemonade'],
+        'Focused': ['Cold Brew', 'Iced Americano', 'Iced Matcha'],
+        'Excited': ['Energy Drink', 'Tropical Smoothie', 'Iced Coffee']
+    },
+    # Warm (25-35°C)
+    'warm': {
+        'Tired': ['Iced Coffee', 'Cold Brew', 'Iced Tea'],
+        'Happy': ['Lemonade', 'Fresh Juice', 'Smoothie'],
+        'Stressed': ['Iced Tea', 'Herbal Iced Tea', 'Lemonade'],
+        'Sad': ['Iced Mocha', 'Milkshake', 'Smoothie'],
+        'Energetic': ['Iced Green Tea', 'Cold Coffee', 'Smoothie'],
+        'Relaxed': ['Iced Herbal Tea', 'Lemonade', 'Fresh Juice'],
+        'Focused': ['Iced Americano', 'Green Tea', 'Cold Brew'],
+        'Excited': ['Tropical Smoothie', 'Energy Drink', 'Iced Coffee']
+    },
+    # Very cold (< 10°C)
+    'very_cold': {
+        'Tired': ['Hot Coffee', 'Espresso', 'Strong Black Tea'],
+        'Happy': ['Hot Chocolate', 'Caramel Latte', 'Mocha'],
+        'Stressed': ['Chamomile Tea', 'Lavender Tea', 'Warm Milk'],
+        'Sad': ['Hot Chocolate', 'Warm Milk with Honey', 'Comfort Tea'],
+        'Energetic': ['Black Coffee', 'Espresso', 'Americano'],
+        'Relaxed': ['Herbal Tea', 'Chamomile Tea', 'Ginger Tea'],
+        'Focused': ['Black Coffee', 'Green Tea', 'Espresso'],
+        'Excited': ['Strong Coffee', 'Espresso', 'Chai Latte']
+    },
+    # Cool (10-20°C)
+    'cool': {
+        'Tired': ['Hot Coffee', 'Cappuccino', 'Black Tea'],
+        'Happy': ['Cappuccino', 'Latte', 'Hot Chocolate'],
+        'Stressed': ['Green Tea', 'Herbal Tea', 'Chamomile Tea'],
+        'Sad': ['Hot Chocolate', 'Mocha', 'Warm Milk'],
+        'Energetic': ['Black Coffee', 'Americano', 'Chai'],
+        'Relaxed': ['Herbal Tea', 'Green Tea', 'White Tea'],
+        'Focused': ['Green Tea', 'Black Coffee', 'Oolong Tea'],
+        'Excited': ['Cappuccino', 'Espresso', 'Chai Latte']
+    },
+    # Moderate (20-25°C)
+    'moderate': {
+        'Tired': ['Coffee', 'Iced Coffee', 'Black Tea'],
+        'Happy': ['Cappuccino', 'Fresh Juice', 'Lemonade'],
+        'Stressed': ['Green Tea', 'Herbal Tea', 'Iced Tea'],
+        'Sad': ['Hot Chocolate', 'Mocha', 'Smoothie'],
+        'Energetic': ['Cold Brew', 'Green Tea', 'Smoothie'],
+        'Relaxed': ['Herbal Tea', 'Iced Tea', 'Green Tea'],
+        'Focused': ['Green Tea', 'Americano', 'Matcha'],
+        'Excited': ['Cappuccino', 'Iced Coffee', 'Fresh Juice']
+    },
+}
+
+# Fallback when the mood is unknown too (mock predictor)
+MOOD_FALLBACK_DEFAULTS = {
+    'very_hot': ['Iced Tea', 'Cold Water', 'Lemonade'],
+    'warm': ['Iced Tea', 'Lemonade', 'Fresh Juice'],
+    'very_cold': ['Hot Coffee', 'Hot Tea', 'Hot Chocolate'],
+    'cool': ['Hot Coffee', 'Green Tea', 'Cappuccino'],
+    'moderate': ['Green Tea', 'Coffee', 'Fresh Juice'],
+}
+
+# Temperature-based fallback (feedback predictor, ignores mood)
+FEEDBACK_FALLBACK_RULES = {
+    'very_hot': ['Iced Coffee', 'Cold Brew', 'Lemonade', 'Iced Tea'],
+    'warm': ['Iced Coffee', 'Lemonade', 'Fresh Juice'],
+    'very_cold': ['Hot Coffee', 'Hot Tea', 'Hot Chocolate'],
+    'cool': ['Hot Coffee', 'Cappuccino', 'Green Tea'],
+    'moderate': ['Green Tea', 'Coffee', 'Fresh Juice'],
+}
+
+
+# Candidate beverages with cumulative weights for a single weighted draw,
+# plus the beverages' vocabulary ids
+Candidates = namedtuple('Candidates', ['beverages', 'cum_weights', 'ids'])
+
+
+def make_candidates(beverages, weights=None, ids=None):
+    """Build an immutable Candidates entry (equal weights by default)"""
+    beverages = tuple(beverages)
+    if weights is None:
+        weights = [1] * len(beverages)
+    if ids is None:
+        ids = tuple(BEVERAGES.add(beverage) for beverage in beverages)
+    return Candidates(beverages, tuple(accumulate(weights)), tuple(ids))
+
+
+def draw(candidates, rng=random):
+    """Pick one beverage from a Candidates entry with a single weighted draw"""
+    cum_weights = candidates.cum_weights
+    return candidates.beverages[bisect_right(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def rank(candidates, k=None):
+    """
+    Beverages of a Candidates entry ordered by their chance of being drawn,
+    as [{"beverage": ..., "score": probability}]; ties keep rule order
+    """
+    total = candidates.cum_weights[-1]
+    scores = {}
+    previous = 0
+    for beverage, cumulative in zip(candidates.beverages, candidates.cum_weights):
+        scores[beverage] = scores.get(beverage, 0) + (cumulative - previous) / total
+        previous = cumulative
+    ranked = sorted(scores.items(), key=lambda item: -item[1])
+    return [{"beverage": beverage, "score": round(score, 4)} for beverage, score in ranked[:k]]
+
+
+def compile_table(exact_rules, fallback_for):
+    """
+    Compile rules into {(weather, mood, band): Candidates}
+
+    Every known (weather, mood) pair gets an entry for every band; the
+    fallbacks are stored under (None, mood, band) and (None, None, band).
+    """
+    table = {}
+    moods = {mood for _, mood in exact_rules}
+    for (weather, mood), beverages in exact_rules.items():
+        WEATHERS.add(weather)
+        MOODS.add(mood)
+        for band in TEMPERATURE_BANDS:
+            table[(weather, mood, band)] = make_candidates(beverages)
+    for band in TEMPERATURE_BANDS:
+        for mood in moods:
+            table[(None, mood, band)] = make_candidates(fallback_for(mood, band))
+        table[(None, None, band)] = make_candidates(fallback_for(None, band))
+    return MappingProxyType(table)
+
+
+def lookup(table, weather, mood, temperature):
+    """Candidates for a request: exact (weather, mood) rule first, then the temperature fallback"""
+    band = temperature_band(temperature)
+    return (table.get((weather, mood, band))
+            or table.get((None, mood, band))
+            or table[(None, None, band)])
+
+
+# Mock predictor: exact rules, then mood-aware temperature fallback
+MOCK_TABLE = compile_table(
+    BEVERAGE_RULES,
+    lambda mood, band: MOOD_FALLBACK_RULES[band].get(mood, MOOD_FALLBACK_DEFAULTS[band])
+)
+
+# Feedback predictor: exact rules, then mood-independent temperature fallback
+FEEDBACK_TABLE = compile_table(
+    BEVERAGE_RULES,
+    lambda mood, band: FEEDBACK_FALLBACK_RULES[band]
+)
@@ -0,0 +1,62 @@
+import itertools
+import random
+
+from feedback_index import FeedbackIndex
+
+WEATHERS = ['Sunny', 'Cloudy', 'Rainy', 'Snowy', 'Foggy']
+MOODS = ['Happy', 'Sad', 'Tired', 'Relaxed']
+BEVERAGES = ['Iced Coffee', 'Lemonade', 'Green Tea', 'Hot Chocolate', 'Cappuccino', 'Masala Chai']
+# Whole and fractional points, including ones exactly 5°C from recorded temperatures
+TEMPERATURES = [-10, -5, -0.5, 0, 4.5, 5, 9.9, 10, 15, 19.5, 20, 25, 30.25, 35, 40, 45, 50.5]
+
+
+def linear_preferences(feedbacks, weather, mood, temperature):
+    """The original get_feedback_preferences scan"""
+    temp_min = temperature - 5
+    temp_max = temperature + 5
+    liked, disliked = [], []
+    for feedback in feedbacks:
+        if (feedback['weather'] == weather and
+                feedback['mood'] == mood and
+                temp_min <= feedback['temperature'] <= temp_max):
+            if feedback['liked']:
+                liked.append(feedback['recommended_beverage'])
+            else:
+                disliked.append(feedback['recommended_beverage'])
+    return {'liked': list(set(liked)), 'disliked': list(set(disliked)), 'total_feedback': len(feedbacks)}
+
+
+def generate_feedback(count, seed=7):
+    rng = random.Random(seed)
+    return [{
+        'recommended_beverage': rng.choice(BEVERAGES),
+        'weather': rng.choice(WEATHERS),
+        'mood': rng.choice(MOODS),
+        'temperature': rng.choice([rng.randint(-5, 45), rng.randint(-50, 450) / 10]),
+        'humidity': rng.randint(10, 100),
+        'liked': rng.random() < 0.6,
+    } for _ in range(count)]
+
+
+def assert_same_preferences(index, feedbacks):
+    for weather, mood, temperature in itertools.product(WEATHERS + ['Windy'], MOODS, TEMPERATURES):
+        expected = linear_preferences(feedbacks, weather, mood, temperature)
+        actual = index.preferences(weather, mood, temperature)
+        query = (weather, mood, temperature)
+        assert set(actual['liked']) == set(expected['liked']), query
+        assert set(actual['disliked']) == set(expected['disliked']), query
+        assert actual['total_feedback'] == expected['total_feedback'], query
+
+
+def test_index_matches_linear_scan():
+    feedbacks = generate_feedback(3000)
+    assert_same_preferences(FeedbackIndex.from_feedbacks(feedbacks), feedbacks)
+
+
+def test_incremental_index_matches_linear_scan():
+    feedbacks = generate_feedback(1500, seed=11)
+    index = FeedbackIndex.from_feedbacks(feedbacks[:500])
+    for feedback in feedbacks[500:1000]:
+        index.add(feedback)
+    index.extend(feedbacks[1000:])
+    assert_same_preferences(index, feedbacks)
@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pytest
+
+import model_artifacts
+
+sklearn = pytest.importorskip('sklearn')
+from sklearn.preprocessing import LabelEncoder  # noqa: E402
+from sklearn.tree import DecisionTreeClassifier  # noqa: E402
+
+
+def fit(seed):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.integers(0, 4, 200), rng.uniform(-5, 45, 200), rng.uniform(0, 100, 200)])
+    y = rng.integers(0, 3, 200)
+    return DecisionTreeClassifier(max_depth=6, random_state=seed).fit(X, y), X
+
+
+def convert(tmp_path, model):
+    sources = {}
+    for name in ('model', 'feature_encoder', 'target_encoder'):
+        path = tmp_path / f'{name}.pkl'
+        path.write_bytes(name.encode())
+        sources[name] = str(path)
+    features = LabelEncoder().fit(['Sunny_Happy', 'Rainy_Sad', 'Snowy_Tired', 'Cloudy_Calm'])
+    targets = LabelEncoder().fit(['Chai', 'Latte', 'Lemonade'])
+    return model_artifacts.convert(model, features, targets, sources, str(tmp_path / 'artifacts'))
+
+
+def test_round_trip(tmp_path):
+    model, X = fit(0)
+    convert(tmp_path, model)
+    compact, _, targets = model_artifacts.load(str(tmp_path / 'artifacts'))
+    assert (compact.predict(X) == model.predict(X)).all()
+    assert list(targets.classes_) == ['Chai', 'Latte', 'Lemonade']
+
+
+def test_reconvert_leaves_mapped_generation_intact(tmp_path):
+    artifact_dir = str(tmp_path / 'artifacts')
+    old_model, X = fit(0)
+    first = convert(tmp_path, old_model)
+    mapped, _, _ = model_artifacts.load(artifact_dir)
+    before = np.array(mapped.threshold)
+
+    new_model, _ = fit(1)
+    second = convert(tmp_path, new_model)
+    assert second['dir'] != first['dir']
+    assert not os.path.exists(os.path.join(artifact_dir, first['dir']))
+
+    # The old mapping still reads the old arrays, the new load the new ones
+    assert (np.array(mapped.threshold) == before).all()
+    assert (mapped.predict(X) == old_model.predict(X)).all()
+    reloaded, _, _ = model_artifacts.load(artifact_dir)
+    assert (reloaded.predict(X) == new_model.predict(X)).all()
+
+
+def test_reconvert_same_model_keeps_generation(tmp_path):
+    model, _ = fit(0)
+    assert convert(tmp_path, model)['dir'] == convert(tmp_path, model)['dir']
+    assert len(os.listdir(tmp_path / 'artifacts')) == 2
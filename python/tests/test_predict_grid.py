@@ -0,0 +1,42 @@
+import threading
+
+import predict
+import prediction_grid
+
+
+class Model:
+    pass
+
+
+class Grid:
+    manifest = {}
+
+
+def test_stale_grid_is_rebuilt_off_the_request_path(monkeypatch):
+    stale, fresh = Grid(), Grid()
+    started, release = threading.Event(), threading.Event()
+    builds = []
+
+    def build(model, feature_encoder, sources, artifact_dir):
+        builds.append(model)
+        started.set()
+        release.wait(5)
+        return fresh
+
+    monkeypatch.setattr(predict, 'PREDICTION_GRID', 'auto')
+    monkeypatch.setattr(prediction_grid.PredictionGrid, 'load', staticmethod(lambda artifact_dir: stale))
+    monkeypatch.setattr(prediction_grid, 'is_fresh', lambda manifest, sources: False)
+    monkeypatch.setattr(prediction_grid, 'build', build)
+
+    model = Model()
+    # Served live while the rebuild runs, and the rebuild starts only once
+    assert predict.get_prediction_grid(model, None) is None
+    assert started.wait(5)
+    assert predict.get_prediction_grid(model, None) is None
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'grid-rebuild':
+            thread.join(5)
+    assert predict.get_prediction_grid(model, None) is fresh
+    assert builds == [model]
@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+
+import predict_with_feedback
+from feedback_index import FeedbackIndex
+from prediction_cache import PredictionCache
+from rules import BEVERAGE_RULES
+
+WEATHERS = ['Sunny', 'Rainy', 'Snowy', 'Cloudy']
+MOODS = ['Happy', 'Sad', 'Tired', 'Angry']
+# Band edges and points that rounding would push across one
+TEMPERATURES = [4.6, 9.5, 10, 14.5, 19.6, 20, 24.5, 25.4, 30.5, 34.6, 35, 35.3, 35.6, 40.2]
+
+
+def feedbacks():
+    """Likes and dislikes spread over the temperatures, so windows differ by a degree"""
+    beverages = sorted({b for options in BEVERAGE_RULES.values() for b in options})
+    records = []
+    for i, (weather, mood) in enumerate(itertools.product(WEATHERS, MOODS)):
+        for j, temperature in enumerate(range(0, 45, 3)):
+            records.append({'weather': weather, 'mood': mood, 'temperature': temperature + 0.5,
+                            'recommended_beverage': beverages[(i + j) % len(beverages)],
+                            'liked': (i + j) % 3 != 0})
+    return records
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = FeedbackIndex.from_feedbacks(feedbacks())
+    monkeypatch.setattr(predict_with_feedback, 'get_feedback_index', lambda: index)
+    return index
+
+
+def test_make_key_keeps_exact_temperature():
+    assert PredictionCache.make_key('Sunny', 'Happy', 24.0) == PredictionCache.make_key('Sunny', 'Happy', 24)
+    assert PredictionCache.make_key('Sunny', 'Happy', 35.3) != PredictionCache.make_key('Sunny', 'Happy', 35)
+
+
+def test_cache_matches_uncached_candidates(index, monkeypatch):
+    monkeypatch.setattr(predict_with_feedback, '_prediction_cache', PredictionCache(capacity=4096))
+    for weather, mood in itertools.product(WEATHERS, MOODS):
+        # Warm the cache with the neighbouring whole degrees first
+        for temperature in TEMPERATURES:
+            predict_with_feedback.get_candidates(weather, mood, round(temperature))
+        for temperature in TEMPERATURES:
+            expected = predict_with_feedback.build_candidates(index, weather, mood, temperature)
+            for _ in range(2):
+                candidates, preferences = predict_with_feedback.get_candidates(weather, mood, temperature)
+                assert candidates == expected[0], (weather, mood, temperature)
+                assert preferences == expected[1], (weather, mood, temperature)
+    assert predict_with_feedback._prediction_cache.hits > 0
+
+
+def test_invalidate_drops_entries_whose_window_covers_feedback():
+    cache = PredictionCache()
+    for temperature in (20, 24.5, 25.6, 31):
+        cache.put(cache.make_key('Sunny', 'Happy', temperature), object())
+    cache.invalidate('Sunny', 'Happy', 30.5)
+    assert [t for t in (20, 24.5, 25.6, 31) if cache.get(cache.make_key('Sunny', 'Happy', t))] == [20, 24.5]
@@ -0,0 +1,105 @@
+import itertools
+import types
+from collections import Counter
+from fractions import Fraction
+
+import pytest
+
+from predict_with_feedback import build_candidates
+from rules import (BEVERAGE_RULES, FEEDBACK_FALLBACK_RULES, FEEDBACK_TABLE, MOCK_TABLE, MOOD_FALLBACK_DEFAULTS,
+                   MOOD_FALLBACK_RULES, lookup)
+from vocab import BEVERAGES
+
+WEATHERS = sorted({weather for weather, _ in BEVERAGE_RULES}) + ['Unknown']
+MOODS = sorted({mood for _, mood in BEVERAGE_RULES}) + ['Unknown']
+# Every band, both sides of each edge, and fractional points
+TEMPERATURES = [-5, 9.9, 10, 10.1, 19.9, 20, 22.5, 25, 25.1, 30, 35, 35.1, 35.3, 42]
+
+PREFERENCES = [
+    {'liked': [], 'disliked': []},
+    {'liked': ['Lemonade', 'Hot Chocolate'], 'disliked': ['Iced Coffee']},
+    {'liked': ['Green Tea'], 'disliked': ['Hot Coffee', 'Hot Tea', 'Hot Chocolate', 'Cappuccino']},
+    {'liked': [], 'disliked': sorted({b for options in FEEDBACK_FALLBACK_RULES.values() for b in options})},
+]
+
+
+def old_mock_options(weather, mood, temperature):
+    """The list the original mock_predict_beverage handed to random.choice"""
+    if (weather, mood) in BEVERAGE_RULES:
+        return BEVERAGE_RULES[(weather, mood)]
+    if temperature > 35:
+        band = 'very_hot'
+    elif temperature > 25:
+        band = 'warm'
+    elif temperature < 10:
+        band = 'very_cold'
+    elif temperature < 20:
+        band = 'cool'
+    else:
+        band = 'moderate'
+    return MOOD_FALLBACK_RULES[band].get(mood, MOOD_FALLBACK_DEFAULTS[band])
+
+
+def old_feedback_options(weather, mood, temperature, preferences):
+    """The weighted list the original predict_beverage_with_feedback handed to random.choice"""
+    key = (weather, mood)
+    if key in BEVERAGE_RULES:
+        options = BEVERAGE_RULES[key].copy()
+    elif temperature > 35:
+        options = FEEDBACK_FALLBACK_RULES['very_hot']
+    elif temperature > 25:
+        options = FEEDBACK_FALLBACK_RULES['warm']
+    elif temperature < 10:
+        options = FEEDBACK_FALLBACK_RULES['very_cold']
+    elif temperature < 20:
+        options = FEEDBACK_FALLBACK_RULES['cool']
+    else:
+        options = FEEDBACK_FALLBACK_RULES['moderate']
+
+    filtered_options = [b for b in options if b not in preferences['disliked']] or options
+    weighted_options = []
+    for beverage in filtered_options:
+        weighted_options.extend([beverage] * (3 if beverage in preferences['liked'] else 1))
+    return weighted_options
+
+
+def distribution(items, weights=None):
+    """Normalized {beverage: probability}"""
+    counts = Counter()
+    for i, item in enumerate(items):
+        counts[item] += weights[i] if weights else 1
+    total = sum(counts.values())
+    return {item: Fraction(count, total) for item, count in counts.items()}
+
+
+def candidates_distribution(candidates):
+    cum_weights = candidates.cum_weights
+    weights = [cum_weights[0]] + [b - a for a, b in zip(cum_weights, cum_weights[1:])]
+    return distribution(candidates.beverages, weights)
+
+
+@pytest.mark.parametrize('weather', WEATHERS)
+def test_mock_table_matches_old_rules(weather):
+    for mood, temperature in itertools.product(MOODS, TEMPERATURES):
+        assert (candidates_distribution(lookup(MOCK_TABLE, weather, mood, temperature)) ==
+                distribution(old_mock_options(weather, mood, temperature))), (weather, mood, temperature)
+
+
+@pytest.mark.parametrize('preferences', PREFERENCES)
+def test_feedback_table_matches_old_rules(preferences):
+    index = types.SimpleNamespace(
+        total=0,
+        preference_ids=lambda *args: ({BEVERAGES.add(b) for b in preferences['liked']},
+                                      {BEVERAGES.add(b) for b in preferences['disliked']}))
+    for weather, mood, temperature in itertools.product(WEATHERS, MOODS, TEMPERATURES):
+        candidates, _ = build_candidates(index, weather, mood, temperature)
+        assert (candidates_distribution(candidates) ==
+                distribution(old_feedback_options(weather, mood, temperature, preferences))), \
+            (weather, mood, temperature)
+
+
+def test_feedback_table_without_feedback_is_the_compiled_entry():
+    index = types.SimpleNamespace(total=0, preference_ids=lambda *args: (set(), set()))
+    for weather, mood, temperature in itertools.product(WEATHERS, MOODS, TEMPERATURES):
+        candidates, _ = build_candidates(index, weather, mood, temperature)
+        assert candidates is lookup(FEEDBACK_TABLE, weather, mood, temperature)
@@ -0,0 +1,76 @@
+import json
+
+from feedback_log import FeedbackLogReader
+from user_profiles import UserProfiles
+
+
+def feedback(user_id, beverage, liked=True):
+    return {'weather': 'Sunny', 'mood': 'Happy', 'temperature': 25,
+            'recommended_beverage': beverage, 'liked': liked, 'user_id': user_id}
+
+
+def append(log_dir, segment, *records):
+    with open(log_dir / f'segment-{segment:06d}.jsonl', 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def compact(log_dir, through_segment):
+    """What services/feedbackLog.js compact() leaves behind (counts do not matter here)"""
+    snapshot = {'version': 1, 'through_segment': through_segment, 'total': 0, 'recent': [], 'counts': []}
+    (log_dir / 'snapshot.json').write_text(json.dumps(snapshot))
+    for n in range(1, through_segment + 1):
+        (log_dir / f'segment-{n:06d}.jsonl').unlink(missing_ok=True)
+
+
+def make_profiles(tmp_path, log_dir):
+    reader = FeedbackLogReader(str(log_dir), str(tmp_path / 'feedback.json'))
+    return UserProfiles(str(tmp_path / 'profiles.sqlite3'), reader=reader)
+
+
+def test_ingest_counts_each_record_once(tmp_path):
+    log_dir = tmp_path / 'feedback_log'
+    log_dir.mkdir()
+    append(log_dir, 1, feedback('alice', 'Iced Coffee'), feedback('bob', 'Iced Coffee', liked=False))
+    append(log_dir, 2, feedback('alice', 'Iced Coffee'))
+
+    profiles = make_profiles(tmp_path, log_dir)
+    assert profiles.ingest() == 3
+    assert profiles.ingest() == 0
+    assert profiles.score(profiles.get('alice'), 'Iced Coffee') == 2
+    assert profiles.score(profiles.get('bob'), 'Iced Coffee') == -1
+
+
+def test_compaction_does_not_replay_active_segment(tmp_path):
+    log_dir = tmp_path / 'feedback_log'
+    log_dir.mkdir()
+    append(log_dir, 1, feedback('alice', 'Iced Coffee'))
+    append(log_dir, 2, feedback('alice', 'Iced Coffee'))
+
+    profiles = make_profiles(tmp_path, log_dir)
+    profiles.ingest()
+    compact(log_dir, 1)
+    profiles.refresh()
+    assert profiles.ingest() == 0
+    assert profiles.preferences('alice') == {'liked': ['Iced Coffee'], 'disliked': []}
+    assert profiles.score(profiles.get('alice'), 'Iced Coffee') == 2
+
+    append(log_dir, 2, feedback('alice', 'Iced Coffee', liked=False))
+    profiles.refresh()
+    assert profiles.score(profiles.get('alice'), 'Iced Coffee') == 1
+
+
+def test_compaction_past_reader_returns_snapshot(tmp_path):
+    log_dir = tmp_path / 'feedback_log'
+    log_dir.mkdir()
+    append(log_dir, 1, feedback('alice', 'Iced Coffee'))
+
+    reader = FeedbackLogReader(str(log_dir), str(tmp_path / 'feedback.json'))
+    reader.read_updates()
+    append(log_dir, 2, feedback('alice', 'Hot Tea'))
+    append(log_dir, 3, feedback('alice', 'Hot Tea'))
+    compact(log_dir, 2)
+
+    snapshot, records = reader.read_updates()
+    assert snapshot['through_segment'] == 2
+    assert [r['recommended_beverage'] for r in records] == ['Hot Tea']
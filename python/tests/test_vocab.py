@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+
+import predict
+from model_registry import ModelSlot
+from vocab import Vocabulary
+
+
+class Encoder:
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+
+class Model:
+    def predict(self, features):
+        return np.zeros(len(features), dtype=np.int64)
+
+
+def test_concurrent_add_assigns_each_name_one_id():
+    vocab = Vocabulary()
+    names = [f'name-{i}' for i in range(2000)]
+    barrier = threading.Barrier(8)
+    results = []
+
+    def intern(offset):
+        barrier.wait()
+        results.append({name: vocab.add(name) for name in names[offset:] + names[:offset]})
+
+    threads = [threading.Thread(target=intern, args=(i * 250,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(vocab.names) == sorted(names)
+    assert all(ids == results[0] for ids in results)
+    assert all(vocab.names[vocab.get(name)] == name for name in names)
+
+
+def test_serving_uses_the_codes_warmed_for_the_slot(monkeypatch):
+    monkeypatch.setattr(predict, 'PREDICTION_GRID', 'off')
+    loaded = (Model(), Encoder(['Sunny_Happy', 'Rainy_Sad']), Encoder(['Chai', 'Lemonade']))
+    slot = ModelSlot(1, loaded, {}, {})
+    predict.warm_model(slot)
+    assert predict.get_feature_codes(slot.feature_encoder, slot.target_encoder) is slot.codes
+    assert predict.predict_beverage('Sunny', 'Happy', 30, 40, *loaded) == 'Chai'
+
+    other = Encoder(['Chai', 'Lemonade'])
+    assert predict.get_feature_codes(slot.feature_encoder, other) is not slot.codes
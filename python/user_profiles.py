@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Per-user beverage preference profiles for the feedback-learning predictor
+A profile is a sparse score vector: for each beverage the user rated, likes
+minus dislikes. Profiles live in a local SQLite database and the ones in use
+are kept in an LRU-bounded in-memory tier, so a request costs one dict lookup
+(or one primary-key read on a miss) and memory stays capped however many
+users there are.
+
+Profiles are built from feedback log records that carry a "user_id". Any
+worker can ingest new records; the database stores the log position it
+covers and ingestion runs in one write transaction, so every record is
+counted exactly once however many workers share the database. Records folded
+into a log snapshot before anyone ingested them are lost to the profiles,
+since the snapshot keeps no user ids; workers ingest on every request, so in
+practice that only happens to feedback given while no predictions run.
+
+Usage: python python/user_profiles.py ingest | show USER_ID
+"""
+
+import os
+import sys
+import json
+import sqlite3
+from array import array
+from collections import OrderedDict
+
+from feedback_log import DATA_DIR, FeedbackLogReader
+
+PROFILES_FILE = os.path.join(DATA_DIR, 'user_profiles.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS beverages (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS profiles (user_id TEXT PRIMARY KEY, scores BLOB NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def user_key(user_id):
+    """Profile key for a request or feedback user_id (None when there is none)"""
+    if isinstance(user_id, bool) or not isinstance(user_id, (str, int)) or user_id == '':
+        return None
+    return str(user_id)
+
+
+class UserProfile:
+    """
+    Sparse beverage score vector: parallel int32 arrays of database
+    beverage ids and scores (likes - dislikes), serialized as one blob
+    """
+
+    __slots__ = ('ids', 'scores')
+
+    def __init__(self, blob=None):
+        self.ids = array('i')
+        self.scores = array('i')
+        if blob:
+            pairs = array('i')
+            pairs.frombytes(blob)
+            self.ids = pairs[0::2]
+            self.scores = pairs[1::2]
+
+    def score(self, beverage_id):
+        try:
+            return self.scores[self.ids.index(beverage_id)]
+        except ValueError:
+            return 0
+
+    def add(self, beverage_id, delta):
+        try:
+            self.scores[self.ids.index(beverage_id)] += delta
+        except ValueError:
+            self.ids.append(beverage_id)
+            self.scores.append(delta)
+
+    def to_blob(self):
+        pairs = array('i', bytes(8 * len(self.ids)))
+        pairs[0::2] = self.ids
+        pairs[1::2] = self.scores
+        return pairs.tobytes()
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class UserProfiles:
+    """
+    SQLite-backed profile store with an LRU of hot profiles
+
+    refresh() tails the feedback log: when new records carry user ids it
+    ingests them and drops those users from the LRU, so their next lookup
+    reads the updated profile.
+    """
+
+    def __init__(self, path=PROFILES_FILE, capacity=10000, reader=None):
+        self.path = path
+        self.capacity = capacity
+        self.reader = reader or FeedbackLogReader()
+        self._db = None
+        self._hot = OrderedDict()        # user key -> UserProfile
+        self._beverage_ids = {}          # name -> database id
+        self._beverage_names = {}        # database id -> name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.ingested = 0
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+            self._load_beverages()
+        return self._db
+
+    def _load_beverages(self):
+        for id_, name in self._db.execute('SELECT id, name FROM beverages'):
+            self._beverage_ids[name] = id_
+            self._beverage_names[id_] = name
+
+    def _beverage_id(self, name, create=False):
+        id_ = self._beverage_ids.get(name)
+        if id_ is None and create:
+            db = self._connect()
+            db.execute('INSERT OR IGNORE INTO beverages (name) VALUES (?)', (name,))
+            id_ = db.execute('SELECT id FROM beverages WHERE name = ?', (name,)).fetchone()[0]
+            self._beverage_ids[name] = id_
+            self._beverage_names[id_] = name
+        return id_
+
+    def get(self, user_id):
+        """
+        Profile for a user (empty when they have given no feedback); every
+        beverage id in it is known to score() and preferences()
+        """
+        key = user_key(user_id)
+        if key is None:
+            return UserProfile()
+        profile = self._hot.get(key)
+        if profile is not None:
+            self.hits += 1
+            self._hot.move_to_end(key)
+            return profile
+
+        self.misses += 1
+        row = self._connect().execute('SELECT scores FROM profiles WHERE user_id = ?', (key,)).fetchone()
+        profile = UserProfile(row[0] if row else None)
+        if any(id_ not in self._beverage_names for id_ in profile.ids):
+            # Beverages another worker added while ingesting since we last looked
+            self._load_beverages()
+        self._hot[key] = profile
+        if len(self._hot) > self.capacity:
+            self._hot.popitem(last=False)
+            self.evictions += 1
+        return profile
+
+    def score(self, profile, beverage):
+        """A profile's score for a beverage name"""
+        beverage_id = self._beverage_id(beverage)
+        return 0 if beverage_id is None else profile.score(beverage_id)
+
+    def preferences(self, user_id):
+        """Beverage names the user likes and dislikes on balance"""
+        profile = self.get(user_id)
+        liked = [self._beverage_names[id_] for id_, score in zip(profile.ids, profile.scores) if score > 0]
+        disliked = [self._beverage_names[id_] for id_, score in zip(profile.ids, profile.scores) if score < 0]
+        return {'liked': liked, 'disliked': disliked}
+
+    def refresh(self):
+        """Ingest new user feedback from the log and forget the stale hot profiles"""
+        snapshot, records = self.reader.read_updates()
+        users = {user_key(record.get('user_id')) for record in records if isinstance(record, dict)}
+        users.discard(None)
+        if not users:
+            return
+        self.ingest()
+        for key in users:
+            self._hot.pop(key, None)
+
+    def ingest(self):
+        """Apply every user-tagged record after the stored log position; returns how many"""
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute("SELECT value FROM meta WHERE key = 'position'").fetchone()
+            reader = FeedbackLogReader(self.reader.log_dir, self.reader.legacy_file)
+            if row:
+                reader.seek(json.loads(row[0]))
+            snapshot, records = reader.read_updates()
+            if snapshot is not None and row:
+                print("Warning: Feedback log was compacted past the user profiles; "
+                      "some user feedback was not applied", file=sys.stderr)
+
+            # Net score change per (user, beverage), then one read-modify-write per user
+            deltas = {}
+            for record in records:
+                if not isinstance(record, dict):
+                    continue
+                key = user_key(record.get('user_id'))
+                beverage = record.get('recommended_beverage')
+                if key is None or not isinstance(beverage, str):
+                    continue
+                user_deltas = deltas.setdefault(key, {})
+                user_deltas[beverage] = user_deltas.get(beverage, 0) + (1 if record.get('liked') else -1)
+
+            for key, user_deltas in deltas.items():
+                row = db.execute('SELECT scores FROM profiles WHERE user_id = ?', (key,)).fetchone()
+                profile = UserProfile(row[0] if row else None)
+                for beverage, delta in user_deltas.items():
+                    profile.add(self._beverage_id(beverage, create=True), delta)
+                db.execute('INSERT OR REPLACE INTO profiles (user_id, scores) VALUES (?, ?)',
+                           (key, profile.to_blob()))
+
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('position', ?)",
+                       (json.dumps(reader.position()),))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            # Names created in the rolled-back transaction do not exist
+            self._beverage_ids.clear()
+            self._beverage_names.clear()
+            self._load_beverages()
+            raise
+        self.ingested += len(records)
+        return len(records)
+
+    def stats(self):
+        return {
+            "size": len(self._hot),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "ingested": self.ingested
+        }
+
+
+def main():
+    profiles = UserProfiles()
+    if len(sys.argv) > 1 and sys.argv[1] == 'ingest':
+        print(json.dumps({"ingested": profiles.ingest()}))
+    elif len(sys.argv) > 2 and sys.argv[1] == 'show':
+        profiles.ingest()
+        print(json.dumps(profiles.preferences(sys.argv[2]), indent=2))
+    else:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
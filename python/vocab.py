@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Interned vocabularies for weather, mood and beverage names
+Each name gets a small dense integer id the first time it is seen, so the
+predictors can key tables, count arrays and membership tests on ints and
+only turn ids back into strings when building the JSON result.
+
+The rule tables (rules.py) intern their names at import time, the model
+predictor adds the encoder classes when it loads, and feedback adds
+whatever users sent. Ids are only meaningful within one process.
+"""
+
+import threading
+
+
+class Vocabulary:
+    """Bidirectional name <-> id mapping; ids are assigned in first-seen order"""
+
+    __slots__ = ('names', '_ids', '_lock')
+
+    def __init__(self, names=()):
+        self.names = []
+        self._ids = {}
+        # Model watcher and shadow scorer threads intern names alongside requests
+        self._lock = threading.Lock()
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        """Id for name, interning it if new"""
+        id_ = self._ids.get(name)
+        if id_ is None:
+            with self._lock:
+                id_ = self._ids.get(name)
+                if id_ is None:
+                    # Name first, so a reader never sees an id past the end of names
+                    self.names.append(name)
+                    id_ = self._ids[name] = len(self.names) - 1
+        return id_
+
+    def get(self, name, default=-1):
+        """Id for name without interning it (`default` when unknown)"""
+        return self._ids.get(name, default)
+
+    def encode(self, names):
+        """Ids for many names, -1 for unknown ones"""
+        ids = self._ids
+        return [ids.get(name, -1) for name in names]
+
+    def decode(self, ids):
+        names = self.names
+        return [names[i] for i in ids]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+
+# Process-wide vocabularies shared by the rule tables, feedback index and model
+WEATHERS = Vocabulary()
+MOODS = Vocabulary()
+BEVERAGES = Vocabulary()
+
+
+class FeatureCodes:
+    """
+    Integer view of a fitted "Weather_Mood" feature encoder and target encoder
+
+    `pair_codes[weather_id, mood_id]` is the encoded feature (or -1 when the
+    encoder never saw the pair), so requests are encoded by two dict lookups
+    and an array index instead of building a key string and calling
+    LabelEncoder.transform. Predicted class codes decode by indexing
+    `target_names`.
+    """
+
+    def __init__(self, feature_encoder, target_encoder):
+        import numpy as np
+
+        pairs = []
+        for code, key in enumerate(feature_encoder.classes_):
+            weather, sep, mood = str(key).partition('_')
+            if sep:
+                pairs.append((WEATHERS.add(weather), MOODS.add(mood), code))
+
+        self.pair_codes = np.full((len(WEATHERS), len(MOODS)), -1, dtype=np.int32)
+        for weather_id, mood_id, code in pairs:
+            self.pair_codes[weather_id, mood_id] = code
+
+        self.target_names = np.asarray(target_encoder.classes_, dtype=object)
+        for name in self.target_names:
+            BEVERAGES.add(str(name))
+
+    def code(self, weather, mood):
+        """Encoded feature for one request, -1 when unknown"""
+        weather_id = WEATHERS.get(weather)
+        mood_id = MOODS.get(mood)
+        if weather_id < 0 or mood_id < 0:
+            return -1
+        rows, cols = self.pair_codes.shape
+        if weather_id >= rows or mood_id >= cols:
+            return -1
+        return int(self.pair_codes[weather_id, mood_id])
+
+    def codes(self, weathers, moods):
+        """Encoded features for columns of weathers and moods as an int32 array (-1 = unknown)"""
+        import numpy as np
+
+        rows, cols = self.pair_codes.shape
+        weather_ids = np.array(WEATHERS.encode(weathers), dtype=np.int32)
+        mood_ids = np.array(MOODS.encode(moods), dtype=np.int32)
+        # Names interned after this table was built are unknown to the encoder too
+        known = (weather_ids >= 0) & (weather_ids < rows) & (mood_ids >= 0) & (mood_ids < cols)
+        codes = np.full(len(weather_ids), -1, dtype=np.int32)
+        codes[known] = self.pair_codes[weather_ids[known], mood_ids[known]]
+        return codes
+
+    def decode(self, class_codes):
+        """Beverage names for predicted target codes"""
+        import numpy as np
+        return self.target_names[np.asarray(class_codes, dtype=np.intp)]
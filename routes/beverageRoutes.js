@@ -1,13 +1,13 @@
 const express = require('express');
 const router = express.Router();
 const { recommendBeverage, getRecommendationWithLocation, submitFeedback, getFeedbackStatistics } = require('../controllers/beverageController');
-const { validateRecommendationInput } = require('../middleware/validation');
+const { validateRecommendationInput, validateTopK } = require('../middleware/validation');
 
 /**
  * @route   POST /api/beverage/recommend
  * @desc    Get beverage recommendation based on manual input
  * @access  Public
- * @body    { weather, mood, temperature, humidity }
+ * @body    { weather, mood, temperature, humidity, top_k? }
  */
 router.post('/recommend', validateRecommendationInput, recommendBeverage);
 
@@ -15,9 +15,9 @@ router.post('/recommend', validateRecommendationInput, recommendBeverage);
  * @route   POST /api/beverage/recommend-location
  * @desc    Get beverage recommendation based on user location
  * @access  Public
- * @body    { latitude, longitude, mood }
+ * @body    { latitude, longitude, mood, top_k? }
  */
-router.post('/recommend-location', getRecommendationWithLocation);
+router.post('/recommend-location', validateTopK, getRecommendationWithLocation);
 
 /**
  * @route   POST /api/beverage/feedback
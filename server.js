@@ -3,6 +3,10 @@ const cors = require('cors');
 const dotenv = require('dotenv');
 const beverageRoutes = require('./routes/beverageRoutes');
 const { errorHandler } = require('./middleware/errorHandler');
+const { serverTiming } = require('./middleware/serverTiming');
+const { getPredictorMetrics } = require('./services/pythonService');
+const { getWeatherCacheStats } = require('./services/weatherService');
+const { renderWeatherCacheMetrics } = require('./services/metrics');
 
 // Load environment variables
 dotenv.config();
@@ -15,6 +19,9 @@ app.use(cors());
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
 
+// Per-stage Server-Timing header (SERVER_TIMING=1), read by benchmarks/loadTest.js
+app.use(serverTiming);
+
 // Serve static files from public directory
 app.use(express.static('public'));
 
@@ -34,6 +41,17 @@ app.get('/health', (req, res) => {
   });
 });
 
+// Prometheus metrics: predictor call latency, per-stage timings from each Python worker
+// and weather cache counters
+app.get('/metrics', async (req, res, next) => {
+  try {
+    const body = await getPredictorMetrics() + renderWeatherCacheMetrics(getWeatherCacheStats());
+    res.type('text/plain; version=0.0.4').send(body);
+  } catch (error) {
+    next(error);
+  }
+});
+
 // API Routes
 app.use('/api/beverage', beverageRoutes);
 
@@ -52,6 +70,7 @@ app.use(errorHandler);
 app.listen(PORT, () => {
   console.log(`🚀 Server is running on port ${PORT}`);
   console.log(`📍 Health check: http://localhost:${PORT}/health`);
+  console.log(`📊 Metrics: http://localhost:${PORT}/metrics`);
   console.log(`🍹 Beverage API: http://localhost:${PORT}/api/beverage/recommend`);
   console.log(`⏰ Server time: ${new Date().toLocaleString()}`);
 });
@@ -0,0 +1,77 @@
+const path = require('path');
+const { WorkerPool } = require('./workerPool');
+const { getFeedbackStats, getFeedbackPatterns } = require('./feedbackService');
+const { getScheduler } = require('./pythonService');
+const { SchedulerRejection } = require('./predictionScheduler');
+
+// python/feedback_analytics.py keeps the feedback log as columns and caches
+// each report until the log changes; one persistent worker is enough
+const scriptPath = path.join(__dirname, '../python', 'feedback_analytics.py');
+const pythonExec = [process.env.PYTHON_PATH, 'python', 'python3', 'py'].filter(Boolean)[0];
+
+let analyticsPool = null;
+
+const getTimeoutMs = () => parseInt(process.env.FEEDBACK_ANALYTICS_TIMEOUT_MS, 10) || 10000;
+
+const getAnalyticsPool = () => {
+  if (!analyticsPool) {
+    analyticsPool = new WorkerPool({
+      pythonExec,
+      scriptPath,
+      size: 1,
+      requestTimeoutMs: getTimeoutMs()
+    });
+  }
+  return analyticsPool;
+};
+
+/**
+ * Feedback statistics and improvement patterns for GET /feedback/stats
+ * Computed by the Python analytics worker (FEEDBACK_ANALYTICS=js computes them
+ * in-process instead); falls back to the in-process scan if the worker fails.
+ * The worker call waits behind interactive predictions in the predictor
+ * scheduler and is shed (503) rather than scanned in-process when it is full.
+ * @returns {Promise<Object>} - { statistics, improvement_patterns }
+ */
+const getFeedbackAnalytics = async () => {
+  if (process.env.FEEDBACK_ANALYTICS !== 'js') {
+    try {
+      const result = await getScheduler().run(
+        (deadline) => getAnalyticsPool().predict({}, Math.max(1, deadline - Date.now())),
+        { priority: 'analytics', deadline: Date.now() + getTimeoutMs() }
+      );
+      if (result.error) {
+        throw new Error(result.error);
+      }
+      return {
+        statistics: result.statistics,
+        improvement_patterns: result.improvement_patterns
+      };
+    } catch (error) {
+      if (error instanceof SchedulerRejection) {
+        throw error;
+      }
+      console.error('⚠️  Feedback analytics worker failed, scanning in-process:', error.message);
+    }
+  }
+
+  return {
+    statistics: getFeedbackStats(),
+    improvement_patterns: getFeedbackPatterns()
+  };
+};
+
+/**
+ * Stop the analytics worker (used on shutdown)
+ */
+const closeAnalyticsPool = () => {
+  if (analyticsPool) {
+    analyticsPool.close();
+    analyticsPool = null;
+  }
+};
+
+module.exports = {
+  getFeedbackAnalytics,
+  closeAnalyticsPool
+};
@@ -0,0 +1,255 @@
+const fs = require('fs');
+const path = require('path');
+
+/**
+ * Append-only feedback log
+ *
+ * Layout of data/feedback_log/ (FEEDBACK_LOG_DIR overrides the location,
+ * e.g. for benchmarks/loadTest.js; python/feedback_log.py reads the same variable):
+ *   segment-000001.jsonl ...  one feedback JSON object per line, append-only.
+ *                             The highest-numbered segment is the active one.
+ *   snapshot.json             aggregate of every segment up to `through_segment`:
+ *                             { version, through_segment, total, recent,
+ *                               counts: [[weather, mood, tempBucket, beverage, likes, dislikes], ...] }
+ *
+ * Readers (this module and python/feedback_log.py) only consume complete
+ * lines, so a record torn by a crash is never seen half-written. Compaction
+ * writes the new snapshot atomically (write + rename) before deleting the
+ * segments it folded in.
+ */
+
+const DEFAULT_LOG_DIR = path.join(__dirname, '../data/feedback_log');
+const LEGACY_FEEDBACK_FILE = path.join(__dirname, '../data/feedback.json');
+
+const getLogDir = () => process.env.FEEDBACK_LOG_DIR || DEFAULT_LOG_DIR;
+const snapshotFile = () => path.join(getLogDir(), 'snapshot.json');
+
+// Start a new segment once the active one passes this size
+const SEGMENT_MAX_BYTES = 1024 * 1024;
+
+// Compact once this many sealed segments have piled up
+const COMPACT_AFTER_SEGMENTS = 4;
+
+// Raw records kept in the snapshot for "recent feedback" views
+const RECENT_LIMIT = 10;
+
+const segmentName = (n) => `segment-${String(n).padStart(6, '0')}.jsonl`;
+const segmentPath = (n) => path.join(getLogDir(), segmentName(n));
+
+/**
+ * Temperature bucket used by the snapshot: whole degrees, null when unknown
+ */
+const temperatureBucket = (temperature) => (
+  typeof temperature === 'number' && Number.isFinite(temperature) ? Math.floor(temperature) : null
+);
+
+/**
+ * List segment numbers in ascending order
+ */
+const listSegments = () => {
+  const logDir = getLogDir();
+  if (!fs.existsSync(logDir)) return [];
+  return fs.readdirSync(logDir)
+    .map(name => /^segment-(\d+)\.jsonl$/.exec(name))
+    .filter(Boolean)
+    .map(match => parseInt(match[1], 10))
+    .sort((a, b) => a - b);
+};
+
+const readSnapshot = () => {
+  try {
+    return JSON.parse(fs.readFileSync(snapshotFile(), 'utf8'));
+  } catch (error) {
+    return { version: 1, through_segment: 0, total: 0, recent: [], counts: [] };
+  }
+};
+
+/**
+ * Parse the complete lines of a segment; a torn trailing line is ignored
+ */
+const readSegment = (n) => {
+  let text;
+  try {
+    text = fs.readFileSync(segmentPath(n), 'utf8');
+  } catch (error) {
+    return [];
+  }
+
+  const complete = text.slice(0, text.lastIndexOf('\n') + 1);
+  const records = [];
+  for (const line of complete.split('\n')) {
+    if (!line) continue;
+    try {
+      records.push(JSON.parse(line));
+    } catch (error) {
+      console.error(`Skipping corrupt feedback line in ${segmentName(n)}`);
+    }
+  }
+  return records;
+};
+
+/**
+ * Drop a partially written trailing line left by a crash, so the next
+ * append does not glue a new record onto it
+ */
+const repairSegment = (n) => {
+  const file = segmentPath(n);
+  const text = fs.readFileSync(file);
+  if (text.length > 0 && text[text.length - 1] !== 0x0a) {
+    const keep = text.lastIndexOf(0x0a) + 1;
+    console.error(`Truncating torn record at end of ${segmentName(n)}`);
+    fs.truncateSync(file, keep);
+  }
+};
+
+let initialized = false;
+
+/**
+ * Create the log directory on first use, importing the legacy feedback.json
+ * as the first segment and repairing the active segment after a crash
+ */
+const ensureFeedbackLog = () => {
+  if (initialized) return;
+
+  if (!fs.existsSync(getLogDir())) {
+    fs.mkdirSync(getLogDir(), { recursive: true });
+
+    let legacy = [];
+    try {
+      legacy = JSON.parse(fs.readFileSync(LEGACY_FEEDBACK_FILE, 'utf8')).feedbacks || [];
+    } catch (error) {
+      // No legacy feedback to import
+    }
+    fs.writeFileSync(segmentPath(1), legacy.map(f => JSON.stringify(f) + '\n').join(''));
+  }
+
+  const segments = listSegments();
+  if (segments.length === 0) {
+    const snapshot = readSnapshot();
+    fs.writeFileSync(segmentPath(snapshot.through_segment + 1), '');
+  } else {
+    repairSegment(segments[segments.length - 1]);
+  }
+
+  initialized = true;
+};
+
+let compacting = false;
+
+/**
+ * Fold every sealed segment into snapshot.json and delete those segments.
+ * Runs asynchronously so the request that triggered it is not delayed.
+ */
+const compact = async () => {
+  if (compacting) return;
+  compacting = true;
+
+  try {
+    const snapshot = readSnapshot();
+    const segments = listSegments();
+    // Segments already in the snapshot are leftovers from an interrupted compaction
+    const stale = segments.filter(n => n <= snapshot.through_segment);
+    const sealed = segments.slice(0, -1).filter(n => n > snapshot.through_segment);
+    if (sealed.length === 0) return;
+
+    const counts = new Map();
+    for (const row of snapshot.counts) {
+      counts.set(JSON.stringify(row.slice(0, 4)), row);
+    }
+
+    let total = snapshot.total;
+    let recent = snapshot.recent;
+    for (const n of sealed) {
+      const records = readSegment(n);
+      for (const f of records) {
+        const keyParts = [f.weather ?? null, f.mood ?? null, temperatureBucket(f.temperature), f.recommended_beverage ?? null];
+        const key = JSON.stringify(keyParts);
+        let row = counts.get(key);
+        if (!row) {
+          row = [...keyParts, 0, 0];
+          counts.set(key, row);
+        }
+        row[f.liked ? 4 : 5]++;
+        total++;
+      }
+      recent = recent.concat(records).slice(-RECENT_LIMIT);
+    }
+
+    const next = {
+      version: 1,
+      through_segment: sealed[sealed.length - 1],
+      total,
+      recent,
+      counts: Array.from(counts.values())
+    };
+
+    // Write + fsync + rename so readers see either the old or the new snapshot
+    const tmpFile = `${snapshotFile()}.tmp`;
+    const handle = await fs.promises.open(tmpFile, 'w');
+    try {
+      await handle.writeFile(JSON.stringify(next));
+      await handle.sync();
+    } finally {
+      await handle.close();
+    }
+    await fs.promises.rename(tmpFile, snapshotFile());
+
+    await Promise.all(stale.concat(sealed).map(n => fs.promises.unlink(segmentPath(n)).catch(() => {})));
+    console.log(`🗜️  Compacted ${sealed.length} feedback segments (${total} records in snapshot)`);
+  } catch (error) {
+    console.error('Feedback compaction failed:', error);
+  } finally {
+    compacting = false;
+  }
+};
+
+/**
+ * Append one feedback record as a single line and fsync it
+ */
+const appendRecord = (record) => {
+  ensureFeedbackLog();
+
+  const segments = listSegments();
+  let active = segments[segments.length - 1];
+  if (fs.statSync(segmentPath(active)).size >= SEGMENT_MAX_BYTES) {
+    active++;
+  }
+
+  const fd = fs.openSync(segmentPath(active), 'a');
+  try {
+    fs.writeSync(fd, JSON.stringify(record) + '\n');
+    fs.fdatasyncSync(fd);
+  } finally {
+    fs.closeSync(fd);
+  }
+
+  if (active - segments[0] >= COMPACT_AFTER_SEGMENTS) {
+    setImmediate(compact);
+  }
+};
+
+/**
+ * Read the whole log: the compacted snapshot plus raw records not yet compacted
+ * @returns {{ snapshot: Object, records: Object[] }}
+ */
+const readLog = () => {
+  ensureFeedbackLog();
+
+  // Segments can be compacted away between the two reads; retry once if so
+  for (let attempt = 0; ; attempt++) {
+    const snapshot = readSnapshot();
+    const segments = listSegments().filter(n => n > snapshot.through_segment);
+    const missing = segments.length > 0 && segments[0] !== snapshot.through_segment + 1;
+    if (!missing || attempt > 0) {
+      return { snapshot, records: segments.flatMap(readSegment) };
+    }
+  }
+};
+
+module.exports = {
+  getLogDir,
+  appendRecord,
+  readLog,
+  compact,
+  temperatureBucket
+};
@@ -1,30 +1,12 @@
-const fs = require('fs');
-const path = require('path');
-
-// Feedback storage file
-const FEEDBACK_FILE = path.join(__dirname, '../data/feedback.json');
-
-/**
- * Ensure feedback directory and file exist
- */
-const ensureFeedbackFile = () => {
-  const dir = path.dirname(FEEDBACK_FILE);
-  if (!fs.existsSync(dir)) {
-    fs.mkdirSync(dir, { recursive: true });
-  }
-  if (!fs.existsSync(FEEDBACK_FILE)) {
-    fs.writeFileSync(FEEDBACK_FILE, JSON.stringify({ feedbacks: [] }, null, 2));
-  }
-};
+const { appendRecord, readLog, temperatureBucket } = require('./feedbackLog');
 
 /**
  * Load feedback data
+ * Returns the raw records that have not been compacted into the snapshot yet
  */
 const loadFeedback = () => {
-  ensureFeedbackFile();
   try {
-    const data = fs.readFileSync(FEEDBACK_FILE, 'utf8');
-    return JSON.parse(data);
+    return { feedbacks: readLog().records };
   } catch (error) {
     console.error('Error loading feedback:', error);
     return { feedbacks: [] };
@@ -32,38 +14,36 @@ const loadFeedback = () => {
 };
 
 /**
- * Save feedback data
+ * Aggregate the whole log into [weather, mood, tempBucket, beverage, likes, dislikes] rows
  */
-const saveFeedback = (data) => {
-  try {
-    fs.writeFileSync(FEEDBACK_FILE, JSON.stringify(data, null, 2));
-    return true;
-  } catch (error) {
-    console.error('Error saving feedback:', error);
-    return false;
+const loadFeedbackCounts = () => {
+  const { snapshot, records } = readLog();
+  const rows = snapshot.counts.slice();
+  for (const f of records) {
+    rows.push([
+      f.weather, f.mood, temperatureBucket(f.temperature), f.recommended_beverage,
+      f.liked ? 1 : 0, f.liked ? 0 : 1
+    ]);
   }
+  return {
+    total: snapshot.total + records.length,
+    rows,
+    recent: snapshot.recent.concat(records).slice(-10)
+  };
 };
 
 /**
  * Add new feedback
+ * Appended to the feedback log as a single line; nothing is ever rewritten or trimmed
  */
 const addFeedback = (feedbackData) => {
-  const data = loadFeedback();
-  
   const feedback = {
     id: Date.now().toString(),
     timestamp: new Date().toISOString(),
     ...feedbackData
   };
   
-  data.feedbacks.push(feedback);
-  
-  // Keep only last 1000 feedbacks
-  if (data.feedbacks.length > 1000) {
-    data.feedbacks = data.feedbacks.slice(-1000);
-  }
-  
-  saveFeedback(data);
+  appendRecord(feedback);
   return feedback;
 };
 
@@ -71,10 +51,9 @@ const addFeedback = (feedbackData) => {
  * Get feedback statistics
  */
 const getFeedbackStats = () => {
-  const data = loadFeedback();
-  const feedbacks = data.feedbacks;
+  const { total, rows, recent } = loadFeedbackCounts();
   
-  if (feedbacks.length === 0) {
+  if (total === 0) {
     return {
       total: 0,
       satisfied: 0,
@@ -85,22 +64,20 @@ const getFeedbackStats = () => {
     };
   }
   
-  const satisfied = feedbacks.filter(f => f.liked === true).length;
-  const dissatisfied = feedbacks.filter(f => f.liked === false).length;
+  let satisfied = 0;
+  let dissatisfied = 0;
   
   // Count beverage occurrences by satisfaction
   const beverageStats = {};
-  feedbacks.forEach(f => {
-    const beverage = f.recommended_beverage;
+  rows.forEach(([, , , beverage, likes, dislikes]) => {
+    satisfied += likes;
+    dissatisfied += dislikes;
     if (!beverageStats[beverage]) {
       beverageStats[beverage] = { likes: 0, dislikes: 0, total: 0 };
     }
-    beverageStats[beverage].total++;
-    if (f.liked) {
-      beverageStats[beverage].likes++;
-    } else {
-      beverageStats[beverage].dislikes++;
-    }
+    beverageStats[beverage].total += likes + dislikes;
+    beverageStats[beverage].likes += likes;
+    beverageStats[beverage].dislikes += dislikes;
   });
   
   // Calculate satisfaction rate for each beverage
@@ -121,13 +98,13 @@ const getFeedbackStats = () => {
     .slice(0, 5);
   
   return {
-    total: feedbacks.length,
+    total,
     satisfied,
     dissatisfied,
-    satisfactionRate: ((satisfied / feedbacks.length) * 100).toFixed(2),
+    satisfactionRate: ((satisfied / total) * 100).toFixed(2),
     topBeverages,
     worstBeverages,
-    recentFeedbacks: feedbacks.slice(-10).reverse()
+    recentFeedbacks: recent.reverse()
   };
 };
 
@@ -135,24 +112,27 @@ const getFeedbackStats = () => {
  * Get feedback patterns for retraining
  */
 const getFeedbackPatterns = () => {
-  const data = loadFeedback();
-  const feedbacks = data.feedbacks.filter(f => f.liked === false); // Focus on negative feedback
+  const { rows } = loadFeedbackCounts();
   
-  // Group by input patterns
+  // Group by input patterns, focusing on negative feedback
   const patterns = {};
-  feedbacks.forEach(f => {
-    const key = `${f.weather}_${f.mood}_${Math.floor(f.temperature/10)*10}`;
+  rows.forEach(([weather, mood, tempBucket, beverage, , dislikes]) => {
+    if (dislikes === 0) return;
+    const decade = tempBucket === null ? null : Math.floor(tempBucket/10)*10;
+    const key = `${weather}_${mood}_${decade}`;
     if (!patterns[key]) {
       patterns[key] = {
-        weather: f.weather,
-        mood: f.mood,
-        tempRange: `${Math.floor(f.temperature/10)*10}-${Math.floor(f.temperature/10)*10+10}°C`,
+        weather,
+        mood,
+        tempRange: `${decade}-${decade+10}°C`,
         dislikedBeverages: [],
         count: 0
       };
     }
-    patterns[key].dislikedBeverages.push(f.recommended_beverage);
-    patterns[key].count++;
+    for (let i = 0; i < dislikes; i++) {
+      patterns[key].dislikedBeverages.push(beverage);
+    }
+    patterns[key].count += dislikes;
   });
   
   return Object.values(patterns).sort((a, b) => b.count - a.count);
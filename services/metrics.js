@@ -0,0 +1,245 @@
+/**
+ * Prediction metrics in Prometheus text format
+ *
+ * Node-side round-trip timings of predictor calls are recorded here; the
+ * per-stage timings of each Python worker come from its "metrics" message
+ * (python/instrumentation.py) and are rendered with a worker label.
+ */
+
+// Upper bounds in milliseconds, same as LATENCY_BUCKETS_MS in python/instrumentation.py
+const LATENCY_BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000];
+
+class Histogram {
+  constructor() {
+    this.buckets = new Array(LATENCY_BUCKETS_MS.length + 1).fill(0);
+    this.sum = 0;
+    this.count = 0;
+  }
+
+  observe(ms) {
+    let i = 0;
+    while (i < LATENCY_BUCKETS_MS.length && ms > LATENCY_BUCKETS_MS[i]) i++;
+    this.buckets[i]++;
+    this.sum += ms;
+    this.count++;
+  }
+}
+
+const predictionCalls = { ok: 0, error: 0, timeout: 0 };
+const predictionLatency = new Histogram();
+
+/**
+ * Record one predictor call as seen from Node (queueing + IPC + Python time)
+ * @param {number} durationMs - Round-trip time
+ * @param {Error|null} error - Failure, if any
+ */
+const recordPrediction = (durationMs, error = null) => {
+  predictionLatency.observe(durationMs);
+  if (!error) {
+    predictionCalls.ok++;
+  } else if (error.message && error.message.includes('timeout')) {
+    predictionCalls.timeout++;
+  } else {
+    predictionCalls.error++;
+  }
+};
+
+// Per-tier calls of the prediction engine (services/predictionEngine.js)
+const tierCalls = new Map();
+const fallbacks = new Map();
+
+/**
+ * Record one call to a predictor tier
+ * @param {string} tier - Tier name
+ * @param {number} durationMs - Time spent on the tier
+ * @param {Error|null} error - Failure, if any
+ */
+const recordTierCall = (tier, durationMs, error = null) => {
+  if (!tierCalls.has(tier)) {
+    tierCalls.set(tier, { calls: { ok: 0, error: 0, timeout: 0 }, latency: new Histogram() });
+  }
+  const entry = tierCalls.get(tier);
+  entry.latency.observe(durationMs);
+  if (!error) {
+    entry.calls.ok++;
+  } else if (error.message && error.message.includes('timeout')) {
+    entry.calls.timeout++;
+  } else {
+    entry.calls.error++;
+  }
+};
+
+/**
+ * Record a request moving on from a tier to the next one
+ * @param {string} tier - Tier that did not answer
+ * @param {string} reason - 'error', 'timeout', 'unsupported', 'open' (breaker), 'deadline' or 'missing'
+ */
+const recordFallback = (tier, reason) => {
+  const key = `${tier}:${reason}`;
+  fallbacks.set(key, (fallbacks.get(key) || 0) + 1);
+};
+
+// Admission control in front of the predictors (services/predictionScheduler.js)
+const schedulerWaits = new Map();
+const schedulerRejections = new Map();
+
+/**
+ * Record how long one admitted task waited in the scheduler queue
+ * @param {string} priority - 'interactive' or 'analytics'
+ * @param {number} waitMs - Time from arrival to start
+ */
+const recordSchedulerWait = (priority, waitMs) => {
+  if (!schedulerWaits.has(priority)) {
+    schedulerWaits.set(priority, new Histogram());
+  }
+  schedulerWaits.get(priority).observe(waitMs);
+};
+
+/**
+ * Record a task the scheduler turned away
+ * @param {string} priority - Priority of the rejected task
+ * @param {string} reason - 'full' (queue full), 'shed' (evicted for higher priority) or 'deadline'
+ */
+const recordSchedulerRejection = (priority, reason) => {
+  const key = `${priority}:${reason}`;
+  schedulerRejections.set(key, (schedulerRejections.get(key) || 0) + 1);
+};
+
+const formatLabels = (labels) => {
+  const parts = Object.entries(labels).map(([key, value]) => `${key}="${value}"`);
+  return parts.length ? `{${parts.join(',')}}` : '';
+};
+
+/**
+ * Collects samples per metric family so every family gets a single TYPE line
+ */
+class Exposition {
+  constructor() {
+    this.families = new Map();
+  }
+
+  family(name, type) {
+    if (!this.families.has(name)) {
+      this.families.set(name, { type, samples: [] });
+    }
+    return this.families.get(name).samples;
+  }
+
+  add(name, type, labels, value) {
+    this.family(name, type).push(`${name}${formatLabels(labels)} ${value}`);
+  }
+
+  addHistogram(name, labels, bounds, buckets, sum, count) {
+    const samples = this.family(name, 'histogram');
+    const le = [...bounds.map(String), '+Inf'];
+    let cumulative = 0;
+    buckets.forEach((bucketCount, i) => {
+      cumulative += bucketCount;
+      samples.push(`${name}_bucket${formatLabels({ ...labels, le: le[i] })} ${cumulative}`);
+    });
+    samples.push(
+      `${name}_sum${formatLabels(labels)} ${sum}`,
+      `${name}_count${formatLabels(labels)} ${count}`
+    );
+  }
+
+  toString() {
+    const lines = [];
+    for (const [name, { type, samples }] of this.families) {
+      lines.push(`# TYPE ${name} ${type}`, ...samples);
+    }
+    return lines.join('\n') + '\n';
+  }
+}
+
+/**
+ * Render Node and Python worker metrics as Prometheus text
+ * @param {Array<Object>} tiers - [{ tier, pool, workers: [{ pid, metrics }] }] for each started worker pool
+ * @param {Object|null} scheduler - PredictionScheduler.stats(), if it was started
+ * @returns {string}
+ */
+const renderPrometheus = (tiers = [], scheduler = null) => {
+  const out = new Exposition();
+
+  for (const [outcome, value] of Object.entries(predictionCalls)) {
+    out.add('predictor_calls_total', 'counter', { outcome }, value);
+  }
+  out.addHistogram('predictor_call_duration_ms', {}, LATENCY_BUCKETS_MS,
+    predictionLatency.buckets, predictionLatency.sum, predictionLatency.count);
+
+  for (const [tier, { calls, latency }] of tierCalls) {
+    for (const [outcome, value] of Object.entries(calls)) {
+      out.add('predictor_tier_calls_total', 'counter', { tier, outcome }, value);
+    }
+    out.addHistogram('predictor_tier_duration_ms', { tier }, LATENCY_BUCKETS_MS,
+      latency.buckets, latency.sum, latency.count);
+  }
+  for (const [key, value] of fallbacks) {
+    const [tier, reason] = key.split(':');
+    out.add('predictor_fallbacks_total', 'counter', { tier, reason }, value);
+  }
+
+  if (scheduler) {
+    out.add('predictor_scheduler_running', 'gauge', {}, scheduler.running);
+    out.add('predictor_scheduler_concurrency', 'gauge', {}, scheduler.concurrency);
+    for (const [priority, depth] of Object.entries(scheduler.queuedByPriority)) {
+      out.add('predictor_scheduler_queue_depth', 'gauge', { priority }, depth);
+    }
+  }
+  for (const [priority, histogram] of schedulerWaits) {
+    out.addHistogram('predictor_scheduler_wait_ms', { priority }, LATENCY_BUCKETS_MS,
+      histogram.buckets, histogram.sum, histogram.count);
+  }
+  for (const [key, value] of schedulerRejections) {
+    const [priority, reason] = key.split(':');
+    out.add('predictor_scheduler_rejections_total', 'counter', { priority, reason }, value);
+  }
+
+  for (const { tier, pool, workers } of tiers) {
+    for (const [key, value] of Object.entries(pool)) {
+      const name = key.replace(/[A-Z]/g, (c) => `_${c.toLowerCase()}`);
+      out.add(`predictor_pool_${name}`, 'gauge', { tier }, value);
+    }
+
+    for (const { pid, metrics } of workers) {
+      const worker = { tier, worker: pid };
+      for (const [name, value] of Object.entries(metrics.counters)) {
+        out.add(`predictor_${name}`, 'counter', worker, value);
+      }
+      for (const [name, value] of Object.entries(metrics.gauges)) {
+        out.add(`predictor_${name}`, 'gauge', worker, value);
+      }
+      for (const [stage, histogram] of Object.entries(metrics.stages)) {
+        out.addHistogram('predictor_stage_duration_ms', { stage, ...worker }, metrics.bucket_bounds_ms,
+          histogram.buckets, histogram.sum, histogram.count);
+      }
+    }
+  }
+
+  return out.toString();
+};
+
+/**
+ * Render weather cache counters (services/weatherCache.js) as Prometheus text
+ * @param {Object} stats - WeatherCache.stats()
+ * @returns {string}
+ */
+const renderWeatherCacheMetrics = (stats) => {
+  const out = new Exposition();
+  for (const [key, value] of Object.entries(stats)) {
+    const name = key.replace(/[A-Z]/g, (c) => `_${c.toLowerCase()}`);
+    const isGauge = key === 'size' || key === 'inflight';
+    out.add(`weather_cache_${name}${isGauge ? '' : '_total'}`, isGauge ? 'gauge' : 'counter', {}, value);
+  }
+  return out.toString();
+};
+
+module.exports = {
+  recordPrediction,
+  recordTierCall,
+  recordFallback,
+  recordSchedulerWait,
+  recordSchedulerRejection,
+  renderPrometheus,
+  renderWeatherCacheMetrics
+};
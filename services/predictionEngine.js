@@ -0,0 +1,240 @@
+const path = require('path');
+const fs = require('fs');
+const { recordTierCall, recordFallback } = require('./metrics');
+
+// Tiers tried in order, each with its own latency budget in milliseconds
+const DEFAULT_TIERS = 'model:1500,feedback:1000,rules:500';
+
+const TIER_SCRIPTS = {
+  model: 'predict.py',
+  feedback: 'predict_with_feedback.py',
+  rules: 'predict_mock.py'
+};
+
+// Error code a predictor sets on a malformed request
+// (RequestError in python/predictor_cli.py): missing fields, bad top_k
+const BAD_REQUEST = 'bad_request';
+
+// Error code a predictor sets on a valid request it has no answer for
+// (UnsupportedInput in python/predictor_cli.py): a weather/mood pair the model does not know
+const UNSUPPORTED = 'unsupported';
+
+/**
+ * Error for a predictor's error result; rejected requests become a 400
+ * @param {Object} result - Predictor result { error, code? }
+ * @returns {Error}
+ */
+const predictorError = (result) => {
+  const error = new Error(result.error);
+  if (result.code === BAD_REQUEST) {
+    error.code = BAD_REQUEST;
+    error.statusCode = 400;
+  } else if (result.code === UNSUPPORTED) {
+    error.code = UNSUPPORTED;
+  }
+  return error;
+};
+
+/**
+ * Parse PREDICTOR_TIERS ("name:budgetMs,...") into [{ name, budgetMs }]
+ * @param {string} spec
+ * @returns {Array<Object>}
+ */
+const parseTiers = (spec) => spec.split(',').map((part) => {
+  const [name, budget] = part.trim().split(':');
+  if (!TIER_SCRIPTS[name]) {
+    throw new Error(`Unknown predictor tier "${name}" (expected one of ${Object.keys(TIER_SCRIPTS).join(', ')})`);
+  }
+  return { name, budgetMs: parseInt(budget, 10) || 1000 };
+});
+
+/**
+ * Consecutive-failure circuit breaker
+ *
+ * Opens after `failureThreshold` failures in a row; while open the tier is
+ * skipped. After `cooldownMs` one trial request is let through (half-open):
+ * success closes the breaker, failure opens it for another cooldown.
+ */
+class CircuitBreaker {
+  constructor({ failureThreshold = 5, cooldownMs = 30000, now = Date.now } = {}) {
+    this.failureThreshold = failureThreshold;
+    this.cooldownMs = cooldownMs;
+    this.now = now;
+    this.state = 'closed';
+    this.failures = 0;
+    this.openedAt = 0;
+    this.trialInFlight = false;
+    this.opens = 0;
+  }
+
+  /**
+   * Whether a request may be sent now (claims the half-open trial slot)
+   */
+  allow() {
+    if (this.state === 'closed') return true;
+    if (this.state === 'open' && this.now() - this.openedAt >= this.cooldownMs) {
+      this.state = 'half-open';
+      this.trialInFlight = false;
+    }
+    if (this.state === 'half-open' && !this.trialInFlight) {
+      this.trialInFlight = true;
+      return true;
+    }
+    return false;
+  }
+
+  success() {
+    this.state = 'closed';
+    this.failures = 0;
+    this.trialInFlight = false;
+  }
+
+  failure() {
+    this.failures++;
+    this.trialInFlight = false;
+    if (this.state === 'half-open' || this.failures >= this.failureThreshold) {
+      if (this.state !== 'open') this.opens++;
+      this.state = 'open';
+      this.openedAt = this.now();
+    }
+  }
+
+  stats() {
+    return { state: this.state, consecutiveFailures: this.failures, opens: this.opens };
+  }
+}
+
+/**
+ * Tiered predictor: the trained model first, then the feedback-learning
+ * rules, then the static rules. Every request has one overall deadline;
+ * each tier gets the smaller of its own budget and what is left of it, and
+ * a tier whose breaker is open is skipped without waiting.
+ *
+ * Only worker failures and timeouts count against a tier. A request the
+ * tier rejects as invalid goes straight back to the caller as a 400: the
+ * tier did its job, and falling back would hide the client's mistake.
+ */
+class PredictionEngine {
+  /**
+   * @param {Object} options
+   * @param {Array<Object>} options.tiers - [{ name, budgetMs }] in fallback order
+   * @param {Function} options.call - (tier, data, timeoutMs) => Promise<result>
+   * @param {number} options.deadlineMs - Overall budget per request
+   * @param {Object} options.breaker - CircuitBreaker options
+   */
+  constructor({ tiers, call, deadlineMs = 3000, breaker = {} }) {
+    this.call = call;
+    this.deadlineMs = deadlineMs;
+    this.tiers = tiers.map(({ name, budgetMs }) => ({
+      name,
+      budgetMs,
+      scriptPath: path.join(__dirname, '../python', TIER_SCRIPTS[name]),
+      breaker: new CircuitBreaker(breaker),
+      served: 0,
+      failures: 0,
+      timeouts: 0,
+      rejected: 0,
+      unsupported: 0,
+      skipped: 0
+    }));
+  }
+
+  /**
+   * Predict with the first tier that answers in time
+   * @param {Object} data - Input data { weather, mood, temperature, humidity, top_k? }
+   * @param {number} deadline - Epoch ms by which to answer (default: deadlineMs from now)
+   * @returns {Promise<Object>} - Predictor result plus the `tier` that produced it
+   */
+  async predict(data, deadline = Date.now() + this.deadlineMs) {
+    const errors = [];
+
+    for (const [index, tier] of this.tiers.entries()) {
+      const isLast = index === this.tiers.length - 1;
+      const remainingMs = deadline - Date.now();
+      let reason;
+
+      if (!fs.existsSync(tier.scriptPath)) {
+        reason = 'missing';
+      } else if (remainingMs <= 0) {
+        reason = 'deadline';
+      } else if (!tier.breaker.allow()) {
+        reason = 'open';
+      }
+
+      if (reason) {
+        tier.skipped++;
+        errors.push(`${tier.name}: ${reason}`);
+        if (!isLast) recordFallback(tier.name, reason);
+        continue;
+      }
+
+      const timeoutMs = Math.min(tier.budgetMs, remainingMs);
+      const start = process.hrtime.bigint();
+      try {
+        const result = await this.call(tier, data, timeoutMs);
+        if (result.error) {
+          throw predictorError(result);
+        }
+        recordTierCall(tier.name, Number(process.hrtime.bigint() - start) / 1e6);
+        tier.breaker.success();
+        tier.served++;
+        return { ...result, tier: tier.name };
+      } catch (error) {
+        if (error.code === BAD_REQUEST) {
+          // The tier answered, so it is healthy (this also ends a half-open trial)
+          recordTierCall(tier.name, Number(process.hrtime.bigint() - start) / 1e6);
+          tier.breaker.success();
+          tier.rejected++;
+          throw error;
+        }
+        if (error.code === UNSUPPORTED) {
+          // Healthy too, but the next tier may know the input
+          recordTierCall(tier.name, Number(process.hrtime.bigint() - start) / 1e6);
+          tier.breaker.success();
+          tier.unsupported++;
+          errors.push(`${tier.name}: ${error.message}`);
+          if (!isLast) recordFallback(tier.name, 'unsupported');
+          continue;
+        }
+        recordTierCall(tier.name, Number(process.hrtime.bigint() - start) / 1e6, error);
+        tier.breaker.failure();
+        const timedOut = error.message.includes('timeout');
+        if (timedOut) tier.timeouts++; else tier.failures++;
+        errors.push(`${tier.name}: ${error.message}`);
+        if (!isLast) {
+          recordFallback(tier.name, timedOut ? 'timeout' : 'error');
+          console.error(`⚠️  Predictor tier "${tier.name}" failed, falling back: ${error.message}`);
+        }
+      }
+    }
+
+    throw new Error(`All predictor tiers failed (${errors.join('; ')})`);
+  }
+
+  stats() {
+    return {
+      deadlineMs: this.deadlineMs,
+      tiers: this.tiers.map((tier) => ({
+        name: tier.name,
+        budgetMs: tier.budgetMs,
+        served: tier.served,
+        failures: tier.failures,
+        timeouts: tier.timeouts,
+        rejected: tier.rejected,
+        unsupported: tier.unsupported,
+        skipped: tier.skipped,
+        breaker: tier.breaker.stats()
+      }))
+    };
+  }
+}
+
+module.exports = {
+  BAD_REQUEST,
+  DEFAULT_TIERS,
+  UNSUPPORTED,
+  CircuitBreaker,
+  PredictionEngine,
+  parseTiers,
+  predictorError
+};
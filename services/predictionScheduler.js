@@ -0,0 +1,157 @@
+const { AsyncResource } = require('async_hooks');
+const { recordSchedulerWait, recordSchedulerRejection } = require('./metrics');
+const { recordTiming } = require('../middleware/serverTiming');
+
+// Lower number = served first
+const PRIORITIES = {
+  interactive: 0,
+  analytics: 1
+};
+
+/**
+ * Error for work the scheduler turned away; answered as 503 by the error handler
+ */
+class SchedulerRejection extends Error {
+  constructor(message, reason) {
+    super(message);
+    this.reason = reason;
+    this.statusCode = 503;
+    this.retryAfterSec = 1;
+  }
+}
+
+/**
+ * Admission control in front of the Python predictors
+ *
+ * At most `concurrency` tasks run at once; the rest wait in one FIFO queue
+ * per priority, and the highest-priority queue is always served first.
+ * The queues hold at most `maxQueue` tasks in total. When they are full a
+ * new task is rejected at once, unless it outranks a queued task, in which
+ * case the newest task of the lowest priority is shed to make room. A queued
+ * task whose deadline passes is rejected without ever running.
+ */
+class PredictionScheduler {
+  /**
+   * @param {Object} options
+   * @param {number} options.concurrency - Tasks running at the same time
+   * @param {number} options.maxQueue - Tasks waiting, over all priorities
+   */
+  constructor({ concurrency = 4, maxQueue = 100 } = {}) {
+    this.concurrency = concurrency;
+    this.maxQueue = maxQueue;
+    this.queues = Object.keys(PRIORITIES).map(() => []);
+    this.running = 0;
+    this.queued = 0;
+    this.counters = { admitted: 0, completed: 0, rejected: 0, shed: 0, expired: 0 };
+  }
+
+  /**
+   * Run a task when a slot is free
+   * @param {Function} task - (deadline) => Promise, started once admitted
+   * @param {Object} options
+   * @param {string} options.priority - 'interactive' or 'analytics'
+   * @param {number} options.deadline - Epoch ms after which the task is not worth starting
+   * @returns {Promise} - The task's result, or a SchedulerRejection
+   */
+  run(task, { priority = 'interactive', deadline = Infinity } = {}) {
+    const level = PRIORITIES[priority];
+    if (level === undefined) {
+      return Promise.reject(new Error(`Unknown scheduler priority "${priority}"`));
+    }
+
+    if (this.running < this.concurrency && this.queued === 0) {
+      return this.start({ task, priority, deadline, enqueuedAt: Date.now() });
+    }
+
+    if (this.queued >= this.maxQueue && !this.shedBelow(level)) {
+      this.counters.rejected++;
+      recordSchedulerRejection(priority, 'full');
+      return Promise.reject(new SchedulerRejection('Predictor queue is full, try again shortly', 'full'));
+    }
+
+    return new Promise((resolve, reject) => {
+      const entry = { task, priority, deadline, enqueuedAt: Date.now(), resolve, reject };
+      // Started later from another task's completion: run it in the caller's
+      // async context, so its timings land on the right request
+      entry.begin = AsyncResource.bind(() => this.start(entry).then(resolve, reject));
+      if (Number.isFinite(deadline)) {
+        entry.timer = setTimeout(() => this.expire(level, entry), Math.max(0, deadline - Date.now()));
+        entry.timer.unref();
+      }
+      this.queues[level].push(entry);
+      this.queued++;
+    });
+  }
+
+  /**
+   * Drop the newest queued task ranked below `level`; false when there is none
+   */
+  shedBelow(level) {
+    for (let i = this.queues.length - 1; i > level; i--) {
+      if (this.queues[i].length) {
+        const entry = this.queues[i].pop();
+        this.queued--;
+        clearTimeout(entry.timer);
+        this.counters.shed++;
+        recordSchedulerRejection(entry.priority, 'shed');
+        entry.reject(new SchedulerRejection('Predictor queue is full, request shed for higher-priority work', 'shed'));
+        return true;
+      }
+    }
+    return false;
+  }
+
+  expire(level, entry) {
+    const index = this.queues[level].indexOf(entry);
+    if (index === -1) return;
+    this.queues[level].splice(index, 1);
+    this.queued--;
+    this.counters.expired++;
+    recordSchedulerRejection(entry.priority, 'deadline');
+    entry.reject(new SchedulerRejection('Prediction deadline passed while queued', 'deadline'));
+  }
+
+  start(entry) {
+    const waitMs = Date.now() - entry.enqueuedAt;
+    recordSchedulerWait(entry.priority, waitMs);
+    recordTiming('queue', waitMs);
+    this.running++;
+    this.counters.admitted++;
+
+    const done = () => {
+      this.running--;
+      this.counters.completed++;
+      this.dispatch();
+    };
+    const promise = Promise.resolve().then(() => entry.task(entry.deadline));
+    promise.then(done, done);
+    return promise;
+  }
+
+  dispatch() {
+    while (this.running < this.concurrency && this.queued > 0) {
+      const queue = this.queues.find((q) => q.length);
+      const entry = queue.shift();
+      this.queued--;
+      clearTimeout(entry.timer);
+      entry.begin();
+    }
+  }
+
+  stats() {
+    return {
+      concurrency: this.concurrency,
+      maxQueue: this.maxQueue,
+      running: this.running,
+      queued: this.queued,
+      queuedByPriority: Object.fromEntries(Object.keys(PRIORITIES).map((name, i) => [name, this.queues[i].length])),
+      ...this.counters
+    };
+  }
+}
+
+module.exports = {
+  PRIORITIES,
+  PredictionScheduler,
+  SchedulerRejection
+};
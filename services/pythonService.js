@@ -1,28 +1,93 @@
 const { spawn } = require('child_process');
+const os = require('os');
 const path = require('path');
 const fs = require('fs');
+const { WorkerPool } = require('./workerPool');
+const { recordPrediction, renderPrometheus } = require('./metrics');
+const { recordTiming } = require('../middleware/serverTiming');
+const { DEFAULT_TIERS, PredictionEngine, parseTiers, predictorError } = require('./predictionEngine');
+const { PredictionScheduler } = require('./predictionScheduler');
+
+// predict_with_feedback.py - Learns from user feedback! (the "feedback" tier,
+// and what poolPredict / spawnPredict run directly)
+const scriptName = 'predict_with_feedback.py';
+const scriptPath = path.join(__dirname, '../python', scriptName);
+
+// Choose python executable: environment override, then common names
+const pythonCandidates = [process.env.PYTHON_PATH, 'python', 'python3', 'py'].filter(Boolean);
+const pythonExec = pythonCandidates[0];
+
+// Hard limit for one Python call; tier budgets are usually much shorter
+const REQUEST_TIMEOUT_MS = 15000;
+
+// Persistent worker pools by tier name, each created on first use (PREDICTOR_MODE=spawn disables them)
+const workerPools = new Map();
+
+const getWorkerPool = (tier = 'feedback', tierScriptPath = scriptPath) => {
+  if (!workerPools.has(tier)) {
+    workerPools.set(tier, new WorkerPool({
+      pythonExec,
+      scriptPath: tierScriptPath,
+      size: parseInt(process.env.PREDICTOR_WORKERS, 10) || 2,
+      requestTimeoutMs: REQUEST_TIMEOUT_MS
+    }));
+  }
+  return workerPools.get(tier);
+};
 
 /**
- * Call Python ML model to predict beverage
+ * Run one request on a long-lived Python worker from the pool
+ * @param {Object} data - Input data { weather, mood, temperature, humidity, top_k? }
+ * @param {Object} tier - { name, scriptPath } of the predictor to use (default: feedback)
+ * @param {number} timeoutMs - Time to wait for the answer
+ * @returns {Promise<Object>} - Predictor result ({ prediction, alternatives?, ... })
+ */
+const poolRequest = async (data, tier = { name: 'feedback', scriptPath }, timeoutMs = REQUEST_TIMEOUT_MS) => {
+  if (!fs.existsSync(tier.scriptPath)) {
+    throw new Error(`Prediction script not found at ${tier.scriptPath}`);
+  }
+
+  // Server-Timing: time inside the worker vs queueing and IPC around it
+  const start = process.hrtime.bigint();
+  let result;
+  try {
+    result = await getWorkerPool(tier.name, tier.scriptPath).predict(data, timeoutMs);
+  } finally {
+    const runMs = (result && result.worker_ms) || 0;
+    recordTiming('python_run', runMs);
+    recordTiming('python_wait', Number(process.hrtime.bigint() - start) / 1e6 - runMs);
+  }
+
+  if (result.error) {
+    throw predictorError(result);
+  }
+
+  return result;
+};
+
+/**
+ * Run the prediction on a long-lived Python worker from the pool
  * @param {Object} data - Input data { weather, mood, temperature, humidity }
  * @returns {Promise<string>} - Predicted beverage name
  */
-const predictBeverage = async (data) => {
-  return new Promise((resolve, reject) => {
-    // Use predict_with_feedback.py - Learns from user feedback!
-    const scriptName = 'predict_with_feedback.py';
-    const scriptPath = path.join(__dirname, '../python', scriptName);
+const poolPredict = async (data) => (await poolRequest(data)).prediction;
 
-    // Choose python executable: environment override, then common names
-    const pythonCandidates = [process.env.PYTHON_PATH, 'python', 'python3', 'py'].filter(Boolean);
-    const pythonExec = pythonCandidates[0];
-
-    if (!fs.existsSync(scriptPath)) {
-      return reject(new Error(`Prediction script not found at ${scriptPath}`));
+/**
+ * Start a fresh Python process for a single request
+ * @param {Object} data - Input data { weather, mood, temperature, humidity, top_k? }
+ * @param {Object} tier - { scriptPath } of the predictor to run (default: feedback)
+ * @param {number} timeoutMs - Time before the process is killed
+ * @returns {Promise<Object>} - Predictor result ({ prediction, alternatives?, ... })
+ */
+const spawnRequest = async (data, tier = { scriptPath }, timeoutMs = REQUEST_TIMEOUT_MS) => {
+  return new Promise((resolve, reject) => {
+    if (!fs.existsSync(tier.scriptPath)) {
+      return reject(new Error(`Prediction script not found at ${tier.scriptPath}`));
     }
 
     let timedOut = false;
-    const pythonProcess = spawn(pythonExec, [scriptPath, JSON.stringify(data)], { shell: false });
+    const start = process.hrtime.bigint();
+    const pythonProcess = spawn(pythonExec, [tier.scriptPath, JSON.stringify(data)], { shell: false });
 
     let dataString = '';
     let errorString = '';
@@ -44,6 +109,7 @@ const predictBeverage = async (data) => {
 
     pythonProcess.on('close', (code) => {
       clearTimeout(killTimer);
+      recordTiming('python_spawn', Number(process.hrtime.bigint() - start) / 1e6);
       if (timedOut) return; // already rejected on timeout
 
       if (code !== 0) {
@@ -51,7 +117,7 @@ const predictBeverage = async (data) => {
         try {
           const parsed = JSON.parse(dataString || '{}');
           if (parsed && parsed.error) {
-            return reject(new Error(parsed.error));
+            return reject(predictorError(parsed));
           }
         } catch (e) {
           // ignore parse error
@@ -63,11 +129,10 @@ const predictBeverage = async (data) => {
         const result = JSON.parse(dataString.trim());
 
         if (result.error) {
-          return reject(new Error(result.error));
+          return reject(predictorError(result));
         }
 
-        console.log('🤖 ML Model prediction:', result.prediction);
-        resolve(result.prediction);
+        resolve(result);
       } catch (error) {
         console.error('Failed to parse Python output:', dataString, error.message);
         reject(new Error(`Failed to parse prediction: ${error.message}`));
@@ -78,11 +143,149 @@ const predictBeverage = async (data) => {
     const killTimer = setTimeout(() => {
       timedOut = true;
       try { pythonProcess.kill(); } catch (e) { /* ignore */ }
-      reject(new Error('Python script timeout after 15 seconds'));
-    }, 15000);
+      reject(new Error(`Python script timeout after ${timeoutMs / 1000} seconds`));
+    }, timeoutMs);
   });
 };
 
+/**
+ * Start a fresh Python process for a single prediction
+ * @param {Object} data - Input data { weather, mood, temperature, humidity }
+ * @returns {Promise<string>} - Predicted beverage name
+ */
+const spawnPredict = async (data) => (await spawnRequest(data)).prediction;
+
+// Tiered fallback chain (services/predictionEngine.js), created on first use
+let predictionEngine = null;
+
+const getPredictionEngine = () => {
+  if (!predictionEngine) {
+    predictionEngine = new PredictionEngine({
+      tiers: parseTiers(process.env.PREDICTOR_TIERS || DEFAULT_TIERS),
+      deadlineMs: parseInt(process.env.PREDICTOR_DEADLINE_MS, 10) || 3000,
+      breaker: {
+        failureThreshold: parseInt(process.env.PREDICTOR_BREAKER_FAILURES, 10) || 5,
+        cooldownMs: parseInt(process.env.PREDICTOR_BREAKER_COOLDOWN_MS, 10) || 30000
+      },
+      call: (tier, data, timeoutMs) => (process.env.PREDICTOR_MODE === 'spawn'
+        ? spawnRequest(data, tier, timeoutMs)
+        : poolRequest(data, tier, timeoutMs))
+    });
+  }
+  return predictionEngine;
+};
+
+// Admission control for every Python invocation (services/predictionScheduler.js), created on first use
+let scheduler = null;
+
+const getScheduler = () => {
+  if (!scheduler) {
+    // Pool mode: a running and a queued request per worker; spawn mode: one process per core
+    const workers = parseInt(process.env.PREDICTOR_WORKERS, 10) || 2;
+    const defaultConcurrency = process.env.PREDICTOR_MODE === 'spawn' ? os.cpus().length : 2 * workers;
+    scheduler = new PredictionScheduler({
+      concurrency: parseInt(process.env.PREDICTOR_CONCURRENCY, 10) || defaultConcurrency,
+      maxQueue: parseInt(process.env.PREDICTOR_QUEUE_SIZE, 10) || 100
+    });
+  }
+  return scheduler;
+};
+
+/**
+ * Send one request through the predictor tiers using the configured mode
+ * Requests wait for a scheduler slot; the engine deadline starts on arrival,
+ * so time spent queued counts against it.
+ * @param {Object} data - Input data
+ * @param {Object} options - { priority: 'interactive' (default) or 'analytics' }
+ * @returns {Promise<Object>} - Predictor result, with the `tier` that answered
+ */
+const runPredictor = async (data, { priority = 'interactive' } = {}) => {
+  const start = process.hrtime.bigint();
+  const engine = getPredictionEngine();
+  try {
+    const result = await getScheduler().run(
+      (deadline) => engine.predict(data, deadline),
+      { priority, deadline: Date.now() + engine.deadlineMs }
+    );
+    recordPrediction(Number(process.hrtime.bigint() - start) / 1e6);
+    recordTiming('predict', Number(process.hrtime.bigint() - start) / 1e6);
+    console.log(`🤖 Prediction (${result.tier} tier):`, result.prediction);
+    return result;
+  } catch (error) {
+    recordPrediction(Number(process.hrtime.bigint() - start) / 1e6, error);
+    throw error;
+  }
+};
+
+/**
+ * Call Python ML model to predict beverage
+ * @param {Object} data - Input data { weather, mood, temperature, humidity }
+ * @param {Object} options - Scheduling options ({ priority })
+ * @returns {Promise<string>} - Predicted beverage name
+ */
+const predictBeverage = async (data, options) => (await runPredictor(data, options)).prediction;
+
+/**
+ * Predict a beverage and rank the top K alternatives in the same predictor call
+ * @param {Object} data - Input data { weather, mood, temperature, humidity }
+ * @param {number} topK - Number of ranked alternatives to return
+ * @param {Object} options - Scheduling options ({ priority })
+ * @returns {Promise<Object>} - { prediction, alternatives: [{ beverage, score }] }
+ */
+const recommendBeverages = async (data, topK, options) => {
+  const result = await runPredictor({ ...data, top_k: topK }, options);
+  return {
+    prediction: result.prediction,
+    alternatives: result.alternatives || []
+  };
+};
+
+/**
+ * Scheduler queue depth and rejection counters, tier budgets, breaker states
+ * and fallback counts, plus each started pool's state and worker counters
+ * (prediction cache hits, misses, evictions)
+ * @returns {Promise<Object>}
+ */
+const getPredictorStats = async () => ({
+  scheduler: scheduler ? scheduler.stats() : null,
+  engine: predictionEngine ? predictionEngine.stats() : null,
+  tiers: await Promise.all([...workerPools].map(async ([tier, pool]) => ({
+    tier,
+    pool: pool.stats(),
+    workers: await pool.workerStats()
+  })))
+});
+
+/**
+ * Prometheus text for predictor calls, per-tier latency and fallbacks, plus every pool worker's stage timings
+ * @returns {Promise<string>}
+ */
+const getPredictorMetrics = async () => {
+  const tiers = await Promise.all([...workerPools].map(async ([tier, pool]) => ({
+    tier,
+    pool: pool.stats(),
+    workers: await pool.workerMetrics()
+  })));
+  return renderPrometheus(tiers, scheduler ? scheduler.stats() : null);
+};
+
+/**
+ * Stop the worker pools (used on shutdown and by benchmarks)
+ */
+const closeWorkerPool = () => {
+  for (const pool of workerPools.values()) {
+    pool.close();
+  }
+  workerPools.clear();
+};
+
 module.exports = {
-  predictBeverage
+  predictBeverage,
+  recommendBeverages,
+  spawnPredict,
+  poolPredict,
+  getScheduler,
+  getPredictorStats,
+  getPredictorMetrics,
+  closeWorkerPool
 };
@@ -0,0 +1,159 @@
+/**
+ * Geo-bucketed weather cache
+ *
+ * Coordinates are snapped to a lat/lon grid so nearby users share one entry.
+ * Entries expire at the next upstream update boundary (Open-Meteo refreshes
+ * "current" values every 15 minutes), are served stale for a grace period
+ * while a background refresh runs, and concurrent lookups of the same cell
+ * share a single upstream request.
+ */
+class WeatherCache {
+  /**
+   * @param {Object} options
+   * @param {number} options.gridDegrees - Grid cell size in degrees (0.1 ≈ 11 km)
+   * @param {number} options.ttlMs - Upstream update cadence; entries expire on its boundaries
+   * @param {number} options.staleMs - How long past expiry an entry may be served while refreshing
+   * @param {number} options.maxEntries - LRU bound on cached cells
+   * @param {Function} options.now - Clock in milliseconds (injectable for tests)
+   */
+  constructor({
+    gridDegrees = 0.1,
+    ttlMs = 15 * 60 * 1000,
+    staleMs = 15 * 60 * 1000,
+    maxEntries = 10000,
+    now = Date.now
+  } = {}) {
+    this.gridDegrees = gridDegrees;
+    this.ttlMs = ttlMs;
+    this.staleMs = staleMs;
+    this.maxEntries = maxEntries;
+    this.now = now;
+    this.entries = new Map();
+    this.inflight = new Map();
+    this.counters = {
+      hits: 0,
+      staleHits: 0,
+      misses: 0,
+      coalesced: 0,
+      upstreamCalls: 0,
+      upstreamErrors: 0,
+      evictions: 0
+    };
+  }
+
+  /**
+   * Grid cell for a coordinate: the cache key and the cell centre that is sent upstream
+   */
+  cell(latitude, longitude) {
+    const latIndex = Math.round(latitude / this.gridDegrees);
+    const lonIndex = Math.round(longitude / this.gridDegrees);
+    return {
+      key: `${latIndex}:${lonIndex}`,
+      latitude: +(latIndex * this.gridDegrees).toFixed(4),
+      longitude: +(lonIndex * this.gridDegrees).toFixed(4)
+    };
+  }
+
+  /**
+   * Cached weather for a coordinate, fetching through `fetcher(lat, lon)` when needed
+   * @param {number} latitude
+   * @param {number} longitude
+   * @param {Function} fetcher - async (cellLatitude, cellLongitude) => weather data; may throw
+   * @returns {Promise<Object>}
+   */
+  async get(latitude, longitude, fetcher) {
+    const cell = this.cell(latitude, longitude);
+    const entry = this.entries.get(cell.key);
+    const now = this.now();
+
+    if (entry && now < entry.expiresAt) {
+      this.counters.hits++;
+      this.touch(cell.key, entry);
+      return entry.value;
+    }
+
+    if (entry && now < entry.expiresAt + this.staleMs) {
+      // Stale-while-revalidate: answer now, refresh once in the background
+      this.counters.staleHits++;
+      this.touch(cell.key, entry);
+      this.refresh(cell, fetcher).catch((error) => {
+        console.error('❌ Background weather refresh failed:', error.message);
+      });
+      return entry.value;
+    }
+
+    this.counters.misses++;
+    return this.refresh(cell, fetcher);
+  }
+
+  /**
+   * Last value cached for a coordinate regardless of age (fallback when upstream fails)
+   */
+  peek(latitude, longitude) {
+    const entry = this.entries.get(this.cell(latitude, longitude).key);
+    return entry ? entry.value : null;
+  }
+
+  /**
+   * Single-flight upstream fetch for one cell
+   */
+  refresh(cell, fetcher) {
+    const running = this.inflight.get(cell.key);
+    if (running) {
+      this.counters.coalesced++;
+      return running;
+    }
+
+    this.counters.upstreamCalls++;
+    const request = Promise.resolve()
+      .then(() => fetcher(cell.latitude, cell.longitude))
+      .then((value) => {
+        this.store(cell.key, value);
+        return value;
+      }, (error) => {
+        this.counters.upstreamErrors++;
+        throw error;
+      })
+      .finally(() => {
+        this.inflight.delete(cell.key);
+      });
+
+    this.inflight.set(cell.key, request);
+    return request;
+  }
+
+  store(key, value) {
+    const now = this.now();
+    // Expire on the next update boundary rather than a fixed age after the fetch
+    const expiresAt = (Math.floor(now / this.ttlMs) + 1) * this.ttlMs;
+    this.entries.delete(key);
+    this.entries.set(key, { value, fetchedAt: now, expiresAt });
+
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.counters.evictions++;
+    }
+  }
+
+  touch(key, entry) {
+    // Map preserves insertion order; re-inserting moves the cell to the LRU tail
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+  }
+
+  clear() {
+    this.entries.clear();
+  }
+
+  stats() {
+    return {
+      size: this.entries.size,
+      inflight: this.inflight.size,
+      ...this.counters
+    };
+  }
+}
+
+module.exports = {
+  WeatherCache
+};
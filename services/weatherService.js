@@ -1,49 +1,93 @@
 const axios = require('axios');
+const { WeatherCache } = require('./weatherCache');
+const { timeStage } = require('../middleware/serverTiming');
+
+const DEFAULT_OPEN_METEO_URL = 'https://api.open-meteo.com/v1/forecast';
+
+let weatherCache = null;
+
+/**
+ * Lazily create the shared cache so .env settings loaded after require() apply
+ */
+const getWeatherCache = () => {
+  if (!weatherCache) {
+    weatherCache = new WeatherCache({
+      gridDegrees: parseFloat(process.env.WEATHER_GRID_DEGREES) || 0.1,
+      ttlMs: (parseInt(process.env.WEATHER_CACHE_TTL, 10) || 900) * 1000,
+      staleMs: (parseInt(process.env.WEATHER_CACHE_STALE, 10) || 900) * 1000,
+      maxEntries: parseInt(process.env.WEATHER_CACHE_SIZE, 10) || 10000
+    });
+  }
+  return weatherCache;
+};
+
+/**
+ * Fetch current weather for a coordinate from OpenMeteo (throws on failure)
+ * @param {number} latitude
+ * @param {number} longitude
+ * @returns {Promise<Object>} Weather data
+ */
+const fetchWeather = async (latitude, longitude) => {
+  console.log('🌐 Calling OpenMeteo API for weather...');
+
+  const response = await timeStage('weather_upstream', axios.get(process.env.OPEN_METEO_URL || DEFAULT_OPEN_METEO_URL, {
+    params: {
+      latitude,
+      longitude,
+      current: 'temperature_2m,relative_humidity_2m,weather_code',
+      timezone: 'auto'
+    },
+    timeout: parseInt(process.env.WEATHER_TIMEOUT_MS, 10) || 5000
+  }));
+  const data = response.data;
+
+  const temperature = Math.round(data.current.temperature_2m);
+  const humidity = data.current.relative_humidity_2m;
+  const weatherCode = data.current.weather_code;
+
+  // Map OpenMeteo weather codes to our categories
+  const weather = mapWeatherCode(weatherCode, temperature);
+  const description = getWeatherDescription(weatherCode);
+
+  // Hardcoded location as Jodhpur, IN (no reverse geocoding needed)
+  console.log('✅ OpenMeteo weather retrieved:', {
+    weather,
+    temperature,
+    humidity,
+    location: 'Jodhpur'
+  });
+
+  return {
+    weather,
+    temperature,
+    humidity,
+    location: 'Jodhpur',
+    country: 'IN',
+    description,
+    weatherCode
+  };
+};
 
 /**
  * Get weather data using OpenMeteo API (Free, no API key needed)
+ * Lookups go through the geo-bucketed cache; see services/weatherCache.js
  * @param {number} latitude 
  * @param {number} longitude 
  * @returns {Promise<Object>} Weather data
  */
 const getWeatherByLocation = async (latitude, longitude) => {
+  const cache = getWeatherCache();
   try {
-    console.log('🌐 Calling OpenMeteo API for weather...');
-    
-    // OpenMeteo API URL
-    const weatherUrl = `https://api.open-meteo.com/v1/forecast?latitude=${latitude}&longitude=${longitude}&current=temperature_2m,relative_humidity_2m,weather_code&timezone=auto`;
-    
-    const response = await axios.get(weatherUrl);
-    const data = response.data;
-    
-    const temperature = Math.round(data.current.temperature_2m);
-    const humidity = data.current.relative_humidity_2m;
-    const weatherCode = data.current.weather_code;
-    
-    // Map OpenMeteo weather codes to our categories
-    const weather = mapWeatherCode(weatherCode, temperature);
-    const description = getWeatherDescription(weatherCode);
-    
-    // Hardcoded location as Jodhpur, IN (no reverse geocoding needed)
-    console.log('✅ OpenMeteo weather retrieved:', { 
-      weather, 
-      temperature, 
-      humidity, 
-      location: 'Jodhpur' 
-    });
-    
-    return {
-      weather,
-      temperature,
-      humidity,
-      location: 'Jodhpur',
-      country: 'IN',
-      description,
-      weatherCode
-    };
+    return await cache.get(latitude, longitude, fetchWeather);
   } catch (error) {
     console.error('❌ Error fetching weather from OpenMeteo:', error.message);
-    
+
+    // Prefer the last known weather for this area over the defaults
+    const lastKnown = cache.peek(latitude, longitude);
+    if (lastKnown) {
+      return lastKnown;
+    }
+
     // Return Jodhpur defaults if API fails
     return {
       weather: 'Sunny',
@@ -56,6 +100,11 @@ const getWeatherByLocation = async (latitude, longitude) => {
   }
 };
 
+/**
+ * Weather cache counters (hits, stale hits, coalesced lookups, upstream calls)
+ */
+const getWeatherCacheStats = () => getWeatherCache().stats();
+
 /**
  * Map OpenMeteo weather codes to our categories
  * Reference: https://open-meteo.com/en/docs
@@ -137,5 +186,6 @@ const getWeatherDescription = (code) => {
 };
 
 module.exports = {
-  getWeatherByLocation
+  getWeatherByLocation,
+  getWeatherCacheStats
 };
@@ -0,0 +1,292 @@
+const { spawn } = require('child_process');
+const readline = require('readline');
+
+/**
+ * A single long-lived Python predictor process running in --worker mode.
+ * Requests are written to stdin as JSON lines and matched to responses by id.
+ */
+class PredictorWorker {
+  constructor(pythonExec, scriptPath, onExit) {
+    this.pending = new Map();
+    this.nextId = 1;
+    this.alive = true;
+    this.stderrTail = '';
+    this.exitReported = false;
+    this.startedAt = Date.now();
+
+    const reportExit = (reason) => {
+      this.terminate(reason);
+      if (!this.exitReported) {
+        this.exitReported = true;
+        onExit(this);
+      }
+    };
+
+    this.process = spawn(pythonExec, ['-u', scriptPath, '--worker'], { shell: false });
+
+    readline.createInterface({ input: this.process.stdout }).on('line', (line) => {
+      this.handleLine(line);
+    });
+
+    this.process.stderr.on('data', (chunk) => {
+      // Keep only the tail of stderr for crash reports
+      this.stderrTail = (this.stderrTail + chunk.toString()).slice(-2000);
+    });
+
+    // Writes to a worker that just died surface here; 'exit' handles the cleanup
+    this.process.stdin.on('error', () => {});
+
+    this.process.on('error', (err) => {
+      reportExit(new Error(`Failed to start Python process: ${err.message || err}`));
+    });
+
+    this.process.on('exit', (code, signal) => {
+      reportExit(new Error(
+        `Python worker exited (code ${code}, signal ${signal}): ${this.stderrTail || 'no stderr'}`
+      ));
+    });
+  }
+
+  handleLine(line) {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      console.error('Failed to parse Python worker output:', line, error.message);
+      return;
+    }
+
+    const entry = this.pending.get(message.id);
+    if (!entry) return;
+
+    this.pending.delete(message.id);
+    clearTimeout(entry.timer);
+    entry.resolve(message);
+  }
+
+  /**
+   * Send one message to the worker
+   * @param {string} type - 'predict', 'ping', 'stats' or 'metrics'
+   * @param {Object} data - Request payload
+   * @param {number} timeoutMs - Time to wait for the response
+   * @returns {Promise<Object>} - Raw worker response
+   */
+  send(type, data, timeoutMs) {
+    if (!this.alive) {
+      return Promise.reject(new Error('Python worker is not running'));
+    }
+
+    return new Promise((resolve, reject) => {
+      const id = this.nextId++;
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Python worker timeout after ${timeoutMs / 1000} seconds`));
+      }, timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      // The deadline lets the worker skip requests nobody is waiting for any more
+      const deadline = Date.now() + timeoutMs;
+      this.process.stdin.write(JSON.stringify({ id, type, data, deadline }) + '\n');
+    });
+  }
+
+  /**
+   * Fail all in-flight requests and stop the process
+   */
+  terminate(reason) {
+    if (this.alive) {
+      this.alive = false;
+      try { this.process.kill(); } catch (e) { /* ignore */ }
+    }
+
+    for (const entry of this.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(reason);
+    }
+    this.pending.clear();
+  }
+}
+
+/**
+ * Pool of persistent predictor workers with health checks and restart on crash
+ */
+class WorkerPool {
+  /**
+   * @param {Object} options
+   * @param {string} options.pythonExec - Python executable
+   * @param {string} options.scriptPath - Predictor script supporting --worker
+   * @param {number} options.size - Number of worker processes
+   * @param {number} options.requestTimeoutMs - Per-request timeout
+   * @param {number} options.healthCheckIntervalMs - Interval between pings
+   * @param {number} options.restartDelayMs - Delay before restarting a crashed worker, doubled
+   *   for each further crash within stableAfterMs of starting
+   * @param {number} options.maxRestartDelayMs - Cap on the restart delay
+   * @param {number} options.stableAfterMs - Uptime after which a worker's crash counts as the first again
+   */
+  constructor({
+    pythonExec, scriptPath, size = 2, requestTimeoutMs = 15000, healthCheckIntervalMs = 10000,
+    restartDelayMs = 100, maxRestartDelayMs = 30000, stableAfterMs = 30000
+  }) {
+    this.pythonExec = pythonExec;
+    this.scriptPath = scriptPath;
+    this.size = size;
+    this.requestTimeoutMs = requestTimeoutMs;
+    this.healthCheckIntervalMs = healthCheckIntervalMs;
+    this.workers = [];
+    this.closed = false;
+    this.restarts = 0;
+    this.restartDelayMs = restartDelayMs;
+    this.maxRestartDelayMs = maxRestartDelayMs;
+    this.stableAfterMs = stableAfterMs;
+    // Consecutive quick crashes per worker slot
+    this.crashes = new Array(size).fill(0);
+
+    for (let i = 0; i < size; i++) {
+      this.workers.push(this.startWorker());
+    }
+
+    this.healthTimer = setInterval(() => this.checkHealth(), healthCheckIntervalMs);
+    this.healthTimer.unref();
+  }
+
+  startWorker() {
+    return new PredictorWorker(this.pythonExec, this.scriptPath, (worker) => this.handleExit(worker));
+  }
+
+  handleExit(worker) {
+    const index = this.workers.indexOf(worker);
+    if (index === -1 || this.closed) return;
+
+    // Back off exponentially while a slot keeps crashing soon after start
+    this.crashes[index] = Date.now() - worker.startedAt >= this.stableAfterMs ? 1 : this.crashes[index] + 1;
+    const delayMs = this.restartDelay(this.crashes[index]);
+    this.restarts++;
+    console.error(`⚠️  Python worker ${index} exited, restarting in ${delayMs} ms (restart #${this.restarts})`);
+    const timer = setTimeout(() => {
+      if (!this.closed && this.workers[index] === worker) {
+        this.workers[index] = this.startWorker();
+      }
+    }, delayMs);
+    timer.unref();
+  }
+
+  /**
+   * Restart delay after a slot's nth consecutive quick crash
+   * @param {number} crashes - 1 for the first
+   * @returns {number} - Milliseconds
+   */
+  restartDelay(crashes) {
+    return Math.min(this.restartDelayMs * 2 ** Math.min(crashes - 1, 30), this.maxRestartDelayMs);
+  }
+
+  /**
+   * Pick the live worker with the fewest in-flight requests
+   */
+  pickWorker() {
+    let best = null;
+    for (const worker of this.workers) {
+      if (worker.alive && (!best || worker.pending.size < best.pending.size)) {
+        best = worker;
+      }
+    }
+    return best;
+  }
+
+  /**
+   * Run one prediction on the pool
+   * @param {Object} data - Input data { weather, mood, temperature, humidity }
+   * @param {number} timeoutMs - Time to wait, e.g. what is left of a caller's deadline
+   * @returns {Promise<Object>} - Predictor result ({ prediction, success, ... })
+   */
+  async predict(data, timeoutMs = this.requestTimeoutMs) {
+    const worker = this.pickWorker();
+    if (!worker) {
+      throw new Error('No Python workers available');
+    }
+
+    try {
+      return await worker.send('predict', data, timeoutMs);
+    } catch (error) {
+      // A worker that stops answering is replaced rather than reused. Missing a
+      // shorter caller budget only abandons the request; if the worker is
+      // really stuck, the next health check finds out.
+      if (error.message.includes('timeout') && timeoutMs >= this.requestTimeoutMs) {
+        worker.terminate(error);
+      }
+      throw error;
+    }
+  }
+
+  /**
+   * Ping every idle worker; kill the ones that do not answer so they get restarted.
+   * Busy workers are covered by the per-request timeout instead.
+   */
+  async checkHealth() {
+    await Promise.all(this.workers.map(async (worker) => {
+      if (!worker.alive || worker.pending.size > 0) return;
+      try {
+        await worker.send('ping', {}, Math.min(this.requestTimeoutMs, 5000));
+      } catch (error) {
+        console.error('⚠️  Python worker failed health check:', error.message);
+        worker.terminate(error);
+      }
+    }));
+  }
+
+  /**
+   * Send one message to every live worker
+   * @param {string} type - Message type ('stats', 'metrics', ...)
+   * @returns {Promise<Array<Object>>} - { pid, response } for each worker that answered
+   */
+  async broadcast(type, data = {}) {
+    const results = await Promise.all(this.workers.map(async (worker) => {
+      if (!worker.alive) return null;
+      try {
+        const response = await worker.send(type, data, Math.min(this.requestTimeoutMs, 5000));
+        return { pid: worker.process.pid, response };
+      } catch (error) {
+        return null;
+      }
+    }));
+    return results.filter(Boolean);
+  }
+
+  /**
+   * Ask every live worker for its predictor counters (e.g. prediction cache hits/misses)
+   * @returns {Promise<Array<Object>>} - One { pid, served, stats } entry per worker that answered
+   */
+  async workerStats() {
+    const results = await this.broadcast('stats');
+    return results.map(({ pid, response }) => ({ pid, served: response.served, stats: response.stats }));
+  }
+
+  /**
+   * Collect stage timings, counters and histograms from every live worker
+   * @returns {Promise<Array<Object>>} - One { pid, metrics } entry per worker that answered
+   */
+  async workerMetrics() {
+    const results = await this.broadcast('metrics');
+    return results.map(({ pid, response }) => ({ pid, metrics: response.metrics }));
+  }
+
+  stats() {
+    return {
+      size: this.size,
+      alive: this.workers.filter(w => w.alive).length,
+      inFlight: this.workers.reduce((sum, w) => sum + w.pending.size, 0),
+      restarts: this.restarts
+    };
+  }
+
+  close() {
+    this.closed = true;
+    clearInterval(this.healthTimer);
+    for (const worker of this.workers) {
+      worker.terminate(new Error('Worker pool closed'));
+    }
+  }
+}
+
+module.exports = {
+  WorkerPool
+};
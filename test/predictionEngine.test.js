@@ -0,0 +1,189 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { BAD_REQUEST, UNSUPPORTED, CircuitBreaker, PredictionEngine, parseTiers } = require('../services/predictionEngine');
+
+const TIERS = parseTiers('model:100,feedback:100,rules:100');
+
+/**
+ * Engine whose tiers answer from `answers[tierName](data)`; records the tiers called
+ */
+const makeEngine = (answers, breaker = {}) => {
+  const calls = [];
+  const engine = new PredictionEngine({
+    tiers: TIERS,
+    deadlineMs: 1000,
+    breaker,
+    call: async (tier, data) => {
+      calls.push(tier.name);
+      return answers[tier.name](data);
+    }
+  });
+  return { engine, calls };
+};
+
+const tierStats = (engine, name) => engine.stats().tiers.find((tier) => tier.name === name);
+
+test('CircuitBreaker opens after consecutive failures', () => {
+  const breaker = new CircuitBreaker({ failureThreshold: 3, cooldownMs: 1000, now: () => 0 });
+  breaker.failure();
+  breaker.failure();
+  assert.ok(breaker.allow());
+  breaker.failure();
+  assert.strictEqual(breaker.state, 'open');
+  assert.strictEqual(breaker.allow(), false);
+  assert.strictEqual(breaker.stats().opens, 1);
+});
+
+test('CircuitBreaker success resets the failure count', () => {
+  const breaker = new CircuitBreaker({ failureThreshold: 2, now: () => 0 });
+  breaker.failure();
+  breaker.success();
+  breaker.failure();
+  assert.strictEqual(breaker.state, 'closed');
+});
+
+test('CircuitBreaker lets one trial through after the cooldown', () => {
+  let now = 0;
+  const breaker = new CircuitBreaker({ failureThreshold: 1, cooldownMs: 1000, now: () => now });
+  breaker.failure();
+  now = 999;
+  assert.strictEqual(breaker.allow(), false);
+  now = 1000;
+  assert.strictEqual(breaker.allow(), true);
+  assert.strictEqual(breaker.state, 'half-open');
+  assert.strictEqual(breaker.allow(), false, 'only one trial at a time');
+
+  breaker.success();
+  assert.strictEqual(breaker.state, 'closed');
+  assert.ok(breaker.allow());
+});
+
+test('CircuitBreaker reopens when the trial fails', () => {
+  let now = 0;
+  const breaker = new CircuitBreaker({ failureThreshold: 1, cooldownMs: 1000, now: () => now });
+  breaker.failure();
+  now = 1000;
+  assert.ok(breaker.allow());
+  breaker.failure();
+  assert.strictEqual(breaker.state, 'open');
+  assert.strictEqual(breaker.allow(), false);
+  now = 2000;
+  assert.ok(breaker.allow());
+});
+
+test('PredictionEngine answers from the first tier', async () => {
+  const { engine, calls } = makeEngine({
+    model: async () => ({ prediction: 'Latte', success: true })
+  });
+  const result = await engine.predict({});
+  assert.strictEqual(result.prediction, 'Latte');
+  assert.strictEqual(result.tier, 'model');
+  assert.deepStrictEqual(calls, ['model']);
+});
+
+test('PredictionEngine falls back when a tier fails', async () => {
+  const { engine, calls } = makeEngine({
+    model: async () => { throw new Error('Worker exited'); },
+    feedback: async () => ({ error: 'Prediction error: pickle is corrupt', success: false }),
+    rules: async () => ({ prediction: 'Tea', success: true })
+  });
+  const result = await engine.predict({});
+  assert.strictEqual(result.tier, 'rules');
+  assert.deepStrictEqual(calls, ['model', 'feedback', 'rules']);
+  assert.strictEqual(tierStats(engine, 'model').failures, 1);
+  assert.strictEqual(tierStats(engine, 'feedback').breaker.consecutiveFailures, 1);
+});
+
+test('PredictionEngine skips a tier whose breaker is open', async () => {
+  const { engine, calls } = makeEngine({
+    model: async () => { throw new Error('Worker exited'); },
+    feedback: async () => ({ prediction: 'Chai', success: true })
+  }, { failureThreshold: 2 });
+  await engine.predict({});
+  await engine.predict({});
+  calls.length = 0;
+
+  const result = await engine.predict({});
+  assert.strictEqual(result.tier, 'feedback');
+  assert.deepStrictEqual(calls, ['feedback']);
+  assert.strictEqual(tierStats(engine, 'model').breaker.state, 'open');
+  assert.strictEqual(tierStats(engine, 'model').skipped, 1);
+});
+
+test('PredictionEngine returns rejected requests without falling back', async () => {
+  const { engine, calls } = makeEngine({
+    model: async () => ({ error: 'top_k must be a positive integer', code: BAD_REQUEST, success: false }),
+    feedback: async () => ({ prediction: 'Chai', success: true })
+  });
+  await assert.rejects(engine.predict({ top_k: -1 }), (error) => {
+    assert.strictEqual(error.message, 'top_k must be a positive integer');
+    assert.strictEqual(error.statusCode, 400);
+    return true;
+  });
+  assert.deepStrictEqual(calls, ['model']);
+  assert.strictEqual(tierStats(engine, 'model').rejected, 1);
+  assert.strictEqual(tierStats(engine, 'model').failures, 0);
+});
+
+test('PredictionEngine breakers stay closed under rejected requests', async () => {
+  const { engine } = makeEngine({
+    model: async (data) => (data.top_k === -1
+      ? { error: 'top_k must be a positive integer', code: BAD_REQUEST, success: false }
+      : { prediction: 'Latte', success: true })
+  }, { failureThreshold: 5 });
+  for (let i = 0; i < 10; i++) {
+    await assert.rejects(engine.predict({ top_k: -1 }));
+  }
+
+  const result = await engine.predict({ top_k: 3 });
+  assert.strictEqual(result.tier, 'model');
+  for (const tier of engine.stats().tiers) {
+    assert.strictEqual(tier.breaker.state, 'closed');
+  }
+});
+
+test('PredictionEngine rejected request ends a half-open trial', async () => {
+  let now = 0;
+  const { engine } = makeEngine({
+    model: async (data) => {
+      if (data.fail) throw new Error('Worker exited');
+      return { error: 'top_k must be a positive integer', code: BAD_REQUEST, success: false };
+    },
+    feedback: async () => ({ prediction: 'Chai', success: true })
+  }, { failureThreshold: 1, cooldownMs: 1000, now: () => now });
+  await engine.predict({ fail: true });
+  assert.strictEqual(tierStats(engine, 'model').breaker.state, 'open');
+
+  now = 1000;
+  await assert.rejects(engine.predict({}));
+  assert.strictEqual(tierStats(engine, 'model').breaker.state, 'closed');
+});
+
+test('PredictionEngine falls back on an input the tier does not know', async () => {
+  const { engine, calls } = makeEngine({
+    model: async () => ({ error: 'Prediction error: Unknown weather or mood combination: Sunny_Angry', code: UNSUPPORTED, success: false }),
+    feedback: async () => ({ prediction: 'Lemonade', success: true })
+  }, { failureThreshold: 1 });
+  const result = await engine.predict({ weather: 'Sunny', mood: 'Angry' });
+  assert.strictEqual(result.tier, 'feedback');
+  assert.deepStrictEqual(calls, ['model', 'feedback']);
+  assert.strictEqual(tierStats(engine, 'model').unsupported, 1);
+  assert.strictEqual(tierStats(engine, 'model').failures, 0);
+  assert.strictEqual(tierStats(engine, 'model').breaker.state, 'closed');
+});
+
+test('PredictionEngine reports every tier when all fail', async () => {
+  const { engine } = makeEngine({
+    model: async () => { throw new Error('Python script timeout after 0.1 seconds'); },
+    feedback: async () => { throw new Error('Worker exited'); },
+    rules: async () => { throw new Error('Worker exited'); }
+  });
+  await assert.rejects(engine.predict({}), /All predictor tiers failed \(model: Python script timeout/);
+  assert.strictEqual(tierStats(engine, 'model').timeouts, 1);
+});
+
+test('PredictionEngine skips tiers once the deadline has passed', async () => {
+  const { engine, calls } = makeEngine({});
+  await assert.rejects(engine.predict({}, Date.now() - 1), /model: deadline; feedback: deadline; rules: deadline/);
+  assert.deepStrictEqual(calls, []);
+});
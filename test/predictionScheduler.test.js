@@ -0,0 +1,46 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { PredictionScheduler, SchedulerRejection } = require('../services/predictionScheduler');
+
+/**
+ * A task that finishes when release() is called, recording its start order
+ */
+const gate = (started, name) => {
+  let release;
+  const done = new Promise((resolve) => { release = resolve; });
+  return { task: () => { started.push(name); return done.then(() => name); }, release: () => release() };
+};
+
+test('PredictionScheduler serves interactive work before queued analytics', async () => {
+  const scheduler = new PredictionScheduler({ concurrency: 1, maxQueue: 10 });
+  const started = [];
+  const first = gate(started, 'first');
+  const running = scheduler.run(first.task, { priority: 'analytics' });
+  const analytics = scheduler.run(async () => { started.push('analytics'); }, { priority: 'analytics' });
+  const interactive = scheduler.run(async () => { started.push('interactive'); });
+
+  first.release();
+  await Promise.all([running, analytics, interactive]);
+  assert.deepStrictEqual(started, ['first', 'interactive', 'analytics']);
+});
+
+test('PredictionScheduler sheds analytics for interactive work when full', async () => {
+  const scheduler = new PredictionScheduler({ concurrency: 1, maxQueue: 1 });
+  const started = [];
+  const first = gate(started, 'first');
+  const running = scheduler.run(first.task);
+  const analytics = scheduler.run(async () => 'analytics', { priority: 'analytics' });
+  const interactive = scheduler.run(async () => 'interactive');
+
+  await assert.rejects(analytics, (error) => error instanceof SchedulerRejection && error.reason === 'shed');
+  await assert.rejects(scheduler.run(async () => 'late'), (error) => error.reason === 'full');
+  first.release();
+  assert.strictEqual(await interactive, 'interactive');
+  await running;
+  assert.strictEqual(scheduler.stats().shed, 1);
+});
+
+test('PredictionScheduler rejects unknown priorities', async () => {
+  const scheduler = new PredictionScheduler();
+  await assert.rejects(scheduler.run(async () => {}, { priority: 'batch' }), /Unknown scheduler priority/);
+});
@@ -0,0 +1,35 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { validateRecommendationInput, validateTopK } = require('../middleware/validation');
+
+/**
+ * Run a middleware on a request body; returns { status, body } or { next: true }
+ */
+const run = (middleware, body) => {
+  let outcome = null;
+  const res = {
+    status: (status) => ({ json: (json) => { outcome = { status, body: json }; } })
+  };
+  middleware({ body }, res, () => { outcome = { next: true }; });
+  return outcome;
+};
+
+test('validateTopK accepts a missing or in-range top_k', () => {
+  for (const topK of [undefined, null, 1, 20, '5']) {
+    assert.deepStrictEqual(run(validateTopK, { top_k: topK }), { next: true }, String(topK));
+  }
+});
+
+test('validateTopK rejects anything else with a 400', () => {
+  for (const topK of [-1, 0, 21, 2.5, 'abc', '']) {
+    const outcome = run(validateTopK, { top_k: topK });
+    assert.strictEqual(outcome.status, 400, String(topK));
+    assert.deepStrictEqual(outcome.body.details, ['top_k must be an integer between 1 and 20']);
+  }
+});
+
+test('validateRecommendationInput applies the same top_k check', () => {
+  const body = { weather: 'Sunny', mood: 'Happy', temperature: 25, humidity: 50 };
+  assert.deepStrictEqual(run(validateRecommendationInput, { ...body, top_k: 3 }), { next: true });
+  assert.strictEqual(run(validateRecommendationInput, { ...body, top_k: 'abc' }).status, 400);
+});
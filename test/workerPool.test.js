@@ -0,0 +1,45 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const { WorkerPool } = require('../services/workerPool');
+
+/**
+ * Pool with one fake worker slot (nothing is spawned); restarts are recorded
+ */
+const makePool = (t, options = {}) => {
+  const pool = new WorkerPool({ pythonExec: 'python3', scriptPath: 'predict.py', size: 0, ...options });
+  pool.crashes = [0];
+  pool.started = 0;
+  pool.startWorker = () => {
+    pool.started++;
+    return { alive: true, pending: new Map(), startedAt: Date.now(), terminate() { this.alive = false; } };
+  };
+  pool.workers = [pool.startWorker()];
+  t.mock.method(console, 'error', () => {});
+  return pool;
+};
+
+test('WorkerPool restart delay doubles up to the cap', (t) => {
+  const pool = makePool(t, { restartDelayMs: 100, maxRestartDelayMs: 1000 });
+  assert.deepStrictEqual([1, 2, 3, 4, 5, 50].map((n) => pool.restartDelay(n)), [100, 200, 400, 800, 1000, 1000]);
+  pool.close();
+});
+
+test('WorkerPool backs off while a worker keeps crashing right after start', (t) => {
+  const pool = makePool(t, { stableAfterMs: 60000 });
+  for (let i = 0; i < 3; i++) {
+    pool.handleExit(pool.workers[0]);
+    pool.workers[0] = pool.startWorker();
+  }
+  assert.strictEqual(pool.crashes[0], 3);
+  assert.strictEqual(pool.restarts, 3);
+  pool.close();
+});
+
+test('WorkerPool resets the backoff after a worker ran stably', (t) => {
+  const pool = makePool(t, { stableAfterMs: 60000 });
+  pool.crashes[0] = 5;
+  pool.workers[0].startedAt = Date.now() - 60000;
+  pool.handleExit(pool.workers[0]);
+  assert.strictEqual(pool.crashes[0], 1);
+  pool.close();
+});